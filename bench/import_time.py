@@ -0,0 +1,361 @@
+# Copyright (C) 2022 Louis Vottero louis.vot@gmail.com    All rights reserved.
+
+"""
+    Measure how long vtool modules take to import, outside of Maya.
+
+    Every target is imported in a fresh python with -X importtime (python 3.7 or later).
+    maya, pymel and shiboken are replaced with stub modules so the maya only code paths are imported as they would be in Maya.
+    When no Qt binding is installed vtool.qt is stubbed too, and the times do not include Qt.
+
+    Run from the root of the repository:
+
+        python bench/import_time.py
+        python bench/import_time.py vtool.process_manager.ui_process_manager --repeat 10 --top 30
+        python bench/import_time.py --json > before.json
+"""
+
+from __future__ import print_function
+from __future__ import absolute_import
+
+import os
+import re
+import sys
+import json
+import time
+import types
+import argparse
+import subprocess
+
+python_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'python')
+
+default_targets = ['vtool',
+                   'vtool.maya_lib',
+                   'vtool.maya_lib.rigs',
+                   'vtool.process_manager.ui_process_manager',
+                   'vtool.maya_lib.ui']
+
+#maya and the libraries that ship with it
+stub_packages = ['maya', 'pymel', 'shiboken', 'shiboken2', 'alembic', 'imath']
+
+_line_pattern = re.compile(r'import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)')
+
+#--- stubs
+
+class _StubType(type):
+    """
+    Any attribute of a stub class is another stub class, so maya and Qt names can be used as values and base classes.
+    """
+
+    def __getattr__(cls, name):
+
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        return _make_stub(name)
+
+    def _self(cls, *args):
+        return cls
+
+    __or__ = __ror__ = __and__ = __rand__ = __add__ = __radd__ = __sub__ = __rsub__ = __mul__ = __rmul__ = _self
+
+def _stub_init(self, *args, **kwargs):
+    pass
+
+def _stub_getattr(self, name):
+
+    if name.startswith('__'):
+        raise AttributeError(name)
+
+    return _make_stub(name)
+
+def _stub_call(self, *args, **kwargs):
+    return _Stub()
+
+def _stub_self(self, *args):
+    return self
+
+_stub_members = {'__init__' : _stub_init,
+                 '__getattr__' : _stub_getattr,
+                 '__call__' : _stub_call,
+                 '__iter__' : lambda self: iter([]),
+                 '__len__' : lambda self: 0,
+                 '__bool__' : lambda self: False,
+                 '__nonzero__' : lambda self: False,
+                 '__int__' : lambda self: 0,
+                 '__float__' : lambda self: 0.0,
+                 '__index__' : lambda self: 0}
+
+for _name in ['__or__', '__ror__', '__and__', '__rand__', '__add__', '__radd__', '__sub__', '__rsub__', '__mul__', '__rmul__']:
+    _stub_members[_name] = _stub_self
+
+_Stub = _StubType('_Stub', (object,), _stub_members)
+
+def _make_stub(name):
+    return _StubType(str(name), (_Stub,), {})
+
+class StubModule(types.ModuleType):
+    """
+    A module where every attribute is a stub class.
+    """
+
+    def __getattr__(self, name):
+
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        value = _make_stub(name)
+        setattr(self, name, value)
+
+        return value
+
+class StubFinder(object):
+    """
+    Imports a stub module for every module in the stubbed packages.
+    """
+
+    def __init__(self, packages, maya_version = 2022):
+
+        self.packages = packages
+        self.maya_version = maya_version
+
+    def _is_stubbed(self, fullname):
+
+        return fullname.split('.')[0] in self.packages
+
+    def find_spec(self, fullname, path = None, target = None):
+
+        if not self._is_stubbed(fullname):
+            return
+
+        import importlib.machinery
+        return importlib.machinery.ModuleSpec(fullname, self, is_package = True)
+
+    def create_module(self, spec):
+
+        module = StubModule(spec.name)
+        module.__path__ = []
+
+        if spec.name == 'maya.cmds':
+            module.about = self._about
+
+        return module
+
+    def exec_module(self, module):
+        pass
+
+    def _about(self, *args, **kwargs):
+
+        if kwargs.get('api') or kwargs.get('apiVersion'):
+            return self.maya_version * 10000
+
+        return str(self.maya_version)
+
+def has_qt():
+
+    for name in ['PySide2', 'PySide', 'PyQt4']:
+        try:
+            __import__(name)
+            return True
+        except ImportError:
+            pass
+
+    return False
+
+def install_stubs(maya_version = 2022, stub_qt = False):
+
+    sys.meta_path.insert(0, StubFinder(stub_packages, maya_version))
+
+    if stub_qt:
+        module = StubModule('vtool.qt')
+        module.type_QT = None
+        module.QWIDGETSIZE_MAX = (1 << 24) - 1
+        sys.modules['vtool.qt'] = module
+
+#--- measure
+
+def parse_import_time(text, prefix = 'vtool'):
+    """
+    Returns:
+        dict: dict[module_name] = [self microseconds, cumulative microseconds, depth]
+    """
+
+    found = {}
+
+    for line in text.splitlines():
+
+        match = _line_pattern.match(line)
+
+        if not match:
+            continue
+
+        self_time, cumulative, indent, name = match.groups()
+
+        if prefix and not (name == prefix or name.startswith(prefix + '.')):
+            continue
+
+        found[name] = [int(self_time), int(cumulative), len(indent) // 2]
+
+    return found
+
+def run_child(target, maya_version, qt_mode):
+
+    stub_qt = qt_mode == 'stub' or (qt_mode == 'auto' and not has_qt())
+
+    sys.path.insert(0, python_path)
+
+    install_stubs(maya_version, stub_qt)
+
+    #__import__ goes through the interpreter import, importlib.import_module is not timed by -X importtime
+    start = time.time()
+    __import__(target)
+    elapsed = time.time() - start
+
+    print(json.dumps({'elapsed' : elapsed, 'stub_qt' : stub_qt}))
+
+def measure(target, maya_version = 2022, qt_mode = 'auto', prefix = 'vtool'):
+    """
+    Import target in a new python.
+
+    Returns:
+        dict: {'elapsed':seconds, 'stub_qt':bool, 'modules':see parse_import_time} None if the import failed.
+    """
+
+    command = [sys.executable, '-X', 'importtime', os.path.abspath(__file__), target,
+               '--child', '--maya-version', str(maya_version), '--qt', qt_mode]
+
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+
+    process = subprocess.Popen(command, stdout = subprocess.PIPE, stderr = subprocess.PIPE, env = env)
+    out, err = process.communicate()
+
+    out = out.decode('utf-8', 'replace')
+    err = err.decode('utf-8', 'replace')
+
+    if process.returncode:
+        lines = [line for line in err.splitlines() if not line.startswith('import time:')]
+        print('Could not import %s\n%s' % (target, '\n'.join(lines[-15:])), file = sys.stderr)
+        return
+
+    result = json.loads(out.strip().splitlines()[-1])
+    result['modules'] = parse_import_time(err, prefix)
+
+    return result
+
+def _median(values):
+
+    values = sorted(values)
+    middle = len(values) // 2
+
+    if len(values) % 2:
+        return values[middle]
+
+    return (values[middle - 1] + values[middle]) / 2.0
+
+def benchmark(target, repeat = 5, maya_version = 2022, qt_mode = 'auto', prefix = 'vtool'):
+    """
+    Measure target repeat times after one warm up run, so byte code is already compiled.
+
+    Returns:
+        dict: {'target', 'elapsed', 'stub_qt', 'modules':dict[module_name] = [self, cumulative, depth]} with median times.
+    """
+
+    if not measure(target, maya_version, qt_mode, prefix):
+        return
+
+    results = []
+
+    for inc in range(repeat):
+        result = measure(target, maya_version, qt_mode, prefix)
+
+        if result:
+            results.append(result)
+
+    if not results:
+        return
+
+    modules = {}
+
+    for name in results[0]['modules']:
+
+        runs = [result['modules'][name] for result in results if name in result['modules']]
+
+        modules[name] = [_median([run[0] for run in runs]),
+                         _median([run[1] for run in runs]),
+                         runs[0][2]]
+
+    return {'target' : target,
+            'elapsed' : _median([result['elapsed'] for result in results]),
+            'stub_qt' : results[0]['stub_qt'],
+            'modules' : modules}
+
+def report(result, top = 20, sort = 'cumulative'):
+
+    modules = result['modules']
+
+    sort_index = 1
+    if sort == 'self':
+        sort_index = 0
+
+    names = sorted(modules, key = lambda name: modules[name][sort_index], reverse = True)
+
+    title = '%s  %.1f ms, %s modules' % (result['target'], result['elapsed'] * 1000, len(modules))
+    if result['stub_qt']:
+        title += ', Qt stubbed'
+
+    lines = [title, '%10s %12s  %s' % ('self ms', 'cumulative', 'module')]
+
+    for name in names[:top]:
+        self_time, cumulative, depth = modules[name]
+        lines.append('%10.2f %12.2f  %s' % (self_time / 1000.0, cumulative / 1000.0, name))
+
+    return '\n'.join(lines)
+
+def main(args = None):
+
+    parser = argparse.ArgumentParser(description = 'Measure the import time of vtool modules with maya stubbed.')
+    parser.add_argument('targets', nargs = '*', default = default_targets)
+    parser.add_argument('--repeat', type = int, default = 5)
+    parser.add_argument('--top', type = int, default = 20)
+    parser.add_argument('--sort', choices = ['cumulative', 'self'], default = 'cumulative')
+    parser.add_argument('--maya-version', type = int, default = 2022)
+    parser.add_argument('--qt', choices = ['auto', 'real', 'stub'], default = 'auto')
+    parser.add_argument('--prefix', default = 'vtool', help = 'Only report modules in this package. Empty for all.')
+    parser.add_argument('--json', action = 'store_true', help = 'Print the results as json.')
+    parser.add_argument('--child', action = 'store_true', help = argparse.SUPPRESS)
+
+    options = parser.parse_args(args)
+
+    if options.child:
+        run_child(options.targets[0], options.maya_version, options.qt)
+        return
+
+    if sys.version_info < (3, 7):
+        print('The import benchmark needs python 3.7 or later.', file = sys.stderr)
+        return 1
+
+    results = []
+    failed = False
+
+    for target in options.targets:
+
+        result = benchmark(target, options.repeat, options.maya_version, options.qt, options.prefix)
+
+        if not result:
+            failed = True
+            continue
+
+        results.append(result)
+
+        if not options.json:
+            print(report(result, options.top, options.sort))
+            print('')
+
+    if options.json:
+        print(json.dumps(results, indent = 4, sort_keys = True))
+
+    if failed:
+        return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -21,6 +21,11 @@ util.suggest_env('VETALA_COPIED_PROCESS', '')
 util.suggest_env('VETALA_PRE_SAVE_INITIALIZED', 'False')
 util.suggest_env('VETALA_SAVE_COMMENT', '')
 util.suggest_env('VETALA_KEEP_TEMP_LOG', 'False')
+util.suggest_env('VETALA_VERSION_STORE', 'False')
+util.suggest_env('VETALA_PROCESS_INDEX', 'True')
+util.suggest_env('VETALA_CODE_CACHE_DISK', 'False')
+util.suggest_env('VETALA_PROFILE_BUILD', 'off')
+util.suggest_env('VETALA_FILE_LOCKS', 'False')
 
 util.show('VETALA %s' % util_file.get_vetala_version())
 util.suggest_env('VETALA_SETTINGS',util_file.get_default_directory())
\ No newline at end of file
@@ -4,11 +4,15 @@ from __future__ import absolute_import
 
 import json
 
+import time
 import traceback
 import threading
 
 from . import util, util_file
 
+#util_weights brings in numpy, only load it once skin weights are read or written
+util_weights = util.lazy_import('vtool.util_weights')
+
 
 if util.is_in_maya():
     
@@ -17,7 +21,7 @@ if util.is_in_maya():
     
     from . import maya_lib
 
-from vtool import util_shotgun
+util_shotgun = util.lazy_import('vtool.util_shotgun')
 
 from vtool import logger
 log = logger.get_logger(__name__) 
@@ -1032,11 +1036,16 @@ class SkinWeightData(MayaCustomData):
             return
         
         found_single_file_weights = False
+        found_binary_weights = False
         
         influences = []
         
         for filename in files:
             
+            if filename == util_weights.BINARY_WEIGHTS_FILE:
+                found_binary_weights = True
+                continue
+            
             if filename == 'all.skin.weights':
                 found_single_file_weights = True
                 continue
@@ -1048,7 +1057,7 @@ class SkinWeightData(MayaCustomData):
         
         info_file = util_file.join_path(folder_path, 'influence.info')
         
-        if not util_file.is_file(info_file):
+        if not util_file.is_file(info_file) and not found_binary_weights:
             return
         
         info_lines = util_file.get_file_lines(info_file)
@@ -1061,8 +1070,24 @@ class SkinWeightData(MayaCustomData):
             
             line_dict = eval(line)
             influence_dict.update(line_dict)
+        
+        if found_binary_weights:
+            path = util_file.join_path(folder_path, util_weights.BINARY_WEIGHTS_FILE)
+            
+            csr = util_weights.read_skin_weights(path)
+            
+            if csr:
+                weights_dict = csr.get_influence_weights()
+                
+                for influence in weights_dict:
+                    if not influence in influence_dict:
+                        influence_dict[influence] = {'position' : csr.get_position(influence)}
+                    influence_dict[influence]['weights'] = weights_dict[influence]
+                
+                return influence_dict
+            
+            util.warning('Could not read binary weights. Trying text weights instead.')
                
-        threads = [] 
         weights_dict = {}
         
         single_file = False
@@ -1094,20 +1119,26 @@ class SkinWeightData(MayaCustomData):
             return
             
         if not weights_dict:
-            for influence in influences:
+            
+            workers = None
+            if self.settings.has_setting('workers'):
+                workers = self.settings.get('workers')
+            
+            with util.WorkerPool(workers) as pool:
                 
+                jobs = [pool.submit(read_weight_file, folder_path, influence) for influence in influences]
                 
-                try:
-                    read_thread = ReadWeightFileThread(influence_dict, folder_path, influence)
-                    threads.append(read_thread)
-                    read_thread.start()
-                    #read_thread.run()
-                except:
-                    util.error(traceback.format_exc())
-                    util.show('Errors with %s weight file.' % influence)
-        
-            for thread in threads:
-                thread.join()
+                for job, influence in zip(jobs, influences):
+                    
+                    try:
+                        influence_name, weights = job.result()
+                    except:
+                        util.error(traceback.format_exc())
+                        util.show('Errors with %s weight file.' % influence)
+                        continue
+                    
+                    if influence_name in influence_dict:
+                        influence_dict[influence_name]['weights'] = weights
         else:
             for influence in influence_dict:
                 influence_dict[influence]['weights'] = weights_dict[influence]
@@ -1356,6 +1387,12 @@ class SkinWeightData(MayaCustomData):
     def set_single_file(self, bool_value):
         self.settings.set('single file', bool_value)
     
+    def set_binary(self, bool_value):
+        self.settings.set('binary file', bool_value)
+    
+    def set_workers(self, int_value):
+        self.settings.set('workers', int_value)
+    
     def import_skin_weights(self, directory, mesh, first = True):
         
         nicename = maya_lib.core.get_basename(mesh)
@@ -1429,6 +1466,10 @@ class SkinWeightData(MayaCustomData):
                     
                     ran_mesh_check = True
                     
+                    if compatible_mesh:
+                        #mirroring the imported weights can use the maps saved with them
+                        maya_lib.geo.load_mirror_maps(mesh, directory)
+                    
                 else:
                     
                     skin_attribute_dict[attr_name] = value
@@ -1547,15 +1588,21 @@ class SkinWeightData(MayaCustomData):
                 weights_found.append( influence_dict[influence]['weights'] )
                 influences_found.append( influence )
             
-            for inc in range(0, len(weights_found[0])):
+            if util_weights.has_numpy():
                 
-                for inc2 in range(0, len(influences_found)):
-                    
-                    weight = weights_found[inc2][inc]
+                weight_array = om.MDoubleArray(util_weights.assemble_weights(weights_found).tolist())
+            
+            else:
+                
+                for inc in range(0, len(weights_found[0])):
                     
-                    if type(weight) == int:
-                        weight = float(weight)
-                    weight_array.append(weight)
+                    for inc2 in range(0, len(influences_found)):
+                        
+                        weight = weights_found[inc2][inc]
+                        
+                        if type(weight) == int:
+                            weight = float(weight)
+                        weight_array.append(weight)
             
             if len(weights_found) == len(influences_found):
                 maya_lib.api.set_skin_weights(skin_cluster, weight_array, 0)
@@ -1575,59 +1622,94 @@ class SkinWeightData(MayaCustomData):
             
             progress_ui = maya_lib.core.ProgressBar('import skin', len(list(influence_dict.keys())))
             
-            for influence in influences:
+            if util_weights.has_numpy():
                 
-                orig_influence = influence
-                
-                if influence.count('|') > 1:
-                    split_influence = influence.split('|')
-                    
-                    if len(split_influence) > 1:
-                        influence = split_influence[-1]
+                progress_ui.status('importing skin mesh: %s' % short_name)
                 
-                message = 'importing skin mesh: %s,  influence: %s' % (short_name, influence)
+                weights_found = []
+                influence_indices = []
                 
-                progress_ui.status(message)                
+                for influence in influences:
                     
-                if not 'weights' in influence_dict[orig_influence]:
-                    util.warning('Weights missing for influence %s' % influence)
-                    return 
-                
-                weights = influence_dict[orig_influence]['weights']
-                
-                
-                if not influence in influence_index_dict:
-                    continue
-                
-                index = influence_index_dict[influence]
-                
-                attr = '%s.weightList[*].weights[%s]' % (skin_cluster, index)
+                    if not 'weights' in influence_dict[influence]:
+                        util.warning('Weights missing for influence %s' % influence)
+                        return
+                    
+                    short_influence = influence
+                    
+                    if influence.count('|') > 1:
+                        short_influence = influence.split('|')[-1]
+                    
+                    if not short_influence in influence_index_dict:
+                        continue
+                    
+                    weights_found.append(influence_dict[influence]['weights'])
+                    influence_indices.append(influence_index_dict[short_influence])
                 
-                #this wasn't faster, zipping zero weights is much faster than setting all the weights
-                #cmds.setAttr(attr, *weights )
+                if weights_found:
+                    
+                    matrix = util_weights.prune_weights(util_weights.get_weight_matrix(weights_found), 0.0001)
+                    verts, columns, weights = util_weights.get_nonzero_weights(matrix)
+                    
+                    influence_indices = util_weights.numpy.asarray(influence_indices)[columns]
+                    
+                    maya_lib.api.set_skin_weight_plugs(skin_cluster, verts, influence_indices, weights)
+            
+            else:
                 
-                for inc in range(0, len(weights)):
-                            
-                    weight = float(weights[inc])
+                for influence in influences:
+                    
+                    orig_influence = influence
+                    
+                    if influence.count('|') > 1:
+                        split_influence = influence.split('|')
+                        
+                        if len(split_influence) > 1:
+                            influence = split_influence[-1]
+                    
+                    message = 'importing skin mesh: %s,  influence: %s' % (short_name, influence)
+                    
+                    progress_ui.status(message)                
+                        
+                    if not 'weights' in influence_dict[orig_influence]:
+                        util.warning('Weights missing for influence %s' % influence)
+                        return 
+                    
+                    weights = influence_dict[orig_influence]['weights']
                     
-                    if weight == 0 or weight < 0.0001:
+                    
+                    if not influence in influence_index_dict:
                         continue
                     
-                    attr = '%s.weightList[%s].weights[%s]' % (skin_cluster, inc, index)
+                    index = influence_index_dict[influence]
                     
-                    cmds.setAttr(attr, weight)
-                                 
-                progress_ui.inc()
-                
-                if util.break_signaled():
-                    break
+                    attr = '%s.weightList[*].weights[%s]' % (skin_cluster, index)
+                    
+                    #this wasn't faster, zipping zero weights is much faster than setting all the weights
+                    #cmds.setAttr(attr, *weights )
+                    
+                    for inc in range(0, len(weights)):
                                 
-                if progress_ui.break_signaled():
-                            
-                    break
+                        weight = float(weights[inc])
+                        
+                        if weight == 0 or weight < 0.0001:
+                            continue
+                        
+                        attr = '%s.weightList[%s].weights[%s]' % (skin_cluster, inc, index)
+                        
+                        cmds.setAttr(attr, weight)
+                                     
+                    progress_ui.inc()
+                    
+                    if util.break_signaled():
+                        break
+                                    
+                    if progress_ui.break_signaled():
+                                
+                        break
+                    
+                    influence_inc += 1
                 
-                influence_inc += 1
-            
             progress_ui.end()                    
             
             cmds.skinCluster(skin_cluster, edit = True, normalizeWeights = 1)
@@ -1668,12 +1750,24 @@ class SkinWeightData(MayaCustomData):
         cmds.undoInfo(state = True)
     
     @util.stop_watch_wrapper
-    def export_data(self, comment, selection = [], single_file = False, version_up = True, blend_weights = True, long_names = False, second_only = False):
+    def export_data(self, comment, selection = [], single_file = False, version_up = True, blend_weights = True, long_names = False, second_only = False, binary = False, workers = None, compress = None):
+        """
+        Export skin weights. 
+        Weights are gathered from Maya on the main thread, files are serialized, compressed and written on a pool of worker threads.
+        
+        Args:
+            binary (bool): Write a single weights.csr file per mesh. Older versions of Vetala can not read it. Takes the place of single_file.
+            workers (int): The number of threads used to write files. Uses the workers setting, or util.get_worker_count when not given.
+            compress (bool): Compress binary weights files with zlib. Uses the compress setting when not given.
+        """
         
         if selection == None:
             util.warning('Nothing selected to export skin weights. Please select a mesh, curve, nurb surface or lattice with skin weights.')
             return
         
+        if binary and single_file:
+            util.warning('Binary file and single file are both on. Exporting binary weights, single file is ignored.')
+        
         if not selection:
             meshes = maya_lib.core.get_transforms_with_shape_of_type('mesh')
             curves = maya_lib.core.get_transforms_with_shape_of_type('nurbsCurve')
@@ -1685,164 +1779,169 @@ class SkinWeightData(MayaCustomData):
             
         found_one = False
         
-        progress = maya_lib.core.ProgressBar('Exporting skin weights on:', len(selection))
+        if not workers and self.settings.has_setting('workers'):
+            workers = self.settings.get('workers')
         
-        for thing in selection:
+        if compress is None:
+            compress = bool(self.settings.has_setting('compress') and self.settings.get('compress'))
+        
+        with util.WorkerPool(workers) as pool:
+            export_jobs = []
             
-            if not long_names:
-                thing = cmds.ls(thing)[0]
-            if long_names:
-                thing = cmds.ls(thing, l = True)[0]                
-
-            progress.status('Exporting skin weights on %s ' % (maya_lib.core.get_basename(thing)))
+            progress = maya_lib.core.ProgressBar('Exporting skin weights on:', len(selection))
             
-            if maya_lib.core.is_a_shape(thing):
+            for thing in selection:
+                
                 if not long_names:
-                    thing = cmds.listRelatives(thing, p = True)[0]
+                    thing = cmds.ls(thing)[0]
                 if long_names:
-                    thing = cmds.listRelatives(thing, p = True, f = True)[0]
-            
-            thing_filename = thing
-            
-            if thing.find('|') > -1:
-                #thing = cmds.ls(thing, l = True)[0]
+                    thing = cmds.ls(thing, l = True)[0]                
+
+                progress.status('Exporting skin weights on %s ' % (maya_lib.core.get_basename(thing)))
                 
-                thing_filename = thing_filename.replace('|', '.')
-                if thing_filename.startswith('.'):
-                    thing_filename = thing_filename[1:]
-            
-            if thing_filename.find(':') > -1:
-                thing_filename = thing_filename.replace(':', '-')
-            
-            util.show('Exporting weights on: %s' % thing)
-            
-            skins = maya_lib.deform.find_deformer_by_type(thing, 'skinCluster', return_all = True)
-            
-            if not skins:
-                util.warning('Skin export failed. No skinCluster found on %s.' % thing)
-            
-            if skins:
-                inc = 0
-                if second_only:
-                    inc = 1
-                for skin in skins:
-                    path = self.get_file(inc)
-                    found_one = True
-                    
-                    geo_path = util_file.join_path(path, thing_filename)
+                if maya_lib.core.is_a_shape(thing):
+                    if not long_names:
+                        thing = cmds.listRelatives(thing, p = True)[0]
+                    if long_names:
+                        thing = cmds.listRelatives(thing, p = True, f = True)[0]
+                
+                thing_filename = thing
+                
+                if thing.find('|') > -1:
+                    #thing = cmds.ls(thing, l = True)[0]
                     
-                    if util_file.is_dir(geo_path, case_sensitive=True):
-                        files = util_file.get_files(geo_path)
+                    thing_filename = thing_filename.replace('|', '.')
+                    if thing_filename.startswith('.'):
+                        thing_filename = thing_filename[1:]
+                
+                if thing_filename.find(':') > -1:
+                    thing_filename = thing_filename.replace(':', '-')
+                
+                util.show('Exporting weights on: %s' % thing)
+                
+                skins = maya_lib.deform.find_deformer_by_type(thing, 'skinCluster', return_all = True)
+                
+                if not skins:
+                    util.warning('Skin export failed. No skinCluster found on %s.' % thing)
+                
+                if skins:
+                    inc = 0
+                    if second_only:
+                        inc = 1
+                    for skin in skins:
+                        path = self.get_file(inc)
+                        found_one = True
                         
-                        for filename in files:
-                            util_file.delete_file(filename, geo_path)
-                    
-                    else:
-                        geo_path = util_file.create_dir(thing_filename, path)
-                    
-                    if not geo_path:
-                        util.error('Please check! Unable to create skin weights directory: %s in %s' % (thing_filename, path))
-                        continue
-                    
-                    weights = maya_lib.deform.get_skin_weights(skin)
-                                    
-                    info_file = util_file.create_file( 'influence.info', geo_path )
-                    settings_file = util_file.create_file('settings.info', geo_path)
-                    
-                    info_lines = []
-                    settings_lines = []
-                    weights_dict = {}
-                    
-                    for influence in weights:
+                        geo_path = util_file.join_path(path, thing_filename)
                         
-                        if influence == None or influence == 'None':
-                            continue
+                        is_mesh = maya_lib.core.has_shape_of_type(thing, 'mesh')
                         
-                        weight_list = weights[influence]
+                        if is_mesh:
+                            #mirror maps saved with the last export are kept, the folder is cleared next
+                            maya_lib.geo.load_mirror_maps(thing, geo_path)
+                        
+                        if util_file.is_dir(geo_path, case_sensitive=True):
+                            files = util_file.get_files(geo_path)
+                            
+                            for filename in files:
+                                util_file.delete_file(filename, geo_path)
                         
-                        if not weight_list:
+                        else:
+                            geo_path = util_file.create_dir(thing_filename, path)
+                        
+                        if not geo_path:
+                            util.error('Please check! Unable to create skin weights directory: %s in %s' % (thing_filename, path))
                             continue
                         
-                        if not single_file:
-                            thread = LoadWeightFileThread()
+                        start_time = time.time()
                         
-                            influence_line = thread.run(influence, skin, weights[influence], geo_path)
-                        else:
+                        weights = maya_lib.deform.get_skin_weights(skin)
+                        
+                        info_lines = []
+                        settings_lines = []
+                        weights_dict = {}
+                        positions_dict = {}
+                        
+                        for influence in weights:
+                            
+                            if influence == None or influence == 'None':
+                                continue
+                            
+                            weight_list = weights[influence]
+                            
+                            if not weight_list:
+                                continue
+                            
                             influence_name = maya_lib.deform.get_skin_influence_at_index(influence, skin)
-                            sub_weights = weights[influence]
                             
                             if not influence_name or not cmds.objExists(influence_name):
                                 continue
                             
-                            weights_dict[influence_name] = sub_weights
+                            weights_dict[influence_name] = weight_list
                             
                             influence_position = cmds.xform(influence_name, q = True, ws = True, t = True)
-                            influence_line = "{'%s' : {'position' : %s}}" % (influence_name, str(influence_position))
-                        
-                        if influence_line:
-                            info_lines.append(influence_line)
+                            positions_dict[influence_name] = influence_position
                             
-                    
-                    if single_file:
-                        filepath = util_file.create_file('all.skin.weights', geo_path)
+                            info_lines.append("{'%s' : {'position' : %s}}" % (influence_name, str(influence_position)))
                         
-                        lines = []
+                        blend_weights_attr = '%s.blendWeights' % skin
                         
-                        for key in weights_dict:
-                            lines.append('%s=%s' % (key, str(weights_dict[key])))
+                        export_attrs = ['skinningMethod', 'maintainMaxInfluences', 'maxInfluences']
                         
-                        util_file.write_lines(filepath, lines)
-                    
-                    util_file.write_lines(info_file, info_lines)
-                    
-                    blend_weights_attr = '%s.blendWeights' % skin
-                    
-                    export_attrs = ['skinningMethod', 'maintainMaxInfluences', 'maxInfluences']
-                    
-                    if maya_lib.core.has_shape_of_type(thing, 'mesh'):
-                        self._export_ref_obj(thing, geo_path)
+                        if is_mesh:
+                            self._export_ref_obj(thing, geo_path)
+                            maya_lib.geo.save_mirror_maps(thing, geo_path)
+                            
+                            verts, edges, faces = maya_lib.geo.get_vert_edge_face_count(thing)
+                            verts1 = maya_lib.geo.get_face_vert_indices(thing, 0)
+                            verts2 = maya_lib.geo.get_face_vert_indices(thing, -1)
+                            
+                            settings_lines.append("['mesh info', %s]" % [verts,edges,faces, verts1, verts2])
                         
-                        verts, edges, faces = maya_lib.geo.get_vert_edge_face_count(thing)
-                        verts1 = maya_lib.geo.get_face_vert_indices(thing, 0)
-                        verts2 = maya_lib.geo.get_face_vert_indices(thing, -1)
+                        if cmds.objExists(blend_weights_attr) and blend_weights:
+                            
+                            maya_lib.core.print_help('Exporting %s blend weights (for dual quaternion)' % maya_lib.core.get_basename(thing))
+                            
+                            blend_weight_values = maya_lib.deform.get_skin_blend_weights(skin)
+                            
+                            settings_lines.append("['blendWeights', %s]" % blend_weight_values)
                         
-                        settings_lines.append("['mesh info', %s]" % [verts,edges,faces, verts1, verts2])
-                    
-                    if cmds.objExists(blend_weights_attr) and blend_weights:
+                        for attribute_name in export_attrs:
+                            
+                            attribute_path = '%s.%s' % (skin, attribute_name)
+                            
+                            if not cmds.objExists(attribute_path):
+                                continue
+                                
+                            attribute_value = cmds.getAttr(attribute_path)
+                            settings_lines.append("['%s', %s]" % (attribute_name, attribute_value))
                         
-                        maya_lib.core.print_help('Exporting %s blend weights (for dual quaternion)' % maya_lib.core.get_basename(thing))
+                        gather_time = time.time() - start_time
                         
-                        blend_weights = maya_lib.deform.get_skin_blend_weights(skin)
+                        #file writing does not need maya, it runs on the pool while the next mesh is gathered
+                        job = pool.submit(self._write_skin_weight_files, geo_path, weights_dict, positions_dict, 
+                                          info_lines, settings_lines, binary, single_file, compress)
                         
-                        settings_lines.append("['blendWeights', %s]" % blend_weights)
-                    
-                    for attribute_name in export_attrs:
+                        export_jobs.append([thing, gather_time, job])
                         
-                        attribute_path = '%s.%s' % (skin, attribute_name)
+                        mesh_folder = util_file.get_basename(geo_path)
+                        deformer_folder = util_file.get_basename(util_file.get_dirname(geo_path))
                         
-                        if not cmds.objExists(attribute_path):
-                            continue
-                            
-                        attribute_value = cmds.getAttr(attribute_path)
-                        settings_lines.append("['%s', %s]" % (attribute_name, attribute_value))
-                    
-                    util_file.write_lines(settings_file, settings_lines)
-                    
-                    mesh_folder = util_file.get_basename(geo_path)
-                    deformer_folder = util_file.get_basename(util_file.get_dirname(geo_path))
+                        util.show('Skin weights exported to folder: %s/%s' % (deformer_folder,mesh_folder))
+                        if second_only:
+                            break
+                        inc += 1
                     
-                    util.show('Skin weights exported to folder: %s/%s' % (deformer_folder,mesh_folder))
-                    if second_only:
-                        break
-                    inc += 1
+                if progress.break_signaled():
+                    progress.end()
+                    break
                 
-            if progress.break_signaled():
-                progress.end()
-                break
-            
-            progress.next()
+                progress.next()
             
+            progress.status('Exporting skin weights: writing files')
             
+            self._show_export_report(export_jobs)
+        
         if not found_one:
             util.warning('No skin weights found on selected. Please select a mesh, curve, nurb surface or lattice with skin weights.')
         
@@ -1856,6 +1955,82 @@ class SkinWeightData(MayaCustomData):
         
         progress.end()
     
+    def _write_skin_weight_files(self, geo_path, weights_dict, positions_dict, info_lines, settings_lines, binary, single_file, compress = False):
+        """
+        Write the files for one skin cluster. Runs on a worker thread, so no maya commands.
+        
+        Returns:
+            float: Seconds spent writing.
+        """
+        
+        start_time = time.time()
+        
+        influence_names = list(weights_dict.keys())
+        influence_names.sort()
+        
+        if binary and influence_names:
+            positions = []
+            weight_lists = []
+            
+            for influence_name in influence_names:
+                positions.append(positions_dict[influence_name])
+                weight_lists.append(weights_dict[influence_name])
+            
+            filepath = util_file.join_path(geo_path, util_weights.BINARY_WEIGHTS_FILE)
+            util_weights.write_skin_weights(filepath, influence_names, positions, weight_lists, len(weight_lists[0]), compress)
+            util_file.get_permission(filepath)
+        
+        elif single_file:
+            filepath = util_file.create_file('all.skin.weights', geo_path)
+            
+            lines = []
+            
+            for influence_name in influence_names:
+                lines.append('%s=%s' % (influence_name, str(weights_dict[influence_name])))
+            
+            util_file.write_lines(filepath, lines)
+        
+        else:
+            for influence_name in influence_names:
+                
+                influence_filename = influence_name.replace(':', '-')
+                filepath = util_file.create_file('%s.weights' % influence_filename, geo_path)
+                
+                if not filepath:
+                    continue
+                
+                util_file.write_lines(filepath, str(weights_dict[influence_name]))
+        
+        info_file = util_file.create_file( 'influence.info', geo_path )
+        util_file.write_lines(info_file, info_lines)
+        
+        settings_file = util_file.create_file('settings.info', geo_path)
+        util_file.write_lines(settings_file, settings_lines)
+        
+        return time.time() - start_time
+    
+    def _show_export_report(self, export_jobs):
+        
+        if not export_jobs:
+            return
+        
+        report_lines = ['Skin weight export timing:']
+        
+        for thing, gather_time, job in export_jobs:
+            
+            try:
+                write_time = job.result()
+            except:
+                util.error(traceback.format_exc())
+                util.warning('Could not write skin weight files for %s' % thing)
+                continue
+            
+            report_lines.append('    %s    gather: %s seconds    write: %s seconds' % (maya_lib.core.get_basename(thing), 
+                                                                                        round(gather_time, 2), 
+                                                                                        round(write_time, 2)))
+        
+        util.show('\n'.join(report_lines))
+    
     def get_skin_meshes(self):
         
         filepath = self.get_file()
@@ -1909,6 +2084,26 @@ class LoadWeightFileThread(threading.Thread):
         influence_position = cmds.xform(influence_name, q = True, ws = True, t = True)
         return "{'%s' : {'position' : %s}}" % (influence_name, str(influence_position))
         
+def read_weight_file(folder_path, filename):
+    """
+    Read an influence .weights text file.
+    
+    Returns:
+        tuple: (influence name, list of weights). Weights are None if the file is empty.
+    """
+    
+    file_path = util_file.join_path(folder_path, filename)
+    
+    influence = filename.split('.')[0]
+    influence = influence.replace('-', ':')
+    
+    lines = util_file.get_file_lines(file_path)
+    
+    if not lines:
+        return influence, None
+    
+    return influence, json.loads(lines[0])
+
 class ReadWeightFileThread(threading.Thread):
     def __init__(self,influence_dict, folder_path, influence):
         super(ReadWeightFileThread, self).__init__()
@@ -1977,32 +2172,36 @@ class BlendshapeWeightData(MayaCustomData):
             util.warning('No blendshapes to export')
             return    
         
-        for blendshape in blendshapes:
-            
-            blend = maya_lib.blendshape.BlendShape(blendshape)
+        with util_file.FileBatch() as batch:
             
-            mesh_count = blend.get_mesh_count()
-            targets = blend.get_target_names()
-            
-            blendshape_path = util_file.create_dir(blendshape, path)
-            
-            for target in targets:
+            for blendshape in blendshapes:
                 
-                target_path = util_file.create_dir(target, blendshape_path)
+                blend = maya_lib.blendshape.BlendShape(blendshape)
                 
-                for inc in range(mesh_count):
-                    
-                    weights = blend.get_weights(target, inc)
-                             
-                    filename = util_file.create_file('mesh_%s.weights' % inc, target_path)
-                    util_file.write_lines(filename, [weights])
-            
-            for inc in range(mesh_count):
+                mesh_count = blend.get_mesh_count()
+                targets = blend.get_target_names()
+                
+                blendshape_path = util_file.join_path(path, blendshape)
+                batch.add_dir(blendshape_path)
                 
-                weights = blend.get_weights(None, inc)
+                for target in targets:
+                    
+                    target_path = util_file.join_path(blendshape_path, target)
+                    batch.add_dir(target_path)
+                    
+                    for inc in range(mesh_count):
+                        
+                        weights = blend.get_weights(target, inc)
+                        
+                        filename = util_file.join_path(target_path, 'mesh_%s.weights' % inc)
+                        batch.add_lines(filename, [weights])
                 
-                filename = util_file.create_file('base_%s.weights' % inc, blendshape_path)
-                util_file.write_lines(filename, [weights])
+                for inc in range(mesh_count):
+                    
+                    weights = blend.get_weights(None, inc)
+                    
+                    filename = util_file.join_path(blendshape_path, 'base_%s.weights' % inc)
+                    batch.add_lines(filename, [weights])
             
         maya_lib.core.print_help('Exported %s data' % self.name)
     
@@ -2097,6 +2296,8 @@ class DeformerWeightData(MayaCustomData):
         found_one = False
         visited = []
         
+        batch = util_file.FileBatch()
+        
         for mesh in meshes:
             
             mesh_vert_count = len(maya_lib.geo.get_vertices(mesh))
@@ -2117,10 +2318,7 @@ class DeformerWeightData(MayaCustomData):
                     indices = mel.eval('deformer -q -gi %s' % deformer)
                     #indices = maya_lib.attr.get_indices('%s.input' % deformer)
                     
-                    filepath = util_file.create_file('%s.weights' % deformer, path)
-                    
-                    if not filepath:
-                        return
+                    filepath = util_file.join_path(path, '%s.weights' % deformer)
                     
                     for index in indices:
                         weights = maya_lib.deform.get_deformer_weights(deformer, index)
@@ -2140,13 +2338,13 @@ class DeformerWeightData(MayaCustomData):
                         found_one = True
                         visited.append(deformer)
                     
-                    util_file.write_lines(filepath, info_lines)
-                    
-                    util_file.get_permission(path)
-                    version = util_file.VersionFile(path)
-                    version.save(comment)
+                    batch.add_lines(filepath, info_lines)
                     
                     util.show('Exported weights on %s.' % deformer) 
+        
+        if batch.flush():
+            version = util_file.VersionFile(path)
+            version.save(comment)
                 
         if not found_one:
             util.warning('Found no deformers to export weights.')
@@ -1,4 +1,13 @@
 # Copyright (C) 2022 Louis Vottero louis.vot@gmail.com    All rights reserved.
 
-from . import geo
-from . import corrective
\ No newline at end of file
+from __future__ import absolute_import
+
+from .. import util
+
+#submodules are imported the first time they are used, so importing maya_lib is cheap
+_submodules = ['anim', 'api', 'attr', 'blendshape', 'core', 'corrective', 'curve', 'deform', 'fx', 'geo',
+               'picker', 'rigs', 'rigs_util', 'shade', 'space', 'ui', 'ui_core', 'ui_lib']
+
+if not util.set_lazy_submodules(globals(), _submodules):
+    from . import geo
+    from . import corrective
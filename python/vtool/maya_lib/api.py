@@ -6,6 +6,7 @@ import math
 
 from .. import util
 from .. import util_math
+from .. import util_mesh
 
 if util.is_in_maya():
     import maya.cmds as cmds
@@ -1358,6 +1359,34 @@ def get_mesh_points(name):
     points = meshfn.getPoints()
     
     return points
+
+def get_mesh_topology(name):
+    """
+    Returns:
+        tuple: (face vertex counts, face vertex indices) as lists.
+    """
+    
+    mobject = get_object(name)
+    
+    meshfn = om.MFnMesh(mobject)
+    counts, connects = meshfn.getVertices()
+    
+    return list(counts), list(connects)
+
+def get_topology(name):
+    """
+    Get the connectivity of a mesh. It is only built once per topology, see util_mesh.get_topology
+    
+    Returns:
+        util_mesh.MeshTopology
+    """
+    
+    mobject = get_object(name)
+    
+    meshfn = om.MFnMesh(mobject)
+    counts, connects = meshfn.getVertices()
+    
+    return util_mesh.get_topology(list(counts), list(connects), meshfn.numVertices)
      
 
 def get_distance(three_value_list1, three_value_list2 ):
@@ -1483,37 +1512,15 @@ def get_scale_from_matrix(matrix):
     #omAnim
     
 def get_face_vertices(mesh, index):
+    """
+    Get the vertices connected to the vertices of a face, the same as MItMeshPolygon.getConnectedVertices
+    """
     
-    api_object = get_object(mesh)
-    
-    iter_face_fn = om.MItMeshPolygon(api_object)
-    
-    iter_face_fn.setIndex(index)
-    verts = iter_face_fn.getConnectedVertices()
-    
-    return verts
+    return get_topology(mesh).get_face_ring(index)
     
 def get_surrounding_vertex_indices(mesh, index):
     
-    api_object = get_object(mesh)
-    
-    iter_vertex_fn = om.MItMeshVertex(api_object)
-    iter_face_fn = om.MItMeshPolygon(api_object)
-    
-    iter_vertex_fn.setIndex(index)
-    
-    found_verts = {}
-    
-    faces = iter_vertex_fn.getConnectedFaces()
-    
-    for face in faces:
-        iter_face_fn.setIndex(face)
-        verts = iter_face_fn.getConnectedVertices()
-        
-        for vert in verts:
-            found_verts[vert] = None
-    
-    return list(found_verts.keys())
+    return get_topology(mesh).get_surrounding_vertices(index)
     
 
 def get_vert_count(mesh):
@@ -1525,83 +1532,22 @@ def get_vert_count(mesh):
     return count
 
 def get_connected_verts(mesh, index, iterator = None):
+    """
+    Get the vertices that share an edge with a vertex.
+    iterator is no longer used and only kept for older code.
+    """
     
-    api_object = get_object(mesh)
-    
-    current = None
-    
-    if iterator:
-        #current = iterator.index()
-        iter_vertex_fn = iterator
-    else:
-        iter_vertex_fn = om.MItMeshVertex(api_object)
-    
-    iter_vertex_fn.setIndex(index)
-    
-    found_verts = {}
-    
-    verts = iter_vertex_fn.getConnectedVertices()
-    
-    for vert in verts:
-        found_verts[vert] = None
-    
-    if current:
-        iterator.setIndex(current)
-        
-    return found_verts.keys()
+    return get_topology(mesh).get_vertex_neighbors(index)
     
 def get_vertex_islands(mesh):
+    """
+    Get the vertex indices of each connected piece of the mesh.
     
-    api_object = get_object(mesh)
-    iterator = om.MItMeshVertex(api_object)
-    
-    islands = {}
-    checked = {}
-    
-    while not iterator.isDone():
-        
-        found = {}
-        current = iterator.index()
-        
-        if current in checked:
-            iterator.next()
-            continue
-         
-        verts = iterator.getConnectedVertices()
-        
-        while verts:
-            
-            
-            sub_found = {}
-            sub_verts = []
-            
-            for vert in verts:
-                
-                if not vert in checked:
-                    
-                    sub_verts = get_connected_verts(mesh, vert, iterator)
-                    
-                    for sub_vert in sub_verts:
-                        sub_found[sub_vert] = None
-                
-                found[vert] = None
-                checked[vert] = None
-                
-            if sub_verts:
-                verts = list(sub_found.keys())
-            else:
-                verts = None
-        
-        islands[current] = found
-        
-        iterator.next()
-    
-    result = []
-    
-    for key in islands:
-        result.append(list(islands[key].keys()))
+    Returns:
+        list: [[vertex indices], [vertex indices]]
+    """
     
-    return result
+    return get_topology(mesh).get_islands()
 
 def get_skin_influence_names(skin_cluster, short_name = False):
     
@@ -1799,6 +1745,22 @@ def get_components(indices):
     return components
     
 
+def get_skin_weight_array(skin_cluster, index = 0):
+    """
+    Get all the weights of a skin cluster in one call.
+    
+    Returns:
+        tuple: (weights, influence_count) The weights are an MDoubleArray with the weights of vertex 0 on every influence first, then vertex 1 and so on.
+        Influences are in the order of get_skin_influence_indices.
+    """
+    
+    skin_fn = omAnim.MFnSkinCluster(get_object(skin_cluster))
+    dag_path, component = get_skin_components(skin_cluster, index)
+    
+    weights, influence_count = skin_fn.getWeights(dag_path, component)
+    
+    return weights, influence_count
+
 def set_skin_weights(skin_cluster, weights = 0, index = 0, components = None, influence_array = None):
     
     skin_object = get_object(skin_cluster)
@@ -1851,6 +1813,34 @@ def set_skin_weights(skin_cluster, weights = 0, index = 0, components = None, in
     
     skin_fn.setWeights(dag_path, components,influence_array,weight_array, False, False)
     
+def set_skin_weight_plugs(skin_cluster, vert_indices, influence_indices, weights):
+    """
+    Set weightList entries directly on the plugs.
+    Used on nurbs where the component order does not match the weightList order.
+    
+    Args:
+        skin_cluster (str): The name of a skin cluster.
+        vert_indices (list): The weightList index of each weight. Grouping by vertex is fastest.
+        influence_indices (list): The influence index (matrix index) of each weight.
+        weights (list): The weight values.
+    """
+    
+    node_fn = om.MFnDependencyNode(get_object(skin_cluster))
+    weight_list_plug = node_fn.findPlug('weightList', False)
+    
+    last_vert = None
+    weights_plug = None
+    
+    for inc in range(0, len(weights)):
+        
+        vert = int(vert_indices[inc])
+        
+        if vert != last_vert:
+            weights_plug = weight_list_plug.elementByLogicalIndex(vert).child(0)
+            last_vert = vert
+        
+        weights_plug.elementByLogicalIndex(int(influence_indices[inc])).setDouble(float(weights[inc]))
+    
 def set_skin_blend_weights(skin_cluster, weights, index):
     
 
@@ -1329,19 +1329,19 @@ def print_help(string_value):
     string_value = string_value.replace('\n', '\nV:\t\t')
     
     OpenMaya.MGlobal.displayInfo('V:\t\t' + string_value)
-    util.record_temp_log('\n%s%s' % (log_tab_str,string_value))
+    util.record_temp_log(string_value, 'info', len(log_tab_str))
     
 def print_warning(string_value):
     
     string_value = string_value.replace('\n', '\nV:\t\t')
     OpenMaya.MGlobal.displayWarning('V:\t\t' + string_value)
-    util.record_temp_log('\nWarning!:  %s' % string_value)
+    util.record_temp_log(string_value, 'warning')
 
 def print_error(string_value):
 
     string_value = string_value.replace('\n', '\nV:\t\t')
     OpenMaya.MGlobal.displayError('V:\t\t' + string_value)
-    util.record_temp_log('\nError!:  %s' % string_value)
+    util.record_temp_log(string_value, 'error')
 
 def delete_set_contents(set_name):
     
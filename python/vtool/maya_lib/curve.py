@@ -7,6 +7,7 @@ import os
 #import util  do not import util, curve is used in util
 from . import api
 from .. import util, util_file
+from .. import util_curve
 
 if util.is_in_maya():
     import maya.cmds as cmds
@@ -342,7 +343,20 @@ class CurveDataInfo(object):
         self.library_curves = {}
         self._initialize_library_curve()
     
+    def _get_compiled_path(self, library_name):
+        """
+        Only the built in curve directory keeps compiled libraries, data folders only get the .data file.
+        """
+        
+        if self.curve_data_path != CurveDataInfo.curve_data_path:
+            return
+        
+        return util_file.join_path(self.curve_data_path, '%s.crv' % library_name)
+    
     def set_active_library(self, library_name, skip_extension = False):
+        """
+        The library is read the first time one of its curves is needed.
+        """
         
         if not skip_extension:
             filename = '%s.data' % library_name
@@ -351,7 +365,7 @@ class CurveDataInfo(object):
           
         path = util_file.create_file(filename, self.curve_data_path)
         self.active_library = library_name
-        self.library_curves[library_name] = {}
+        
         if skip_extension:
             self.load_data_file(path)
         if not skip_extension:
@@ -363,55 +377,13 @@ class CurveDataInfo(object):
             util.warning('Must set active library before running this function.')
             return
         
+        compiled_path = None
+        
         if not path:
             path = util_file.join_path(self.curve_data_path, '%s.data' % self.active_library)
+            compiled_path = self._get_compiled_path(self.active_library)
         
-        last_line_curve = False
-        curve_name = ''
-        curve_data = ''
-        curve_type = ''
-        
-        data_lines = util_file.get_file_lines(path)
-        
-        curve_data_lines = []
-        
-        for line in data_lines:
-            
-            if line.startswith('->'):
-                
-                if curve_data_lines:
-                    
-                    self.library_curves[self.active_library][curve_name] = [curve_data_lines, curve_type]
-                    curve_type = ''
-                    curve_name = ''
-                    curve_data = ''
-                    
-                line_split = line.split()
-                
-                curve_name = line_split[1]
-                
-                if len(line_split) > 2:
-                    
-                    curve_type = line_split[2]
-                    
-                    if not curve_type:
-                        curve_type = ''
-                        
-                curve_name = curve_name.strip()
-                last_line_curve = True
-                curve_data_lines = []
-                                
-            if not line.startswith('->') and last_line_curve:
-                
-                line = line.strip()
-                if line:
-                    curve_data = line
-                    curve_data = curve_data.strip()
-                    curve_data_lines.append(curve_data) 
-                    
-         
-        if curve_data_lines:
-            self.library_curves[self.active_library][curve_name] = [curve_data_lines, curve_type] 
+        self.library_curves[self.active_library] = util_curve.CurveDict(path, compiled_path)
                 
     def write_data_to_file(self):
         if not self.active_library:
@@ -445,6 +417,8 @@ class CurveDataInfo(object):
         
         util_file.write_lines(path, lines)
         
+        util_curve.clear_library(path)
+        
         return path
         
     def get_library_names(self):
@@ -6,6 +6,9 @@ import re
 import traceback
 
 from .. import util, util_math
+from .. import util_spatial
+from .. import util_mesh
+from .. import util_weights
 from .. import logger
 from . import api
 
@@ -1552,7 +1555,121 @@ class TransferWeight(object):
                     cmds.skinCluster(skin, e = True, ai = joint, wt = 0.0, nw = 1)
                 except:
                     util.warning('Influence already in skin cluster %s' % skin)
+    
+    def _finish_transfer(self, joints, new_joints, weighted_verts):
+        
+        if self._optimize_mesh:
+            cmds.skinCluster(self._original_mesh,  e = True, siv = joints)
+            selection = cmds.ls(sl = True)
+            
+            found = [self._optimize_mesh]
+            
+            for thing in selection:
+                if thing.find('.vtx') > -1:
+                    found.append(thing)
+            
+            cmds.select(found, r = True)
+            
+            cmds.copySkinWeights(noMirror = True, surfaceAssociation = 'closestPoint', influenceAssociation = 'closestJoint')
+            
+        if self._smooth_verts:
+            
+            verts = []
+            
+            for vert_index in weighted_verts:
+                vert = '%s.vtx[%s]' % (self.mesh, vert_index)
+                verts.append(vert)
+                
+            smooth_skin_weights(verts, self._smooth_verts_iterations)
+        
+        util.show('Done: %s transfer %s to %s.' % (self.mesh, joints, new_joints))
+    
+    def _get_weight_matrix(self):
+        
+        numpy = util_weights.numpy
+        
+        weights, influence_count = api.get_skin_weight_array(self.skin_cluster)
+        matrix = numpy.array(weights, dtype = numpy.float64).reshape(-1, influence_count)
+        
+        influences = api.get_skin_influence_names(self.skin_cluster)
+        
+        return matrix, influences
+    
+    def _get_influence_columns(self, joints, influences):
+        
+        joints = core.remove_non_existent(joints)
+        
+        found_joints = []
+        columns = []
+        
+        for joint in joints:
+            
+            long_name = cmds.ls(joint, long = True)[0]
+            
+            if not long_name in influences:
+                continue
+            
+            found_joints.append(joint)
+            columns.append(influences.index(long_name))
+        
+        return found_joints, columns
+    
+    def _transfer_falloff(self, joints, new_joints, falloff, power, weight_percent_change, exact):
+        """
+        Transfer with the array functions in util_weights. Weights are read and set in one call each.
+        
+        Returns:
+            list: The indices of the vertices that were weighted. None if nothing was transferred.
+        """
+        
+        numpy = util_weights.numpy
+        
+        vert_indices = numpy.unique([util.get_last_number(vert) for vert in self.vertices])
+        
+        matrix, influences = self._get_weight_matrix()
+        source_joints, source_columns = self._get_influence_columns(joints, influences)
+        
+        weighted_verts = []
+        
+        if source_columns:
+            weighted_verts = vert_indices[matrix[vert_indices][:,source_columns].sum(axis = 1) > 0]
+        
+        if not len(weighted_verts):
+            util.warning('Found no weights for specified influences on %s.' % self.skin_cluster)
+            return
         
+        self._add_joints_to_skin(new_joints)
+        
+        if self._optimize_mesh:
+            self._add_joints_to_skin(new_joints, self._original_mesh)
+        
+        matrix, influences = self._get_weight_matrix()
+        source_joints, source_columns = self._get_influence_columns(joints, influences)
+        target_joints, target_columns = self._get_influence_columns(new_joints, influences)
+        
+        if not target_columns:
+            util.warning('Destination joints do not exist.')
+            return
+        
+        positions = cmds.xform('%s.vtx[*]' % self.mesh, q = True, ws = True, t = True)
+        positions = numpy.array(positions, dtype = numpy.float64).reshape(-1, 3)[weighted_verts]
+        
+        joint_positions = [cmds.xform(joint, q = True, ws = True, rp = True) for joint in target_joints]
+        
+        distances = util_weights.get_distances(positions, joint_positions)
+        
+        target_weights = util_weights.get_falloff_weights(distances, falloff, power, exact)
+        
+        util_weights.transfer_weights(matrix, source_columns, target_columns, target_weights, weighted_verts, weight_percent_change)
+        
+        api.set_skin_weights(self.skin_cluster, om.MDoubleArray(matrix[weighted_verts].ravel().tolist()), 0, weighted_verts.tolist())
+        
+        if not exact:
+            cmds.skinPercent(self.skin_cluster, self.vertices, normalize = True)
+            util.show('Farthest vertex was %s' % round(float(distances.max()), 3))
+        
+        return weighted_verts.tolist()
+    
     def set_optimize_mesh(self, percent=50):
         #self.mesh
         #util.show( 'Optimize is temporarily turned off in this version of Vetala' )
@@ -2065,6 +2182,13 @@ class TransferWeight(object):
         lock_joint_weights(self.skin_cluster, joints + new_joints)
         #lock_joint_weights(self.skin_cluster, joints + new_joints)
         
+        if util_weights.has_numpy():
+            weighted_verts = self._transfer_falloff(joints, new_joints, falloff, power, weight_percent_change, exact = False)
+            
+            if weighted_verts:
+                self._finish_transfer(joints, new_joints, weighted_verts)
+            return
+        
         value_map = get_skin_weights(self.skin_cluster)
         influence_values = {}
         
@@ -2280,32 +2404,8 @@ class TransferWeight(object):
         if farthest_distance:
             util.show('Farthest vertex was %s' % round(farthest_distance, 3))
         
-        if self._optimize_mesh:
-            cmds.skinCluster(self._original_mesh,  e = True, siv = joints)
-            selection = cmds.ls(sl = True)
-            
-            found = [self._optimize_mesh]
-            
-            for thing in selection:
-                if thing.find('.vtx') > -1:
-                    found.append(thing)
-            
-            cmds.select(found, r = True)
-            
-            cmds.copySkinWeights(noMirror = True, surfaceAssociation = 'closestPoint', influenceAssociation = 'closestJoint')
-            
-        if self._smooth_verts:
-            
-            verts = []
-            
-            for vert_index in weighted_verts:
-                vert = '%s.vtx[%s]' % (self.mesh, vert_index)
-                verts.append(vert)
-                
-            smooth_skin_weights(verts, self._smooth_verts_iterations)
-        
         bar.end()
-        util.show('Done: %s transfer %s to %s.' % (self.mesh, joints, new_joints))
+        self._finish_transfer(joints, new_joints, weighted_verts)
         
     @core.undo_off  
     def transfer_exact_falloff_joints_to_new_joints(self, joints, new_joints, falloff = 1, power = 4, weight_percent_change = 1):
@@ -2351,6 +2451,13 @@ class TransferWeight(object):
         
         lock_joint_weights(self.skin_cluster, joints)
         
+        if util_weights.has_numpy():
+            weighted_verts = self._transfer_falloff(joints, new_joints, falloff, power, weight_percent_change, exact = True)
+            
+            if weighted_verts:
+                self._finish_transfer(joints, new_joints, weighted_verts)
+            return
+        
         value_map = get_skin_weights(self.skin_cluster)
         influence_values = {}
         
@@ -2578,33 +2685,8 @@ class TransferWeight(object):
         api.set_skin_weights(self.skin_cluster, weight_array, index = 0, components = components, influence_array=new_influences)
         
         
-        if self._optimize_mesh:
-            
-            cmds.skinCluster(self._original_mesh,  e = True, siv = joints)
-            selection = cmds.ls(sl = True)
-            
-            found = [self._optimize_mesh]
-            
-            for thing in selection:
-                if thing.find('.vtx') > -1:
-                    found.append(thing)
-            
-            cmds.select(found, r = True)
-            
-            cmds.copySkinWeights(noMirror = True, surfaceAssociation = 'closestPoint', influenceAssociation = 'closestJoint')
-        
-        if self._smooth_verts:
-            
-            verts = []
-            
-            for vert_index in weighted_verts:
-                vert = '%s.vtx[%s]' % (self.mesh, vert_index)
-                verts.append(vert)
-                
-            smooth_skin_weights(verts, self._smooth_verts_iterations)
-        
         bar.end()
-        util.show('Done: %s transfer %s to %s.' % (self.mesh, joints, new_joints))
+        self._finish_transfer(joints, new_joints, weighted_verts)
          
 class AutoWeight2D(object):
     
@@ -2614,6 +2696,7 @@ class AutoWeight2D(object):
         self.verts = []
         self.joint_vectors_2D = []
         self.vertex_vectors_2D = []
+        self.vertex_positions_2D = []
         
         self.multiplier_weights = []
         self.zero_weights = True
@@ -2680,9 +2763,15 @@ class AutoWeight2D(object):
     def _store_vertex_vectors(self):
         self.vertex_vectors_2D = []
         
-        for vert in self.verts:
-            position = cmds.xform(vert, q = True, ws = True, t = True)
-            position_vector_2D = util_math.Vector2D(position[0], position[2])
+        positions = cmds.xform('%s.vtx[*]' % self.mesh, q = True, ws = True, t = True)
+        
+        self.vertex_positions_2D = [[positions[inc], positions[inc+2]] for inc in range(0, len(positions), 3)]
+        
+        if util_weights.has_numpy():
+            return
+        
+        for position in self.vertex_positions_2D:
+            position_vector_2D = util_math.Vector2D(position[0], position[1])
             
             self.vertex_vectors_2D.append(position_vector_2D)
                 
@@ -2777,8 +2866,61 @@ class AutoWeight2D(object):
             
         return skin
         
+    def _weight_verts_bulk(self, skin):
+        """
+        Find the weights of every vertex at once with util_weights.get_segment_weights and set them with set_skin_weight_matrix.
+        """
+        
+        numpy = util_weights.numpy
+        
+        fade = None
+        if self.fade_cosine:
+            fade = 'cosine'
+        if self.fade_smoothstep:
+            fade = 'smoothstep'
+        
+        multiplier = None
+        if self.multiplier_weights:
+            multiplier = self.multiplier_weights
+        
+        prune = None
+        if self.prune_weights:
+            prune = self.prune_weights
+        
+        joint_weights, assigned = util_weights.get_segment_weights(self.vertex_positions_2D, self.joint_vectors_2D, 
+                                                                   fade, multiplier, prune)
+        
+        vert_indices = numpy.nonzero(assigned.any(axis = 1))[0]
+        
+        if not len(vert_indices):
+            return
+        
+        weights, influence_count = api.get_skin_weight_array(skin)
+        matrix = numpy.array(weights, dtype = numpy.float64).reshape(-1, influence_count)[vert_indices]
+        
+        if self.zero_weights:
+            matrix[:] = 0.0
+        
+        influences = api.get_skin_influence_names(skin)
+        
+        for inc in range(0, len(self.orig_joints)):
+            
+            joint = cmds.ls(self.orig_joints[inc], long = True)[0]
+            
+            if not joint in influences:
+                continue
+            
+            found = assigned[vert_indices, inc]
+            matrix[found, influences.index(joint)] = joint_weights[vert_indices[found], inc]
+        
+        set_skin_weight_matrix(skin, matrix, vert_indices)
+    
     def _weight_verts(self, skin):
         
+        if util_weights.has_numpy():
+            self._weight_verts_bulk(skin)
+            return
+        
         mesh = self.orig_mesh
         
         vert_count = len(self.verts)
@@ -4807,6 +4949,90 @@ def set_skin_influence_weight(skin_deformer, weights, influence_name):
     
     cmds.setAttr(attr, *weights )
     
+def is_undo_needed():
+    """
+    Returns:
+        bool: False while a process builds, in batch mode or with undo off. There is nothing to undo then.
+    """
+    
+    if util.get_env('VETALA_RUN') == 'True':
+        return False
+    
+    if core.is_batch():
+        return False
+    
+    return bool(cmds.undoInfo(q = True, state = True))
+
+def _get_index_ranges(indices):
+    """
+    Split sorted indices into runs of consecutive indices.
+    
+    Returns:
+        list: [start position, end position] in indices for each run.
+    """
+    
+    ranges = []
+    
+    for inc in range(0, len(indices)):
+        
+        if ranges and indices[inc] == indices[inc - 1] + 1:
+            ranges[-1][1] = inc
+            continue
+        
+        ranges.append([inc, inc])
+    
+    return ranges
+
+def set_skin_weight_matrix(skin_deformer, matrix, vert_indices = None, use_api = None):
+    """
+    Set the weights of many vertices at once.
+    With the api everything is set in one MFnSkinCluster.setWeights call, which can not be undone.
+    Otherwise each vertex row is set with one cmds.setAttr per run of influence indices, so the change can be undone.
+    
+    Args:
+        skin_deformer (str): The name of a skin deformer.
+        matrix: A numpy array with a row for each vertex and a column for each influence, in the order of api.get_skin_influence_indices.
+        vert_indices (list): The vertex index of each row. All vertices when None.
+        use_api (bool): Set the weights with the api. 
+            None uses the api when there is nothing to undo, see is_undo_needed, so process builds get the fast path.
+    """
+    
+    numpy = util_weights.numpy
+    
+    matrix = numpy.asarray(matrix, dtype = numpy.float64)
+    
+    if vert_indices is None:
+        vert_indices = range(0, len(matrix))
+    
+    vert_indices = [int(vert_index) for vert_index in vert_indices]
+    
+    if use_api is None:
+        use_api = not is_undo_needed()
+    
+    if use_api:
+        api.set_skin_weights(skin_deformer, om.MDoubleArray(matrix.ravel().tolist()), 0, vert_indices)
+        return
+    
+    influence_indices = api.get_skin_influence_indices(skin_deformer)
+    
+    #influences that were removed leave gaps in the indices, each run of indices is one setAttr
+    index_ranges = _get_index_ranges(influence_indices)
+    
+    normalize = cmds.getAttr('%s.normalizeWeights' % skin_deformer)
+    cmds.setAttr('%s.normalizeWeights' % skin_deformer, 0)
+    
+    try:
+        for inc in range(0, len(vert_indices)):
+            
+            row = matrix[inc].tolist()
+            
+            for start, end in index_ranges:
+                attr = '%s.weightList[%s].weights[%s:%s]' % (skin_deformer, vert_indices[inc], 
+                                                              influence_indices[start], influence_indices[end])
+                cmds.setAttr(attr, *row[start:end + 1])
+    finally:
+        cmds.setAttr('%s.normalizeWeights' % skin_deformer, normalize)
+    
 def set_skin_weights_to_zero(skin_deformer):
     """
     Set all the weights on the mesh to zero.
@@ -4896,26 +5122,106 @@ def average_skin_weights(verts):
     cmds.setAttr( '%s.normalizeWeights' % skin, 1)
 
 @core.undo_chunk
-def smooth_skin_weights(verts, iterations = 1, percent = 1, mode = 0, use_api = False):
+def filter_skin_weights(verts, sharpen = False, iterations = 1, percent = 1, mode = 0, mask = None, max_influences = None, prune = 0.0, use_api = None):
+    """
+    Smooth or sharpen skin weights on the whole selection at once with the array kernels in util_weights, then set them with set_skin_weight_matrix.
+    Locked influences keep their weights and every vertex is normalized. Needs numpy.
+    
+    Args:
+        verts (list): Vertex names on one skinned mesh.
+        sharpen (bool): Sharpen instead of smooth.
+        iterations (int): How many times to smooth or sharpen.
+        percent (float): How much of the new weight to use, 1 is all of it.
+        mode (int): Only used when smoothing. 0 = surrounding face vertices
+                                                1 = surrounding vertices
+        mask (list): A value from 0 to 1 for every vertex on the mesh that scales percent, like a weight map.
+        max_influences (int): Keep only this many influences on each vertex. 
+            By default the skin cluster maxInfluences, if it has maintainMaxInfluences on.
+        prune (float): Weights below this value are set to zero.
+        use_api (bool): Set the weights in one api call. Faster, but it can not be undone. See set_skin_weight_matrix
+        
+    Returns:
+        bool: True if weights were set.
+    """
+    
+    if not util_weights.has_numpy():
+        util.warning('Numpy is needed to filter skin weights.')
+        return False
+    
+    numpy = util_weights.numpy
+    
+    if not verts:
+        util.warning('Please select a mesh or vertices of one mesh')
+        return False
+    
+    mesh = geo.get_mesh_from_vertex(verts[0])
+    
+    skin = find_deformer_by_type(mesh, 'skinCluster', return_all = False)
+    
+    if not skin:
+        util.warning('No skin cluster found on %s' % mesh)
+        return False
+    
+    if percent == 0:
+        util.warning('Percent is zero.  Weights will not be changed.')
+        return False
+    
+    vert_indices = sorted(set(geo.get_vertex_indices(verts)))
+    
+    weights, influence_count = api.get_skin_weight_array(skin)
+    matrix = numpy.array(weights, dtype = numpy.float64).reshape(-1, influence_count)
+    
+    locked = []
+    
+    for influence in api.get_skin_influence_names(skin):
+        
+        lock_attribute = '%s.lockInfluenceWeights' % influence
+        locked.append(cmds.objExists(lock_attribute) and bool(cmds.getAttr(lock_attribute)))
+    
+    if max_influences is None and cmds.getAttr('%s.maintainMaxInfluences' % skin):
+        max_influences = cmds.getAttr('%s.maxInfluences' % skin)
+    
+    if mask is not None:
+        mask = numpy.asarray(mask, dtype = numpy.float64)[vert_indices]
+    
+    if sharpen:
+        matrix = util_weights.sharpen_weights(matrix, vert_indices, iterations, percent, 
+                                              mask, locked, True, max_influences, prune)
+    
+    if not sharpen:
+        ring_offsets, ring_indices = api.get_topology(mesh).get_vertex_rings(vert_indices, surrounding = mode == 0)
+        
+        matrix = util_weights.smooth_weights(matrix, ring_offsets, ring_indices, vert_indices, iterations, percent, 
+                                             mask, locked, True, max_influences, prune)
+    
+    set_skin_weight_matrix(skin, matrix[vert_indices], vert_indices, use_api)
+    
+    return True
+
+def smooth_skin_weights(verts, iterations = 1, percent = 1, mode = 0, use_api = None):
     """
+    Uses filter_skin_weights when numpy is available.
+    
     Args
         mode (int): 0 = surrounding face vertices
                     1 = surrounding vertices 
+        use_api (bool): Set the weights with the api. None picks it with numpy, see set_skin_weight_matrix
     """
     
+    if util_weights.has_numpy():
+        filter_skin_weights(verts, False, iterations, percent, mode, use_api = use_api)
+        return
+    
     if not verts:
         util.warning('Please select a mesh or vertices of one mesh')
     
     api_object = get_object(verts[0])
     
     try:
-        iter_vertex_fn = om.MItMeshVertex(api_object)
+        topology = api.get_topology(geo.get_mesh_from_vertex(verts[0]))
     except:
         util.warning('Please select a mesh or vertices of one mesh')
-    
-    iter_face_fn = None
-    if mode == 0:
-        iter_face_fn = om.MItMeshPolygon(api_object)
+        return
     
     skin = find_deformer_by_type(api_object,'skinCluster', return_all = False)
     
@@ -4960,26 +5266,15 @@ def smooth_skin_weights(verts, iterations = 1, percent = 1, mode = 0, use_api =
             
             vert_index = int(vert[vert.find("[")+1:vert.find("]")])
             vert_indices.append(vert_index) 
-    
-            iter_vertex_fn.setIndex(vert_index)
-            found_verts = {}
+            
+            surrounding_vert_indices = []
             
             if mode == 0:
-                faces = iter_vertex_fn.getConnectedFaces()
-                
-                for face in faces:
-                    iter_face_fn.setIndex(face)
-                    vertices = iter_face_fn.getConnectedVertices()
-                    
-                    for vertex in vertices:
-                        found_verts[vertex] = None
+                surrounding_vert_indices = topology.get_surrounding_vertices(vert_index)
             
             if mode == 1:
-                vertices = iter_vertex_fn.getConnectedVertices()
-                for vertex in vertices:
-                    found_verts[vertex] = None
+                surrounding_vert_indices = topology.get_vertex_neighbors(vert_index)
             
-            surrounding_vert_indices = list(found_verts.keys())
             #sub_vert_count = len(surrounding_vert_indices)
             
             surrounding_vert_indices = surrounding_vert_indices + [vert_index]
@@ -5080,6 +5375,13 @@ def smooth_skin_weights(verts, iterations = 1, percent = 1, mode = 0, use_api =
     progress.end()
     
 def sharpen_skin_weights(verts, iterations = 1, percent = 1):
+    """
+    Uses filter_skin_weights when numpy is available.
+    """
+    
+    if util_weights.has_numpy():
+        filter_skin_weights(verts, True, iterations, percent)
+        return
     
     if percent == 0:
         util.warning('Percent is zero, no change to weighting.')
@@ -6682,6 +6984,85 @@ def skin_nurbs_from_mesh(source_mesh, target_nurbs):
                 attr_name = '%s.weightList[%s].weights[%s]' % (skin_name, inc, inc2)
                 cmds.setAttr(attr_name, weight)
                 
+def mirror_skin_weights(mesh, mirror_axis = 'x', left_to_right = True, tolerance = 0.00001, directory = None, use_api = None):
+    """
+    Mirror skin weights from one side of the mesh to the other using the cached mirror map of the mesh.
+    Weights on left influences go to their right side influence, found by name.
+    Needs numpy.
+    
+    Args:
+        mesh (str): The name of a skinned mesh.
+        mirror_axis (str): 'x', 'y' or 'z'
+        left_to_right (bool): Copy from the positive side to the negative side. False goes the other way.
+        tolerance (float): How far a mirrored vertex can be from its match.
+        directory (str): A folder to save the mirror map in. See geo.get_mirror_map
+        use_api (bool): Set the weights in one api call. Faster, but it can not be undone. See set_skin_weight_matrix
+        
+    Returns:
+        bool: True if weights were mirrored. False if no vertex on the source side has a mirror.
+    """
+    
+    if util_mesh.numpy is None:
+        util.warning('Numpy is needed to mirror skin weights with a mirror map.')
+        return False
+    
+    numpy = util_mesh.numpy
+    
+    skin = find_deformer_by_type(mesh, 'skinCluster')
+    
+    if not skin:
+        util.warning('No skin cluster found on %s' % mesh)
+        return False
+    
+    mirror_map = numpy.asarray(geo.get_mirror_map(mesh, mirror_axis, tolerance, directory))
+    
+    weights, influence_count = api.get_skin_weight_array(skin)
+    matrix = numpy.array(weights, dtype = numpy.float64).reshape(-1, influence_count)
+    
+    influences = api.get_skin_influence_names(skin, short_name = True)
+    
+    columns = {}
+    for inc in range(0, len(influences)):
+        columns[influences[inc]] = inc
+    
+    #swap matrix, a weight on column inc moves to the column of its mirror influence
+    swap = numpy.zeros((influence_count, influence_count), dtype = numpy.float64)
+    
+    for inc in range(0, len(influences)):
+        
+        influence = influences[inc]
+        
+        if left_to_right:
+            other = space.find_transform_right_side(influence, check_if_exists = True)
+        else:
+            other = space.find_transform_left_side(influence, check_if_exists = True)
+        
+        swap[inc, columns.get(other, inc)] = 1.0
+    
+    points = numpy.array(api.IterateGeometry(mesh).get_points_as_list(), dtype = numpy.float64)
+    side_values = points[:, 'xyz'.index(mirror_axis.lower())]
+    
+    if left_to_right:
+        source = side_values > tolerance
+    else:
+        source = side_values < -tolerance
+    
+    unmatched = numpy.count_nonzero(source & (mirror_map < 0))
+    source = numpy.nonzero(source & (mirror_map > -1))[0]
+    
+    if not len(source):
+        util.warning('No vertices on %s have a mirror within tolerance %s. Nothing was mirrored.' % (mesh, tolerance))
+        return False
+    
+    if unmatched:
+        util.warning('%s vertices on %s have no mirror within tolerance %s and were skipped.' % (unmatched, mesh, tolerance))
+    
+    target = mirror_map[source]
+    
+    set_skin_weight_matrix(skin, matrix[source].dot(swap), target, use_api)
+    
+    return True
+    
 def skin_mirror(mesh):
     """
     Not worrking at all
@@ -6765,35 +7146,30 @@ def get_closest_verts_to_joints(joints, verts):
         dict: dict[joint] = vertex list
     """
 
-    distance_dict = {}
-
-    for joint in joints:
-        
-        joint_pos = cmds.xform(joint, q = True, ws = True, t = True)
-        
-        for vert in verts:
-            
-            if not vert in distance_dict:
-                distance_dict[vert] = [10000000000000000000, None]
-            
-            pos = cmds.xform(vert, q = True, ws = True, t = True)
-            
-            distance = util_math.get_distance(joint_pos, pos)
-            
-            if distance < distance_dict[vert][0]:
-                distance_dict[vert][0] = distance
-                distance_dict[vert][1] = joint
-    
     joint_map = {}
     
-    for key in distance_dict:
+    if not joints or not verts:
+        return joint_map
+    
+    joint_positions = [cmds.xform(joint, q = True, ws = True, t = True) for joint in joints]
+    
+    positions = cmds.xform(verts, q = True, ws = True, t = True)
+    
+    if len(positions) == len(verts) * 3:
+        positions = [positions[inc:inc+3] for inc in range(0, len(positions), 3)]
+    else:
+        positions = [cmds.xform(vert, q = True, ws = True, t = True) for vert in verts]
+    
+    index = util_spatial.SpatialIndex(joint_positions)
+    
+    for vert, joint_index in zip(verts, index.query_nearest_many(positions)):
         
-        joint = distance_dict[key][1]
+        joint = joints[joint_index]
         
         if not joint in joint_map:
             joint_map[joint] = []
             
-        joint_map[joint].append(key)
+        joint_map[joint].append(vert)
         
     return joint_map    
 
@@ -5,6 +5,7 @@ from __future__ import absolute_import
 from random import uniform
 
 from .. import util, util_math
+from .. import util_mesh
 
 from . import api
 
@@ -577,9 +578,7 @@ def get_position_different(mesh1, mesh2, tolerance = 0.00001):
 
 def is_symmetrical(mesh, mirror_axis = 'X', tolerance = 0.00001):
     """
-    find assymetrical points on a mesh.  
-    
-    mirros axis currently doesn't work.  Its always checking on x
+    Check if every point on the mesh has a mirror point across mirror_axis.
     """
     
     bound = space.BoundingBox(mesh)
@@ -594,50 +593,103 @@ def is_symmetrical(mesh, mirror_axis = 'X', tolerance = 0.00001):
     return True
     
 
+def get_topology_fingerprint(mesh):
+    """
+    Get a hash of the mesh topology. See util_mesh.get_topology_fingerprint
+    """
+    
+    counts, connects = api.get_mesh_topology(mesh)
+    
+    return util_mesh.get_topology_fingerprint(counts, connects)
+
+def get_mirror_map(mesh, mirror_axis = 'x', tolerance = 0.00001, directory = None, check_positions = False):
+    """
+    Get the index of the mirror vertex for every vertex on the mesh, -1 where a vertex has no mirror.
+    Found once per topology, axis and tolerance, so the mesh should be in its symmetric pose the first time.
+    A map that leaves most vertices without a mirror is not cached or saved, see util_mesh.get_mirror_map
+    
+    Args:
+        mesh (str): The name of a mesh.
+        mirror_axis (str): 'x', 'y' or 'z'
+        tolerance (float): How far a mirrored vertex can be from its match.
+        directory (str): A folder to save the map in, eg. the skin weights folder of the mesh.
+        check_positions (bool): Find the map again when the vertex positions change, not only the topology.
+    
+    Returns:
+        An int array. See util_mesh.get_mirror_map
+    """
+    
+    fingerprint = get_topology_fingerprint(mesh)
+    
+    points = None
+    
+    if check_positions:
+        points = api.IterateGeometry(mesh).get_points_as_list()
+        fingerprint += util_mesh.get_points_fingerprint(points)
+    
+    def get_points():
+        if points is not None:
+            return points
+        return api.IterateGeometry(mesh).get_points_as_list()
+    
+    return util_mesh.get_mirror_map(get_points, fingerprint, mirror_axis, tolerance, directory)
+
+def load_mirror_maps(mesh, directory):
+    """
+    Read mirror maps saved in directory for the topology of mesh, so get_mirror_map does not need to find them.
+    
+    Args:
+        mesh (str): The name of a mesh.
+        directory (str): A folder maps were saved in with save_mirror_maps, eg. the skin weights folder of the mesh.
+    
+    Returns:
+        list: The axes loaded.
+    """
+    
+    return util_mesh.load_mirror_maps(directory, lambda: get_topology_fingerprint(mesh))
+
+def save_mirror_maps(mesh, directory):
+    """
+    Save the mirror maps found this session for the topology of mesh to directory.
+    
+    Returns:
+        list: The filepaths written.
+    """
+    
+    return util_mesh.save_mirror_maps(directory, lambda: get_topology_fingerprint(mesh))
+
 def get_position_assymetrical(mesh, mirror_axis = 'x', tolerance = 0.00001):
     """
-    find assymetrical points on a mesh.  
+    Find points on a mesh that have no mirror point across mirror_axis.
+    Points on the mirror plane are skipped.
+    
+    Args:
+        mesh (str): The name of a mesh.
+        mirror_axis (str): 'x', 'y' or 'z'
+        tolerance (float): How far a mirrored point can be from its match.
     
-    mirros axis currently doesn't work.  Its always checking on x
+    Returns:
+        list: The indices of the assymetrical points.
     """
     mesh1_fn = api.IterateGeometry(mesh)
     points = mesh1_fn.get_points_as_list()
-    test_points = list(points)
     
-    point_count = len(points)
+    axis_index = 'xyz'.index(mirror_axis.lower())
+    
+    #the points are checked as they are now, so the map is not cached
+    matches = util_mesh.get_mirror_map(points, None, mirror_axis, tolerance)
     
     not_found = []
     
-    for inc in range(0, point_count):
+    for inc in range(0, len(points)):
         
-        source_point = points[inc]
-        
-        if util_math.is_the_same_number(source_point[0], 0, tolerance = tolerance):
+        if matches[inc] > -1:
             continue
-            
-        test_point_count = len(test_points)
-        
-        found = False
         
-        for sub_inc in range(0, test_point_count):
-            
-            test_point = test_points[sub_inc]
-            
-            if source_point[0] > 0 and test_point[0] > 0:
-                continue
-            
-            if source_point[0] < 0 and test_point[0] < 0:
-                continue
-            
-            if util_math.is_the_same_number(source_point[0], (test_point[0] * -1), tolerance):
-                if util_math.is_the_same_number(source_point[1], test_point[1], tolerance):
-                    if util_math.is_the_same_number(source_point[2], test_point[2], tolerance):
-                        found = True
-                        test_points.pop(sub_inc)
-                        break
+        if util_math.is_the_same_number(points[inc][axis_index], 0, tolerance = tolerance):
+            continue
         
-        if not found:
-            not_found.append(inc)
+        not_found.append(inc)
             
     return not_found
 
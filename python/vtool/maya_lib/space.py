@@ -11,6 +11,7 @@ from . import api
 from . import core
 from . import attr
 from .. import util_math
+from .. import util_spatial
 
 if util.is_in_maya():
     import maya.cmds as cmds
@@ -20,7 +21,18 @@ if util.is_in_maya():
 #do not import geo
 
 class VertexOctree(object):
+    """
+    Find the closest vertex on a mesh to a position.
+    Built on util_spatial.SpatialIndex.
+    """
+    
+    def __init__(self):
+        
+        self.vertex_names = []
+        self.vertex_positions = []
         
+        self._index = None
+    
     def _get_bounding_box(self, mesh):
         bounding_box = cmds.exactWorldBoundingBox(mesh)
         center = cmds.objectCenter(mesh, gl = True)
@@ -50,21 +62,34 @@ class VertexOctree(object):
         return min_value + max_value + center
                     
     def create(self, mesh):
-        bounding_box = self._get_bounding_box(mesh)
-        
-        self.top_node = VertexOctreeNode(bounding_box)
         
         mesh_fn = api.IterateGeometry(mesh)
         points = mesh_fn.get_points_as_list()
         
-        for inc in range(0, len(points)):
-            vertex_position = points[inc]
-            self.add_vertex('%s.vtx[%s]' % (mesh, inc), vertex_position)
-            
-        self.top_node.sort_mesh_vertex()        
+        self.vertex_names = ['%s.vtx[%s]' % (mesh, inc) for inc in range(0, len(points))]
+        self.vertex_positions = list(points)
+        
+        self._index = util_spatial.SpatialIndex(points)
             
     def add_vertex(self, vertex_name, vertex_position):    
-        self.top_node.add_vertex(vertex_name, vertex_position)
+        self.vertex_names.append(vertex_name)
+        self.vertex_positions.append(vertex_position)
+        
+        self._index = None
+    
+    def find_closest_vertex(self, three_number_list):
+        """
+        Returns:
+            str: The name of the closest vertex.
+        """
+        
+        if not self.vertex_names:
+            return
+        
+        if not self._index:
+            self._index = util_spatial.SpatialIndex(self.vertex_positions)
+        
+        return self.vertex_names[self._index.query_nearest(three_number_list)]
         
                 
 class VertexOctreeNode(object):
@@ -76,7 +101,7 @@ class VertexOctreeNode(object):
         self.children = []
         self.parent = None
         self.verts = []
-        self.child_verts = []
+        self.child_verts = set()
         
     def _snap_to_bounding_box(self, vector):
         new_vector = list(vector)
@@ -111,14 +136,7 @@ class VertexOctreeNode(object):
                 
                 if self._is_vector_in_range(min_value, max_value, vector):
                     
-                    found_vert = False
-                    for child_vert in self.child_verts:
-                    
-                        if vertex[0] == child_vert:
-                            found_vert = True
-                            break
-                        
-                    if not found_vert:
+                    if not vertex[0] in self.child_verts:
                         found.append(vertex)        
         
         return found
@@ -133,12 +151,7 @@ class VertexOctreeNode(object):
                                
         for vertex in verts:            
             self.children[-1].add_vertex(vertex[0], vertex[1])
-            self.child_verts.append(vertex[0])
-            
-        if len(self.child_verts) == 1:
-            if self.child_verts[0][0] == 'body_C.vtx[7916]':
-                goo = self.createCube()
-                cmds.rename(goo, 'panzy')
+            self.child_verts.add(vertex[0])
     
     def create_cube(self):
         cube = cmds.polyCube(ch = 0)[0]
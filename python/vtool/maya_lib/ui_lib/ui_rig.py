@@ -11,20 +11,22 @@ if util.is_in_maya():
 
 from .. import ui_core
 
-from .. import blendshape
 from .. import core
 from .. import geo
-from .. import attr    
 from .. import space
-from .. import deform
-from .. import rigs_util
-from .. import curve
 
-from . import ui_check
-from . import ui_presets
-from . import ui_picker
-from . import ui_model
-from . import ui_anim
+#only used once a tool is opened
+blendshape = util.lazy_import('..blendshape', __package__)
+attr = util.lazy_import('..attr', __package__)
+deform = util.lazy_import('..deform', __package__)
+rigs_util = util.lazy_import('..rigs_util', __package__)
+curve = util.lazy_import('..curve', __package__)
+
+ui_check = util.lazy_import('.ui_check', __package__)
+ui_presets = util.lazy_import('.ui_presets', __package__)
+ui_picker = util.lazy_import('.ui_picker', __package__)
+ui_model = util.lazy_import('.ui_model', __package__)
+ui_anim = util.lazy_import('.ui_anim', __package__)
 
 from ...process_manager import ui_process_manager
 from ...ramen.ui_lib import ui_nodes
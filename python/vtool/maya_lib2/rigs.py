@@ -20,8 +20,20 @@ if in_maya:
     import vtool.maya_lib.space as space_old
 
 
-curve_data = curve.CurveDataInfo()
-curve_data.set_active_library('default_curves')
+curve_data = None
+
+def get_curve_data():
+    """
+    The default curve library, set up the first time a control needs it.
+    """
+    
+    global curve_data
+    
+    if curve_data is None:
+        curve_data = curve.CurveDataInfo()
+        curve_data.set_active_library('default_curves')
+    
+    return curve_data
 
 class Control(object):
     
@@ -82,7 +94,7 @@ class Control(object):
         if shapes:
             color = attr.get_color_rgb(shapes[0], as_float = True)
         
-        curve_data.set_shape_to_curve(self.name, self._curve_shape)
+        get_curve_data().set_shape_to_curve(self.name, self._curve_shape)
         
         if color:
             self.shapes = core.get_shapes(self.name)
@@ -91,7 +103,7 @@ class Control(object):
     @classmethod
     def get_curve_shapes(cls):
         
-        return curve_data.get_curve_names()
+        return get_curve_data().get_curve_names()
     
     @property
     def curve_shape(self):
@@ -4,15 +4,19 @@ from __future__ import absolute_import
 
 import os
 import sys
+import time
+import hashlib
 import traceback
 import string
 import subprocess
 import inspect
+from copy import deepcopy
 from functools import wraps
 
 from .. import util
 from .. import util_file
 from .. import data
+from . import process_profile
 
 in_maya = False
 
@@ -40,6 +44,250 @@ log = logger.get_logger(__name__)
 
 log.info('Accessing')
 
+class ProcessIndex(util_file.JsonIndex):
+    """
+    Cache of directory listings under a project root, used to find processes without listing every folder each time.
+    
+    Each directory record is keyed by the mtime of the directory. 
+    A directory is only listed again when its mtime changed, so a refresh only rescans folders that changed.
+    Whether a folder is a process, is enabled or has sub parts only depends on its own listing, so one stat checks them.
+    
+    Each project root gets its own file under process_index in the Vetala settings directory.
+    The index can be used from scan threads, the folder listing happens outside the lock.
+    
+    Args:
+        root (str): The project directory.
+    """
+    
+    def __init__(self, root):
+        
+        self.root = util_file.fix_slashes(root)
+        
+        name = hashlib.md5(self.root.encode('utf-8')).hexdigest()
+        
+        super(ProcessIndex, self).__init__(util_file.get_settings_file('process_index/%s.json' % name))
+    
+    def _get_header(self):
+        return {'root' : self.root}
+    
+    def _scan(self, directory, mtime):
+        
+        folders = []
+        files = []
+        
+        try:
+            if hasattr(os, 'scandir'):
+                for entry in os.scandir(directory):
+                    try:
+                        if entry.is_dir():
+                            folders.append(entry.name)
+                        else:
+                            files.append(entry.name)
+                    except:
+                        files.append(entry.name)
+            else:
+                for name in os.listdir(directory):
+                    if os.path.isdir(os.path.join(directory, name)):
+                        folders.append(name)
+                    else:
+                        files.append(name)
+        except:
+            return
+        
+        folders.sort()
+        files.sort()
+        
+        record = {'mtime' : mtime, 
+                  'scanned' : time.time(), 
+                  'folders' : folders, 
+                  'files' : files}
+        
+        with self._lock:
+            self.records[directory] = record
+            self.dirty = True
+        
+        return record
+    
+    def get_record(self, directory):
+        """
+        Get the listing of a directory, rescanning it only if its mtime changed.
+        
+        Returns:
+            dict: The record with folders and files lists. None if the directory does not exist.
+        """
+        
+        directory = util_file.fix_slashes(directory)
+        
+        try:
+            mtime = os.stat(directory).st_mtime
+        except:
+            with self._lock:
+                if directory in self.records:
+                    self.records.pop(directory)
+                    self.dirty = True
+            return
+        
+        record = self.records.get(directory)
+        
+        if record and record['mtime'] == mtime and not self.is_racy(mtime, record['scanned']):
+            return record
+        
+        return self._scan(directory, mtime)
+    
+    def contains(self, directory):
+        
+        directory = util_file.fix_slashes(directory)
+        
+        if directory == self.root or directory.startswith(self.root + '/'):
+            return True
+        
+        return False
+    
+    def get_folders(self, directory):
+        """
+        Returns:
+            list: Folder names in the directory. 
+        """
+        record = self.get_record(directory)
+        
+        if not record:
+            return []
+        
+        return list(record['folders'])
+    
+    def is_process(self, directory):
+        
+        record = self.get_record(directory)
+        
+        if not record:
+            return False
+        
+        return '.code' in record['folders']
+    
+    def is_enabled(self, directory):
+        
+        record = self.get_record(directory)
+        
+        if not record:
+            return False
+        
+        if Process.enable_filename in record['files'] or Process.enable_filename in record['folders']:
+            return True
+        
+        return False
+    
+    def find_processes(self, directory, return_also_non_process_list = False, stop_at_one = False):
+        """
+        Same as find_processes, using the cached listings.
+        """
+        
+        record = self.get_record(directory)
+        
+        found = []
+        found_non = []
+        
+        if not record:
+            if return_also_non_process_list:
+                return [found, found_non]
+            return found
+        
+        names = sorted(record['folders'] + record['files'])
+        folders = record['folders']
+        
+        for name in names:
+            
+            if stop_at_one:
+                if found:
+                    break
+                
+                if found_non and return_also_non_process_list:
+                    break
+            
+            if name.startswith('.'):
+                continue
+            
+            is_folder = name in folders
+            
+            if is_folder and self.is_process(util_file.join_path(directory, name)):
+                found.append(name)
+                continue
+            
+            if return_also_non_process_list:
+                #same as is_interesting_folder
+                if name.find('.') == -1 or is_folder:
+                    found_non.append(name)
+        
+        if return_also_non_process_list:
+            return [found, found_non]
+        
+        return found
+    
+    def has_parts(self, directory):
+        """
+        Check if the directory has a sub process or folder to show in the tree. 
+        """
+        record = self.get_record(directory)
+        
+        if not record:
+            return False
+        
+        for name in record['folders']:
+            if not name.startswith('.'):
+                return True
+        
+        for name in record['files']:
+            if not name.startswith('.') and name.find('.') == -1:
+                return True
+        
+        return False
+
+_process_indices = {}
+
+def get_process_index(directory = None):
+    """
+    Get the process index that covers the directory. 
+    Passing a directory that no index covers starts a new index rooted there. 
+    
+    Set VETALA_PROCESS_INDEX to False to turn the index off.
+    
+    Returns:
+        ProcessIndex:
+    """
+    
+    if util.get_env('VETALA_PROCESS_INDEX') == 'False':
+        return
+    
+    if not directory:
+        return
+    
+    directory = util_file.fix_slashes(directory)
+    
+    for root in _process_indices:
+        if _process_indices[root].contains(directory):
+            return _process_indices[root]
+    
+    index = ProcessIndex(directory)
+    _process_indices[directory] = index
+    
+    return index
+
+def find_process_index(directory):
+    """
+    Get the process index that covers the directory, without starting a new one.
+    """
+    
+    if util.get_env('VETALA_PROCESS_INDEX') == 'False':
+        return
+    
+    if not directory or not _process_indices:
+        return
+    
+    directory = util_file.fix_slashes(directory)
+    
+    for root in _process_indices:
+        if _process_indices[root].contains(directory):
+            return _process_indices[root]
+
 def find_processes(directory = None, return_also_non_process_list = False, stop_at_one = False):
     """
     This will try to find the processes in the supplied directory. If no directory supplied, it will search the current working directory.
@@ -54,6 +302,11 @@ def find_processes(directory = None, return_also_non_process_list = False, stop_
     if not directory:
         directory = util_file.get_cwd()
     
+    index = find_process_index(directory)
+    
+    if index:
+        return index.find_processes(directory, return_also_non_process_list, stop_at_one)
+    
     found = []
     found_non = []
     
@@ -93,6 +346,23 @@ def find_processes(directory = None, return_also_non_process_list = False, stop_
     if return_also_non_process_list:
         return [found, found_non]
 
+def has_process_parts(directory):
+    """
+    Check if the directory has a sub process or a folder that shows in the process tree.
+    """
+    
+    index = find_process_index(directory)
+    
+    if index:
+        return index.has_parts(directory)
+    
+    processes, folders = find_processes(directory, return_also_non_process_list = True, stop_at_one = True)
+    
+    if processes or folders:
+        return True
+    
+    return False
+
 def is_interesting_folder(folder_name, directory):
     full_path = util_file.join_path(directory, folder_name)
     if folder_name.find('.') > -1:
@@ -119,6 +389,12 @@ def is_process(directory):
     return True
 
 def is_process_enabled(directory):
+    
+    index = find_process_index(directory)
+    
+    if index:
+        return index.is_enabled(directory)
+    
     path = directory
         
     enable_path = util_file.join_path(path,Process.enable_filename)
@@ -172,6 +448,28 @@ def get_unused_process_name(directory = None, name = None):
 
 __internal_script_running = None
 
+def _run_script_profiled(function, process_inst, script, hard_error, settings, return_status):
+    
+    profile = process_inst._build_profile
+    
+    if not profile:
+        return function(process_inst, script, hard_error, settings, return_status)
+    
+    profile.start_script(script)
+    
+    status = 'fail'
+    
+    try:
+        value = function(process_inst, script, hard_error, settings, return_status)
+        
+        status = None
+        if return_status:
+            status = value
+    finally:
+        profile.end_script(status)
+    
+    return value
+
 def decorator_process_run_script(function):
     #decorator meant only to work with run_script, not to be used
      
@@ -179,6 +477,7 @@ def decorator_process_run_script(function):
     
     def wrapper(self, script, hard_error = True, settings = None, return_status = False):
         self.current_script = script
+        last_log_script = util.set_temp_log_script(script)
         if in_maya:
             core.refresh()
         
@@ -218,7 +517,7 @@ def decorator_process_run_script(function):
                     if not cmds.ogs(q = True, pause = True):
                         cmds.ogs(pause = True)
                 
-                value = function(self, script, hard_error, settings, return_status)
+                value = _run_script_profiled(function, self, script, hard_error, settings, return_status)
                 if not core.is_batch():
                     if cmds.ogs(q = True, pause = True):
                         cmds.ogs(pause = True)
@@ -232,7 +531,7 @@ def decorator_process_run_script(function):
             cmds.evaluationManager(mode = mode)
 
         else:
-            value = function(self, script, hard_error, settings, return_status)                    
+            value = _run_script_profiled(function, self, script, hard_error, settings, return_status)
         
         if 'reset' in locals():
             
@@ -251,11 +550,535 @@ def decorator_process_run_script(function):
                 
             util.end_temp_log()
         
+        util.set_temp_log_script(last_log_script)
+        
         if self.current_script:
             self.current_script = None
         return value
     
     return wrapper
+
+class ProcessManifest(object):
+    """
+    The scripts and states in a manifest.data file, parsed once and indexed by script name.
+    
+    The file is parsed again only when its mtime or size changes, 
+    or while its mtime is too recent to tell same second writes apart.
+    Use it as a context manager to batch several edits into one write.
+    
+    Args:
+        filepath (str): The path to manifest.data
+    """
+    
+    racy_seconds = 2
+    
+    def __init__(self, filepath):
+        
+        self.filepath = filepath
+        
+        self.scripts = []
+        self.states = []
+        self.has_lines = False
+        
+        self._stamp = None
+        self._racy = False
+        self._batch = 0
+        self._dirty = False
+        
+        self._index = {}
+        self._parents = {}
+        self._children = {}
+        self._dict = {}
+    
+    def __enter__(self):
+        
+        self.load()
+        self._batch += 1
+        
+        return self
+    
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        
+        self._batch -= 1
+        
+        if not self._batch and self._dirty:
+            self._write()
+    
+    def _get_stamp(self):
+        
+        try:
+            file_stat = os.stat(self.filepath)
+        except:
+            return
+        
+        return file_stat.st_mtime, file_stat.st_size
+    
+    def _set_stamp(self, stamp):
+        
+        self._stamp = stamp
+        self._racy = bool(stamp) and (time.time() - stamp[0]) < self.racy_seconds
+    
+    def _parse_state(self, value):
+        
+        if value == 'True':
+            return True
+        if value == 'False':
+            return False
+        
+        return eval(value)
+    
+    def _parse(self, lines):
+        
+        scripts = []
+        states = []
+        
+        for line in lines:
+            
+            if not line:
+                continue
+            
+            states.append(False)
+            
+            split_line = line.split()
+            if len(split_line):
+                
+                script_name = ' '.join(split_line[:-1])
+                
+                scripts.append(script_name)
+                
+            if len(split_line) >= 2:
+                
+                states[-1] = self._parse_state(split_line[-1])
+        
+        return scripts, states
+    
+    def _build_index(self):
+        
+        index = {}
+        parents = {}
+        children = {}
+        manifest_dict = {}
+        
+        last_at_depth = {}
+        
+        for inc in range(0, len(self.scripts)):
+            
+            script = self.scripts[inc]
+            depth = script.count('/')
+            
+            if not script in index:
+                index[script] = inc
+                #the parent is the closest script above at the same depth
+                parents[script] = last_at_depth.get(depth)
+            
+            last_at_depth[depth] = script
+            
+            if depth:
+                children.setdefault(script[:script.rfind('/')], []).append(script)
+            
+            manifest_dict[script] = self.states[inc]
+        
+        self._index = index
+        self._parents = parents
+        self._children = children
+        self._dict = manifest_dict
+    
+    def _write(self):
+        
+        lines = []
+        
+        for script, state in zip(self.scripts, self.states):
+            lines.append('%s %s' % (script, state))
+        
+        util_file.write_lines(self.filepath, lines)
+        
+        self._set_stamp(self._get_stamp())
+        self._dirty = False
+    
+    def load(self):
+        """
+        Parse the file if it changed since the last load. Does nothing while a batch is open.
+        """
+        
+        if self._batch:
+            return
+        
+        stamp = self._get_stamp()
+        
+        if stamp and stamp == self._stamp and not self._racy:
+            return
+        
+        self._set_stamp(stamp)
+        
+        lines = []
+        if stamp:
+            lines = util_file.get_file_lines(self.filepath)
+        
+        self.has_lines = bool(lines)
+        self.scripts, self.states = self._parse(lines)
+        
+        self._build_index()
+    
+    def set(self, scripts, states = [], append = False):
+        
+        self.load()
+        
+        new_scripts = []
+        new_states = []
+        
+        state_count = len(states or [])
+        
+        for inc in range(0, len(scripts)):
+            
+            if scripts[inc] == 'manifest.py':
+                continue
+            
+            state = False
+            
+            if inc < state_count:
+                state = states[inc]
+            
+            new_scripts.append(scripts[inc])
+            new_states.append(state)
+        
+        if append:
+            self.scripts += new_scripts
+            self.states += new_states
+        else:
+            self.scripts = new_scripts
+            self.states = new_states
+        
+        self.has_lines = bool(self.scripts)
+        
+        self._build_index()
+        
+        if self._batch:
+            self._dirty = True
+        else:
+            self._write()
+    
+    def get(self):
+        """
+        Returns:
+            tuple: (list, list) Copies of the scripts and states. (None, None) if the file is empty.
+        """
+        self.load()
+        
+        if not self.has_lines:
+            return None, None
+        
+        return list(self.scripts), list(self.states)
+    
+    def get_dict(self):
+        
+        self.load()
+        
+        return dict(self._dict)
+    
+    def has_script(self, script_name):
+        
+        self.load()
+        
+        return script_name in self._index
+    
+    def get_state(self, script_name):
+        
+        self.load()
+        
+        if script_name in self._index:
+            return self.states[self._index[script_name]]
+    
+    def set_state(self, script_name, bool_value):
+        
+        self.load()
+        
+        if not script_name in self._index:
+            return
+        
+        states = list(self.states)
+        
+        for inc in range(self._index[script_name], len(self.scripts)):
+            if self.scripts[inc] == script_name:
+                states[inc] = bool_value
+        
+        self.set(list(self.scripts), states)
+    
+    def get_parent(self, script_name):
+        
+        self.load()
+        
+        return self._parents.get(script_name)
+    
+    def get_previous(self, script_name):
+        
+        self.load()
+        
+        inc = self._index.get(script_name)
+        
+        if not inc:
+            return
+        
+        return self.scripts[inc-1], self.states[inc-1]
+    
+    def get_children(self, code_name):
+        
+        self.load()
+        
+        return list(self._children.get(code_name, []))
+    
+    def insert_below(self, script_name, previous_script_name, state = False):
+        
+        self.load()
+        
+        scripts = list(self.scripts)
+        states = list(self.states)
+        
+        if previous_script_name in self._index:
+            inc = self._index[previous_script_name]
+            scripts.insert(inc+1, script_name)
+            states.insert(inc+1, state)
+        
+        self.set(scripts, states)
+
+_manifests = {}
+
+def get_process_manifest(filepath):
+    """
+    Get the shared ProcessManifest for a manifest file.
+    """
+    
+    filepath = util_file.fix_slashes(filepath)
+    
+    if not filepath in _manifests:
+        _manifests[filepath] = ProcessManifest(filepath)
+    
+    return _manifests[filepath]
+
+def format_option_value(value):
+    """
+    Get the value an option gives a script, from the value stored in options.json.
+    Strings that evaluate to a list, tuple or dict are evaluated and strings with commas are split.
+    """
+    
+    new_value = value
+    
+    option_type = None
+    
+    if type(value) == list:
+        
+        try:
+            option_type = value[1]
+        except:
+            pass    
+        value = value[0]
+            
+        if option_type == 'dictionary':
+            
+            new_value = value[0]
+            
+            if type(new_value) == list:
+                new_value = new_value[0]
+        
+        if option_type == 'note':
+            new_value = value[0]
+
+    if not option_type == 'script':
+        
+        if util.is_str(value):
+            eval_value = None
+            try:
+                if value:
+                    eval_value = eval(value)
+            except:
+                pass
+           
+            if eval_value:
+                if type(eval_value) == list or type(eval_value) == tuple or type(eval_value) == dict:
+                    new_value = eval_value
+                    value = eval_value
+        
+    if util.is_str(value):
+        
+        if value.find(',') > -1:
+            
+            new_value = value.replace(' ', '')
+            new_value = new_value.split(',')
+            found = []
+            for sub_value in new_value:
+                found.append(sub_value.strip())
+            new_value = found
+    
+    return new_value
+
+class ProcessOptions(object):
+    """
+    A read only snapshot of an options.json file.
+    
+    Values are formatted once when the file is loaded and short option names are indexed, 
+    so lookups do not need to scan every option.
+    The file is loaded again only when its mtime or size changes, 
+    or while its mtime is too recent to tell same second writes apart.
+    
+    Args:
+        filepath (str): The path to options.json
+    """
+    
+    racy_seconds = 2
+    
+    def __init__(self, filepath):
+        
+        self.filepath = filepath
+        
+        self.version = 0
+        
+        self.order = []
+        self.values = {}
+        self.formatted = {}
+        
+        self._stamp = None
+        self._racy = False
+        self._items = None
+        self._names = {}
+        
+    def _get_stamp(self):
+        
+        try:
+            file_stat = os.stat(self.filepath)
+        except:
+            return
+        
+        return file_stat.st_mtime, file_stat.st_size
+    
+    def _build(self, items):
+        
+        self.order = []
+        self.values = {}
+        self.formatted = {}
+        self._names = {}
+        
+        for key, value in items:
+            
+            if not key in self.values:
+                self.order.append(key)
+            
+            self.values[key] = value
+            
+            try:
+                self.formatted[key] = format_option_value(value)
+            except:
+                self.formatted[key] = value
+            
+            split_key = key.split('.')
+            
+            name = split_key[-1]
+            group = '.'.join(split_key[:-1])
+            
+            if not name in self._names:
+                self._names[name] = []
+            
+            self._names[name].append((group, key))
+            
+    def _copy(self, value):
+        
+        if type(value) == list or type(value) == dict:
+            return deepcopy(value)
+        
+        return value
+    
+    def load(self):
+        """
+        Load the file if it changed since the last load.
+        
+        Returns:
+            bool: True if the file was loaded.
+        """
+        
+        stamp = self._get_stamp()
+        
+        if stamp == self._stamp and self.version and not self._racy:
+            return False
+        
+        items = []
+        
+        if stamp:
+            try:
+                items = util_file.get_json(self.filepath) or []
+            except:
+                items = []
+        
+        if type(items) == dict:
+            items = list(items.items())
+        
+        self._stamp = stamp
+        self._racy = bool(stamp) and (time.time() - stamp[0]) < self.racy_seconds
+        
+        if self.version and items == self._items:
+            return False
+        
+        self._build(items)
+        
+        self._items = items
+        self.version += 1
+        
+        return True
+        
+    def has(self, key):
+        
+        if key in self.values:
+            return True
+        
+        return False
+    
+    def get_raw(self, key):
+        
+        return self.values.get(key)
+    
+    def get(self, key):
+        """
+        Get the formatted value of an option by its full name, group.name.
+        """
+        
+        return self._copy(self.formatted.get(key))
+    
+    def get_matches(self, name):
+        """
+        Returns:
+            list: (group, key) for every option whose short name is name, in file order.
+        """
+        
+        return list(self._names.get(name, []))
+    
+    def get_match(self, name):
+        """
+        Returns:
+            tuple: (value, group, key) of the first option whose short name is name, or None.
+        """
+        
+        matches = self._names.get(name)
+        
+        if not matches:
+            return
+        
+        group, key = matches[0]
+        
+        return self._copy(self.formatted[key]), group, key
+
+_options = {}
+
+def get_process_options(filepath):
+    """
+    Get the shared ProcessOptions for an options.json file.
+    """
+    
+    filepath = util_file.fix_slashes(filepath)
+    
+    if not filepath in _options:
+        _options[filepath] = ProcessOptions(filepath)
+    
+    options = _options[filepath]
+    options.load()
+    
+    return options
     
 class Process(object):
     """
@@ -287,12 +1110,17 @@ class Process(object):
         self._option_result_function = None
         
         self._skip_children = None
+        
+        self._build_profile = None
 
     def _reset(self):
         self.parts = []
         self.option_values = {}
         
         self.option_settings = None
+        self._option_snapshot = None
+        self._option_snapshot_path = None
+        self._option_version = None
         self.settings = None
         self._control_inst = None        
         self._data_override = None
@@ -302,7 +1130,16 @@ class Process(object):
     
     def _setup_options(self):
         
-        if not self.option_settings or self._update_options:
+        if not self.option_settings:
+            self._load_options()
+            return
+        
+        if not self._update_options or self.option_settings.is_dirty():
+            return
+        
+        options = self._get_option_snapshot()
+        
+        if not options or options.filepath != self._option_snapshot_path or options.version != self._option_version:
             self._load_options()
         
     def _load_options(self):
@@ -313,6 +1150,76 @@ class Process(object):
         self.option_settings = options
         self.option_settings.set_directory(self._get_override_path(), 'options.json')
         
+        self._option_snapshot = None
+        options = self._get_option_snapshot()
+        
+        if options:
+            self._option_version = options.version
+    
+    def _get_option_snapshot(self):
+        """
+        Get the ProcessOptions of the options file in use. 
+        While options are not updating, the last snapshot is used without checking the file.
+        Returns None while option writes are batched, since the file is behind.
+        """
+        
+        if self.option_settings and self.option_settings.is_dirty():
+            return
+        
+        if self._option_snapshot and not self._update_options:
+            return self._option_snapshot
+        
+        path = self._get_override_path()
+        
+        if not path:
+            return
+        
+        self._option_snapshot = get_process_options(util_file.join_path(path, 'options.json'))
+        self._option_snapshot_path = self._option_snapshot.filepath
+        
+        return self._option_snapshot
+    
+    def _options_changed(self):
+        
+        options = self._get_option_snapshot()
+        
+        if options:
+            options.load()
+            self._option_version = options.version
+    
+    def _find_options(self, name):
+        """
+        Returns:
+            list: (group, key, formatted value) for every option whose short name is name.
+        """
+        
+        options = self._get_option_snapshot()
+        
+        if options:
+            return [(group, key, options.get(key)) for group, key in options.get_matches(name)]
+        
+        found = []
+        
+        option_dict = self.option_settings.settings_dict
+        
+        for key in option_dict:
+            
+            split_key = key.split('.')
+            
+            if split_key[-1] == name:
+                found.append(('.'.join(split_key[:-1]), key, format_option_value(option_dict[key])))
+        
+        return found
+    
+    def _get_option_result(self, value, option_name = None):
+        
+        if self._option_result_function:
+            value = self._option_result_function(value, option_name)
+        
+        log.debug('Formatted value: %s' % value)
+        
+        return value
+        
     def _setup_settings(self):
         
         if not self.settings:
@@ -580,8 +1487,6 @@ class Process(object):
         
     def _source_script(self, script):
         
-        util_file.delete_pyc(script)
-        
         put = None
         if self._data_override:
             put = self._data_override._put
@@ -593,7 +1498,11 @@ class Process(object):
         
         util.show('Sourcing: %s' % script)
         
-        module = util_file.source_python_module(script)
+        cache_directory = None
+        if util.get_env('VETALA_CODE_CACHE_DISK') == 'True':
+            cache_directory = util_file.join_path(self.get_code_path(), '.cache')
+        
+        module = util_file.source_python_module(script, cache_directory)
         
         status = None
         init_passed = False
@@ -605,64 +1514,13 @@ class Process(object):
             status = module
             init_passed = False   
             
-        return module, init_passed, status
-        
-    def _format_option_value(self, value, option_name = None):
-        
-        new_value = value
-        
-        option_type = None
-        
-        if type(value) == list:
-            
-            try:
-                option_type = value[1]
-            except:
-                pass    
-            value = value[0]
-                
-            if option_type == 'dictionary':
-                
-                new_value = value[0]
-                
-                if type(new_value) == list:
-                    new_value = new_value[0]
-            
-            if option_type == 'note':
-                new_value = value[0]
-
-        if not option_type == 'script':
-            
-            if util.is_str(value):
-                eval_value = None
-                try:
-                    if value:
-                        eval_value = eval(value)
-                except:
-                    pass
-               
-                if eval_value:
-                    if type(eval_value) == list or type(eval_value) == tuple or type(eval_value) == dict:
-                        new_value = eval_value
-                        value = eval_value
-            
-        if util.is_str(value):
-            
-            if value.find(',') > -1:
-                
-                new_value = value.replace(' ', '')
-                new_value = new_value.split(',')
-                found = []
-                for sub_value in new_value:
-                    found.append(sub_value.strip())
-                new_value = found
+        return module, init_passed, status
         
-        if self._option_result_function:
-            new_value = self._option_result_function(new_value, option_name)
-
-        log.debug('Formatted value: %s' % new_value)
-                
-        return new_value
+    def _format_option_value(self, value, option_name = None):
+        
+        new_value = format_option_value(value)
+        
+        return self._get_option_result(new_value, option_name)
 
     def set_directory(self, directory):
         """
@@ -978,6 +1836,13 @@ class Process(object):
         
         return backup_path
 
+    def get_profile_path(self):
+        """
+        Returns:
+            str: The folder build profiles are written to.
+        """
+        return util_file.join_path(self.get_path(), process_profile.profile_folder_name)
+
     def backup(self, comment = 'Backup', directory = None):
         
         backup_path = self.get_backup_path(directory)
@@ -1144,7 +2009,12 @@ class Process(object):
         """
         directory = self.get_data_path()
         
-        folders =  util_file.get_folders(directory)
+        index = find_process_index(directory)
+        
+        if index:
+            folders = index.get_folders(directory)
+        else:
+            folders =  util_file.get_folders(directory)
         if '.sub' in folders:
             folders.remove('.sub')
             
@@ -1625,25 +2495,9 @@ class Process(object):
 
     def get_code_children(self, code_name):
         
-        found = []
-        
         code_name = util_file.remove_extension(code_name)
         
-        scripts, states = self.get_manifest()
-        
-        for script in scripts:
-            if script.find('/') == -1:
-                continue
-            
-            if script.startswith(code_name + '/'):
-                
-                sub_script = script[len(code_name+'/'):]
-                
-                if not sub_script.find('/') > -1:
-                    found.append(script)
-        
-                
-        return found
+        return self.get_manifest_model().get_children(code_name)
         
         
 
@@ -1955,6 +2809,32 @@ class Process(object):
         folder = self.get_code_folder(code_name)
         
         util_file.delete_versions(folder, keep)
+    
+    def collect_version_garbage(self):
+        """
+        Remove objects in the version store that no data or code version uses anymore.
+        Only does work on versions saved with VETALA_VERSION_STORE on.
+        
+        Returns:
+            tuple: (removed object count, freed size in MB)
+        """
+        
+        removed = 0
+        size = 0
+        
+        for path in [self.get_data_path(), self.get_code_path()]:
+            
+            if not util_file.exists(path):
+                continue
+            
+            sub_removed, sub_size = util_file.collect_version_garbage(path)
+            
+            removed += sub_removed
+            size += sub_size
+        
+        util.show('Removed %s unused version objects, %s MB' % (removed, round(size, 2)))
+        
+        return removed, size
         
     #--- settings
     
@@ -2008,6 +2888,20 @@ class Process(object):
         
         return self.option_settings.has_settings()
     
+    def batch_options(self):
+        """
+        Collect option changes into one write of the options file.
+        
+        Example:
+            with process_inst.batch_options():
+                process_inst.add_option('a', 1)
+                process_inst.add_option('b', 2)
+        """
+        
+        self._setup_options()
+        
+        return self.option_settings.batch()
+    
     def add_option(self, name, value, group = None, option_type = None):
         
         self._setup_options()
@@ -2042,6 +2936,7 @@ class Process(object):
             util.show('Creating option: %s with a value of: %s' % (name, show_value))
         
         self.option_settings.set(name, value)
+        self._options_changed()
         
     def set_option(self, name, value, group = None):
         self._setup_options()
@@ -2052,6 +2947,7 @@ class Process(object):
             name = '%s' % name
         
         self.option_settings.set(name, value)
+        self._options_changed()
         
     def get_unformatted_option(self, name, group = None):
         self._setup_options()
@@ -2087,6 +2983,7 @@ class Process(object):
         self.option_settings.settings_order.insert(index, name)
         
         self.option_settings._write()
+        self._options_changed()
      
     def get_option(self, name, group = None):
         """
@@ -2094,7 +2991,16 @@ class Process(object):
         """
         self._setup_options()
         
-        value = self.get_unformatted_option(name, group)
+        options = self._get_option_snapshot()
+        
+        if options:
+            key = name
+            if group:
+                key = '%s.%s' % (group, name)
+            
+            value = options.get_raw(key)
+        else:
+            value = self.get_unformatted_option(name, group)
         
         if value == None:
             
@@ -2119,6 +3025,8 @@ class Process(object):
                         util.warning('Could not find option: %s in group: %s' % (name, group))
                 else:
                     util.warning('Could not find option: %s' % name)
+        elif options:
+            value = self._get_option_result(options.get(key), name)
         else:
             value = self._format_option_value(value, name)
         
@@ -2136,23 +3044,16 @@ class Process(object):
         
         self._setup_options()
         
-        option_dict = self.option_settings.settings_dict
-        
         found = {}
         
-        for key in option_dict:
+        for group, key, value in self._find_options(name):
             
-            split_key = key.split('.')
-            group = '.'.join(split_key[:-1])
+            value = self._get_option_result(value, key)
             
-            if split_key[-1] == name:
-                if return_first:
-                    
-                    value = self._format_option_value(option_dict[key], key)
-                    
-                    return value,group
+            if return_first:
+                return value,group
                 
-                found[name] = [value, group]
+            found[name] = [value, group]
         
         if not found:
             found = None
@@ -2166,21 +3067,16 @@ class Process(object):
         
         self._setup_options()
         
-        option_dict = self.option_settings.settings_dict
-        
         found = {}
         
-        for key in option_dict:
+        for group, key, value in self._find_options(name):
             
-            split_key = key.split('.')
-            if split_key[-1] == name:
-                if return_first:
-                    
-                    value = self._format_option_value(option_dict[key], key)
-                    
-                    return value
+            value = self._get_option_result(value, key)
+            
+            if return_first:
+                return value
                 
-                found[name] = value
+            found[name] = value
         
         if not found:
             found = None
@@ -2205,6 +3101,11 @@ class Process(object):
         #if not group:
         #    name = '%s' % name
         
+        options = self._get_option_snapshot()
+        
+        if options and (options.has(name) or options.get_matches(name)):
+            return True
+        
         return self.option_settings.has_setting_match(name)
         
     def get_options(self):
@@ -2236,6 +3137,7 @@ class Process(object):
         
         if self.option_settings:
             self.option_settings.clear()
+            self._options_changed()
         
 
     def save_default_option_history(self):
@@ -2270,41 +3172,18 @@ class Process(object):
             States contains the enabled/disabled state of the script. 
         """
         
+        return self.get_manifest_model(manifest_file).get()
+    
+    def get_manifest_model(self, manifest_file = None):
+        """
+        Returns:
+            ProcessManifest: The parsed manifest. Use it in a with statement to batch edits into one write.
+        """
+        
         if not manifest_file:
             manifest_file = self.get_manifest_file()
         
-        if not util_file.exists(manifest_file):
-            return None, None
-        
-        lines = util_file.get_file_lines(manifest_file)
-        
-        if not lines:
-            return None, None
-        
-        scripts = []
-        states = []
-        
-        for line in lines:
-            
-            if not line:
-                continue
-            
-            states.append(False)
-            
-            split_line = line.split()
-            if len(split_line):
-                
-                script_name = ' '.join(split_line[:-1])
-                
-                scripts.append(script_name)
-                
-            if len(split_line) >= 2:
-                
-                state = eval(split_line[-1])
-                
-                states[-1] = state
-                              
-        return scripts, states
+        return get_process_manifest(manifest_file)
         
     def get_manifest_dict(self, manifest_file = None):
         """
@@ -2312,42 +3191,7 @@ class Process(object):
             dict: name of code : state 
         """
         
-        if not manifest_file:
-            manifest_file = self.get_manifest_file()
-        
-        manifest_dict = {}
-        
-        if not util_file.is_file(manifest_file):
-            return manifest_dict
-        
-        lines = util_file.get_file_lines(manifest_file)
-        
-        if not lines:
-            return manifest_dict
-        
-        
-        
-        for line in lines:
-
-            script_name = None
-            
-            if not line:
-                continue
-            
-            split_line = line.split()
-            
-            if len(split_line):
-                
-                script_name = ' '.join(split_line[:-1])
-                
-                manifest_dict[script_name] = False
-                
-            if len(split_line) >= 2 and script_name:
-                state = eval(split_line[-1])
-                
-                manifest_dict[script_name] = state
-                              
-        return manifest_dict
+        return self.get_manifest_model(manifest_file).get_dict()
         
         
     def get_manifest_folder(self):
@@ -2437,18 +3281,7 @@ class Process(object):
     
     def is_in_manifest(self, entry):
         
-        filename = self.get_manifest_file()
-        
-        lines = util_file.get_file_lines(filename)
-        
-        for line in lines:
-            
-            split_line = line.split(' ')
-            
-            if split_line[0] == entry:
-                return True
-        
-        return False
+        return self.get_manifest_model().has_script(entry)
     
     def get_manifest_history(self):
         
@@ -2472,88 +3305,27 @@ class Process(object):
         
         
         
-        manifest_file = self.get_manifest_file()
-        
-        lines = []
-        
-        script_count = len(scripts)
-        if states:
-            state_count = len(states)
-        if not states:
-            state_count = 0
-        
-        for inc in range(0, script_count):
-            
-            if scripts[inc] == 'manifest.py':
-                continue
-            
-            if inc > state_count-1:
-                state = False
-                
-            if inc < state_count:
-                state = states[inc]
-            
-            line = '%s %s' % (scripts[inc], state)
-            lines.append(line)
-        
-        util_file.write_lines(manifest_file, lines, append = append)
+        self.get_manifest_model().set(scripts, states, append = append)
         
     def has_script(self, script_name):
         if not script_name.endswith('.py'):
             script_name = script_name + '.py'
         
-        scripts, states = self.get_manifest()
-        
-        if script_name in scripts:
-            return True
-        
-        return False
+        return self.get_manifest_model().has_script(script_name)
         
     def get_script_parent(self, script_name):
         
         if not script_name.endswith('.py'):
             script_name = script_name + '.py'
         
-        scripts, states = self.get_manifest()
-        
-        for inc in range(0, len(scripts)):
-        
-            if script_name == scripts[inc]:
-                
-                test_inc = inc - 1
-                
-                if test_inc < 0:
-                    break
-                
-                while scripts[test_inc].count('/') != scripts[inc].count('/'):
-                    test_inc -= 1
-                    
-                    if test_inc < 0:
-                        break
-                
-                if test_inc >= 0:
-                    return scripts[test_inc]
-
+        return self.get_manifest_model().get_parent(script_name)
         
     def get_previous_script(self, script_name):
         
         if not script_name.endswith('.py'):
             script_name = script_name + '.py'
         
-        scripts, states = self.get_manifest()
-        
-        last_script = None
-        last_state = None
-        
-        for script, state in zip(scripts, states):
-            
-            if last_script:
-                if script_name == script:
-                    return last_script, last_state 
-                
-            
-            last_script = script
-            last_state = state
+        return self.get_manifest_model().get_previous(script_name)
         
     def insert_manifest_below(self, script_name, previous_script_name, state = False):
         
@@ -2562,58 +3334,34 @@ class Process(object):
         if not previous_script_name.endswith('.py'):
             previous_script_name = previous_script_name + '.py'
             
-        scripts, states = self.get_manifest()
-
-        script_count = 0
+        manifest = self.get_manifest_model()
         
-        if scripts:
-            script_count = len(scripts)
-                
-        code_folders = self.get_code_folders()
+        scripts, states = manifest.get()
         
-        if not script_count and not code_folders:
+        if not scripts and not self.get_code_folders():
             return
         
-        for inc in range(0, len(scripts)):
-            
-            script = scripts[inc]
-            
-            if script == previous_script_name:
-                scripts.insert(inc+1, script_name)
-                states.insert(inc+1, state)
-                break
-            
-        self.set_manifest(scripts, states)
+        manifest.insert_below(script_name, previous_script_name, state)
         
     def get_script_state(self, script_name):
         if not script_name.endswith('.py'):
             script_name = script_name + '.py'
             
-        scripts, states = self.get_manifest()
-        
-        for script, state in zip(scripts, states):
-            
-            if script == script_name:
-                return state
+        return self.get_manifest_model().get_state(script_name)
             
     def set_script_state(self, script_name, bool_value):
         if not script_name.endswith('.py'):
             script_name = script_name + '.py'
         
-        scripts, states = self.get_manifest()
+        manifest = self.get_manifest_model()
+        
+        scripts, states = manifest.get()
         
         if not scripts:
             util.warning('Could not update state on %s, because it is not in the manifest' % script_name)
             return
         
-        for inc in range(0, len(scripts)):
-            
-            script = scripts[inc]
-            
-            if script == script_name:
-                states[inc] = bool_value
-        
-        self.set_manifest(scripts, states)
+        manifest.set_state(script_name, bool_value)
 
     def sync_manifest(self):
         """
@@ -3154,107 +3902,130 @@ class Process(object):
         
         state_dict = {}
         
-        progress_bar = None
+        profile_mode = process_profile.get_profile_mode()
         
-        if in_maya:
-            
-            progress_bar = core.ProgressBar('Process', len(scripts))
-            progress_bar.status('Processing: getting ready...')
-            
-        status_list = []
-        skip_children = None
-            
-        for inc in range(0, len(scripts)):
-            
-            state = states[inc]
-            script = scripts[inc]
-            status = 'Skipped'
-            
-            check_script = util_file.remove_extension(script)
-            
-            if skip_children:
-                if script.startswith(skip_children):
-                    state = False
+        if profile_mode != 'off':
+            self._build_profile = process_profile.BuildProfile(name, profile_mode, process_profile.get_count_commands())
+            self._build_profile.start()
+        
+        #the profiler can wrap maya.cmds, end it even when the build is interrupted
+        try:
             
-            state_dict[check_script] = state
+            progress_bar = None
             
-            if progress_bar:
-                progress_bar.status('Processing: %s' % script)
+            if in_maya:
                 
-                if progress_bar.break_signaled():
-                    break
-            
-            if state:
+                progress_bar = core.ProgressBar('Process', len(scripts))
+                progress_bar.status('Processing: getting ready...')
                 
-                parent_state = True
+            status_list = []
+            skip_children = None
                 
-                for key in state_dict:
-                    
-                    if script.find(key) > -1:
-                        parent_state = state_dict[key]
-                        
-                        if parent_state == False:
-                            break
-                        
-                if not parent_state:
-                    util.show('\tSkipping: %s\n\n' % script)
-                    if progress_bar:
-                        progress_bar.inc()
-                    continue 
+            for inc in range(0, len(scripts)):
                 
+                state = states[inc]
+                script = scripts[inc]
+                status = 'Skipped'
                 
-                self._update_options = False
+                check_script = util_file.remove_extension(script)
                 
-                if in_maya:
-                    cmds.select(cl = True)
-                try:
-                    status = self.run_script(script, hard_error=False, return_status = True)
-                    if self._skip_children:
-                        skip_children = check_script
-                        self._skip_children = None
-                except Exception:
-                    error = traceback.format_exc()
-                    util.error(error)
-                    status = 'fail'
-                self._update_options = True
-                
-                if not status == 'Success':
-                    scripts_that_error.append(script)
-            
-            if not states[inc]:
-                util.show('\n------------------------------------------------')
-                util.show('Skipping: %s\n\n' % script)
+                if skip_children:
+                    if script.startswith(skip_children):
+                        state = False
+                
+                state_dict[check_script] = state
+                
+                if progress_bar:
+                    progress_bar.status('Processing: %s' % script)
+                    
+                    if progress_bar.break_signaled():
+                        break
+                
+                if state:
+                    
+                    parent_state = True
+                    
+                    #check the parent groups, a/b/c.py is skipped if a or a/b is off
+                    split_script = check_script.split('/')
+                    
+                    for inc2 in range(1, len(split_script)):
+                        
+                        if state_dict.get('/'.join(split_script[:inc2])) == False:
+                            parent_state = False
+                            break
+                            
+                    if not parent_state:
+                        util.show('\tSkipping: %s\n\n' % script)
+                        if progress_bar:
+                            progress_bar.inc()
+                        continue 
+                    
+                    
+                    self._update_options = False
+                    
+                    if in_maya:
+                        cmds.select(cl = True)
+                    try:
+                        status = self.run_script(script, hard_error=False, return_status = True)
+                        if self._skip_children:
+                            skip_children = check_script
+                            self._skip_children = None
+                    except Exception:
+                        error = traceback.format_exc()
+                        util.error(error)
+                        status = 'fail'
+                    self._update_options = True
+                    
+                    if not status == 'Success':
+                        scripts_that_error.append(script)
                 
+                if not states[inc]:
+                    util.show('\n------------------------------------------------')
+                    util.show('Skipping: %s\n\n' % script)
+                    
+                if progress_bar:
+                    progress_bar.inc()
+                    
+                status_list.append([script, status])
+            
+            minutes, seconds = watch.stop()
+            
             if progress_bar:
-                progress_bar.inc()
+                progress_bar.end()
+            
+            if scripts_that_error:
                 
-            status_list.append([script, status])
-        
-        minutes, seconds = watch.stop()
-        
-        if progress_bar:
-            progress_bar.end()
-        
-        if scripts_that_error:
+                util.show('\n\n\nThe following scripts errored during build:\n')
+                for script in scripts_that_error:
+                    util.show('\n' + script)
+            
+            if minutes == None:
+                util.show('\n\n\nProcess built in %s seconds.\n\n' % seconds)
+            if minutes != None:
+                util.show('\n\n\nProcess built in %s minutes, %s seconds.\n\n' % (minutes,seconds))
+            
+            util.show('\n\n')
+            for status_entry in status_list:
+                util.show('%s : %s' % (status_entry[1], status_entry[0]))
+            util.show('\n\n') 
+                
+            util.set_env('VETALA_CURRENT_PROCESS', prev_process)
             
-            util.show('\n\n\nThe following scripts errored during build:\n')
-            for script in scripts_that_error:
-                util.show('\n' + script)
-        
-        if minutes == None:
-            util.show('\n\n\nProcess built in %s seconds.\n\n' % seconds)
-        if minutes != None:
-            util.show('\n\n\nProcess built in %s minutes, %s seconds.\n\n' % (minutes,seconds))
-        
-        util.show('\n\n')
-        for status_entry in status_list:
-            util.show('%s : %s' % (status_entry[1], status_entry[0]))
-        util.show('\n\n') 
+            if manage_node_editor_inst:
+                manage_node_editor_inst.restore_add_new_nodes()
             
-        util.set_env('VETALA_CURRENT_PROCESS', prev_process)
-        
-        if manage_node_editor_inst:
-            manage_node_editor_inst.restore_add_new_nodes()
+        finally:
+            
+            if self._build_profile:
+                self._build_profile.end()
+                
+                try:
+                    profile_file = self._build_profile.write(self.get_profile_path())
+                    util.show('Build profile: %s' % profile_file)
+                except:
+                    util.warning('Could not write build profile: %s' % traceback.format_exc())
+                
+                self._build_profile = None
         
         return status_list
         
@@ -0,0 +1,657 @@
+# Copyright (C) 2022 Louis Vottero louis.vot@gmail.com    All rights reserved.
+
+"""
+    Build profiling for processes.
+
+    Records wall time, cpu time and memory for each script in a build.
+    Optionally counts Maya commands, runs cProfile on each script, or samples the stack to make flame graphs.
+
+    Set VETALA_PROFILE_BUILD to time, cprofile or sample to profile builds.
+    Set VETALA_PROFILE_COMMANDS to True to count Maya commands. It wraps every maya.cmds command while the build runs.
+    Results are written to .log/build_profile in the process folder.
+"""
+
+from __future__ import absolute_import
+
+import sys
+import json
+import time
+import datetime
+import threading
+
+try:
+    import cProfile
+    import pstats
+except:
+    cProfile = None
+
+try:
+    import resource
+except:
+    resource = None
+
+from .. import util
+from .. import util_file
+from .. import logger
+
+log = logger.get_logger(__name__)
+
+profile_folder_name = '.log/build_profile'
+
+modes = ['off', 'time', 'cprofile', 'sample']
+
+def get_profile_mode():
+    """
+    Get the build profile mode from VETALA_PROFILE_BUILD.
+
+    Returns:
+        str: off, time, cprofile or sample
+    """
+
+    mode = util.get_env('VETALA_PROFILE_BUILD')
+
+    if not mode:
+        return 'off'
+
+    mode = mode.lower()
+
+    if mode in ['true', '1']:
+        return 'time'
+
+    if mode in modes:
+        return mode
+
+    return 'off'
+
+def set_profile_mode(mode):
+
+    if not mode in modes:
+        util.warning('Build profile mode must be one of: %s' % ', '.join(modes))
+        return
+
+    util.set_env('VETALA_PROFILE_BUILD', mode)
+
+def get_count_commands():
+    """
+    Wether build profiles count Maya commands, from VETALA_PROFILE_COMMANDS.
+    """
+
+    if util.get_env('VETALA_PROFILE_COMMANDS') == 'True':
+        return True
+
+    return False
+
+def set_count_commands(bool_value):
+
+    util.set_env('VETALA_PROFILE_COMMANDS', str(bool(bool_value)))
+
+def get_cpu_time():
+
+    if hasattr(time, 'process_time'):
+        return time.process_time()
+
+    return time.clock()
+
+def get_peak_memory():
+    """
+    Get the peak memory of this process in MB, the most it used since it started.
+
+    Returns:
+        float: None if it could not be found.
+    """
+
+    if resource:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        #linux gives kilobytes, mac gives bytes
+        if sys.platform == 'darwin':
+            return round(peak / 1048576.0, 2)
+
+        return round(peak / 1024.0, 2)
+
+    if sys.platform == 'win32':
+
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class ProcessMemoryCounters(ctypes.Structure):
+                _fields_ = [('cb', wintypes.DWORD),
+                            ('PageFaultCount', wintypes.DWORD),
+                            ('PeakWorkingSetSize', ctypes.c_size_t),
+                            ('WorkingSetSize', ctypes.c_size_t),
+                            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                            ('PagefileUsage', ctypes.c_size_t),
+                            ('PeakPagefileUsage', ctypes.c_size_t)]
+
+            counters = ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb)
+
+            return round(counters.PeakWorkingSetSize / 1048576.0, 2)
+        except:
+            return
+
+class MayaCommandCounter(object):
+    """
+    Count calls to maya.cmds by wrapping the commands while the counter runs.
+    Only catches commands called through the module, like cmds.createNode.
+    """
+
+    def __init__(self):
+
+        self.counts = {}
+        self._originals = {}
+        self._cmds = None
+
+    def _wrap(self, name, function):
+
+        counts = self.counts
+
+        def wrapper(*args, **kwargs):
+            counts[name] = counts.get(name, 0) + 1
+            return function(*args, **kwargs)
+
+        wrapper.__name__ = name
+        wrapper.__doc__ = function.__doc__
+
+        return wrapper
+
+    def start(self):
+
+        if not util.is_in_maya():
+            return
+
+        if self._originals:
+            return
+
+        import maya.cmds as cmds
+        self._cmds = cmds
+
+        try:
+            for name in dir(cmds):
+
+                if name.startswith('_'):
+                    continue
+
+                function = getattr(cmds, name)
+
+                if not callable(function) or isinstance(function, type):
+                    continue
+
+                self._originals[name] = function
+                setattr(cmds, name, self._wrap(name, function))
+        except:
+            self.stop()
+            raise
+
+    def stop(self):
+
+        if not self._cmds:
+            return
+
+        for name in self._originals:
+            setattr(self._cmds, name, self._originals[name])
+
+        self._originals = {}
+        self._cmds = None
+
+    def get_counts(self):
+        return dict(self.counts)
+
+class StackSampler(threading.Thread):
+    """
+    Sample the stack of a thread at an interval.
+    Each sample is stored under the current label, so stacks can be grouped per script.
+    """
+
+    def __init__(self, thread_id = None, interval = 0.005):
+        super(StackSampler, self).__init__()
+
+        self.daemon = True
+
+        if thread_id == None:
+            thread_id = threading.current_thread().ident
+
+        self.thread_id = thread_id
+        self.interval = interval
+        self.label = None
+
+        #stack tuple : seconds
+        self.samples = {}
+
+        self._stop_event = threading.Event()
+
+    def run(self):
+        """
+        The label is a tuple of the script and the scripts it runs under. It goes at the root of each stack.
+        """
+
+        last_time = time.time()
+
+        while not self._stop_event.is_set():
+
+            time.sleep(self.interval)
+
+            current_time = time.time()
+            weight = current_time - last_time
+            last_time = current_time
+
+            label = self.label
+
+            if not label:
+                continue
+
+            frame = sys._current_frames().get(self.thread_id)
+
+            stack = []
+
+            while frame:
+                code = frame.f_code
+                stack.append('%s (%s:%s)' % (code.co_name, util_file.get_basename(code.co_filename), code.co_firstlineno))
+                frame = frame.f_back
+
+            stack.reverse()
+
+            stack = tuple(label) + tuple(stack)
+
+            self.samples[stack] = self.samples.get(stack, 0) + weight
+
+    def stop(self):
+
+        self._stop_event.set()
+        self.join()
+
+class ScriptProfile(object):
+
+    def __init__(self, name, parents = None):
+
+        self.name = name
+        self.parents = list(parents or [])
+        self.parent = None
+        self.children_wall = 0.0
+
+        if self.parents:
+            self.parent = self.parents[-1]
+
+        self.status = None
+
+        self.wall = 0.0
+        self.cpu = 0.0
+
+        self.peak_memory = None
+        self.peak_memory_growth = None
+
+        self.maya_commands = {}
+        self.functions = []
+
+        self._profiler = None
+
+    def get_path(self):
+        """
+        The names of the scripts this script ran under, then its own name.
+        """
+
+        return self.parents + [self.name]
+
+    def get_dict(self):
+
+        command_count = 0
+        for value in self.maya_commands.values():
+            command_count += value
+
+        #peak memory is the most the process used since it started, the growth is what this script added to it
+        return {'name' : self.name,
+                'parent' : self.parent,
+                'parents' : self.parents,
+                'status' : self.status,
+                'wall' : round(self.wall, 4),
+                'self_wall' : round(self.wall - self.children_wall, 4),
+                'cpu' : round(self.cpu, 4),
+                'process_peak_memory_mb' : self.peak_memory,
+                'peak_memory_growth_mb' : self.peak_memory_growth,
+                'maya_command_count' : command_count,
+                'maya_commands' : self.maya_commands,
+                'functions' : self.functions}
+
+class BuildProfile(object):
+    """
+    Profile a build. Call start, then start_script and end_script around each script, then end and write.
+
+    Args:
+        name (str): The name of the process.
+        mode (str): time, cprofile or sample
+        count_commands (bool): Count Maya commands. Every maya.cmds command is wrapped until end is called.
+    """
+
+    function_count = 30
+
+    def __init__(self, name = None, mode = 'time', count_commands = False):
+
+        self.name = name
+        self.mode = mode
+        self.count_commands = count_commands
+
+        self.scripts = []
+        self.wall = 0.0
+        self.date = None
+
+        self._stack = []
+        self._start_values = []
+        self._start_time = None
+
+        self._counter = MayaCommandCounter()
+        self._sampler = None
+
+    def start(self):
+
+        self.date = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self._start_time = time.time()
+
+        if self.count_commands:
+            self._counter.start()
+
+        if self.mode == 'sample':
+            self._sampler = StackSampler()
+            self._sampler.start()
+
+    def end(self):
+
+        #maya.cmds goes back to the original commands even if ending a script fails
+        try:
+            while self._stack:
+                self.end_script('unfinished')
+        finally:
+            self._counter.stop()
+
+            if self._sampler:
+                self._sampler.stop()
+
+        if self._start_time:
+            self.wall = time.time() - self._start_time
+
+    def start_script(self, script):
+
+        parents = []
+        if self._stack:
+            parents = self._stack[-1].get_path()
+
+        script_profile = ScriptProfile(script, parents)
+
+        #only the outer most script gets cProfile, profilers do not nest
+        if self.mode == 'cprofile' and cProfile and not self._stack:
+            script_profile._profiler = cProfile.Profile()
+
+        self._stack.append(script_profile)
+        self._start_values.append([time.time(), get_cpu_time(), get_peak_memory(), self._counter.get_counts()])
+
+        if self._sampler:
+            self._sampler.label = tuple(script_profile.get_path())
+
+        if script_profile._profiler:
+            script_profile._profiler.enable()
+
+    def end_script(self, status = None):
+
+        if not self._stack:
+            return
+
+        script_profile = self._stack.pop()
+        start_time, start_cpu, start_memory, start_counts = self._start_values.pop()
+
+        if script_profile._profiler:
+            script_profile._profiler.disable()
+            script_profile.functions = self._get_functions(script_profile._profiler)
+            script_profile._profiler = None
+
+        script_profile.status = status
+        script_profile.wall = time.time() - start_time
+        script_profile.cpu = get_cpu_time() - start_cpu
+
+        peak_memory = get_peak_memory()
+        script_profile.peak_memory = peak_memory
+        if peak_memory != None and start_memory != None:
+            script_profile.peak_memory_growth = round(peak_memory - start_memory, 2)
+
+        counts = self._counter.get_counts()
+        for command in counts:
+            count = counts[command] - start_counts.get(command, 0)
+            if count:
+                script_profile.maya_commands[command] = count
+
+        if self._stack:
+            self._stack[-1].children_wall += script_profile.wall
+
+        if self._sampler:
+            if self._stack:
+                self._sampler.label = tuple(self._stack[-1].get_path())
+            else:
+                self._sampler.label = None
+
+        self.scripts.append(script_profile)
+
+    def _get_functions(self, profiler):
+
+        stats = pstats.Stats(profiler)
+
+        functions = []
+
+        for key in stats.stats:
+
+            filename, line, function_name = key
+            call_count, total_calls, total_time, cumulative_time, callers = stats.stats[key]
+
+            functions.append({'function' : '%s (%s:%s)' % (function_name, util_file.get_basename(filename), line),
+                              'calls' : total_calls,
+                              'time' : round(total_time, 5),
+                              'cumulative' : round(cumulative_time, 5)})
+
+        functions.sort(key = lambda value: value['cumulative'], reverse = True)
+
+        return functions[:self.function_count]
+
+    def get_dict(self):
+
+        return {'name' : self.name,
+                'date' : self.date,
+                'mode' : self.mode,
+                'wall' : round(self.wall, 4),
+                'python' : sys.version.split()[0],
+                'scripts' : [script.get_dict() for script in self.scripts]}
+
+    def get_collapsed_stacks(self):
+        """
+        Get stacks in the collapsed format used by flamegraph.pl and speedscope. Values are in milliseconds.
+
+        Returns:
+            list: Lines of text.
+        """
+
+        stacks = {}
+
+        if self._sampler:
+            for stack in self._sampler.samples:
+                stacks[(self.name,) + stack] = self._sampler.samples[stack]
+        else:
+            for script in self.scripts:
+                stack = tuple([self.name] + script.get_path())
+                stacks[stack] = stacks.get(stack, 0) + (script.wall - script.children_wall)
+
+        lines = []
+
+        for stack in stacks:
+
+            milliseconds = int(round(stacks[stack] * 1000))
+
+            if not milliseconds:
+                continue
+
+            names = [name.replace(';', ':') for name in stack]
+
+            lines.append('%s %s' % (';'.join(names), milliseconds))
+
+        lines.sort()
+
+        return lines
+
+    def get_speedscope(self):
+        """
+        Get the stacks as a speedscope sampled profile.
+
+        Returns:
+            dict:
+        """
+
+        frames = []
+        frame_index = {}
+
+        samples = []
+        weights = []
+
+        for line in self.get_collapsed_stacks():
+
+            stack, milliseconds = line.rsplit(' ', 1)
+
+            sample = []
+
+            for name in stack.split(';'):
+                if not name in frame_index:
+                    frame_index[name] = len(frames)
+                    frames.append({'name' : name})
+
+                sample.append(frame_index[name])
+
+            samples.append(sample)
+            weights.append(float(milliseconds))
+
+        total = sum(weights)
+
+        return {'$schema' : 'https://www.speedscope.app/file-format-schema.json',
+                'name' : '%s %s' % (self.name, self.date),
+                'exporter' : 'vetala',
+                'shared' : {'frames' : frames},
+                'profiles' : [{'type' : 'sampled',
+                               'name' : self.name,
+                               'unit' : 'milliseconds',
+                               'startValue' : 0,
+                               'endValue' : total,
+                               'samples' : samples,
+                               'weights' : weights}]}
+
+    def write(self, directory):
+        """
+        Write the profile json, a speedscope file and a collapsed stack file.
+
+        Args:
+            directory (str): The folder to write to.
+
+        Returns:
+            str: The path to the profile json.
+        """
+
+        util_file.create_dir(directory)
+
+        name = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+
+        filepath = util_file.join_path(directory, name + '.json')
+
+        inc = 2
+        base_name = name
+        while util_file.exists(filepath):
+            name = '%s_%s' % (base_name, inc)
+            filepath = util_file.join_path(directory, name + '.json')
+            inc += 1
+
+        util_file.write_file(filepath, json.dumps(self.get_dict(), indent = 1))
+
+        util_file.write_file(util_file.join_path(directory, name + '.speedscope.json'), json.dumps(self.get_speedscope()))
+
+        util_file.write_lines(util_file.join_path(directory, name + '.collapsed.txt'), self.get_collapsed_stacks())
+
+        return filepath
+
+def get_profiles(directory):
+    """
+    Get the profile json files in a directory, newest first.
+    """
+
+    if not util_file.is_dir(directory):
+        return []
+
+    found = []
+
+    for filename in util_file.get_files(directory):
+        if filename.endswith('.json') and not filename.endswith('.speedscope.json'):
+            found.append(filename)
+
+    found.sort(reverse = True)
+
+    return found
+
+def read_profile(filepath):
+
+    with open(filepath, 'r') as open_file:
+        return json.load(open_file)
+
+def diff_profiles(profile_a, profile_b):
+    """
+    Compare two profiles by script.
+
+    Args:
+        profile_a (dict): The older run, from read_profile.
+        profile_b (dict): The newer run.
+
+    Returns:
+        list: [script, wall a, wall b, change, change percent, maya command change] per script, biggest change first.
+    """
+
+    def get_scripts(profile):
+        scripts = {}
+        for script in profile['scripts']:
+            if script['name'] in scripts:
+                scripts[script['name']]['wall'] += script['wall']
+                scripts[script['name']]['maya_command_count'] += script['maya_command_count']
+            else:
+                scripts[script['name']] = dict(script)
+        return scripts
+
+    scripts_a = get_scripts(profile_a)
+    scripts_b = get_scripts(profile_b)
+
+    names = list(scripts_a.keys())
+    for name in scripts_b:
+        if not name in scripts_a:
+            names.append(name)
+
+    rows = []
+
+    for name in names:
+
+        wall_a = None
+        wall_b = None
+        commands_a = 0
+        commands_b = 0
+
+        if name in scripts_a:
+            wall_a = scripts_a[name]['wall']
+            commands_a = scripts_a[name]['maya_command_count']
+        if name in scripts_b:
+            wall_b = scripts_b[name]['wall']
+            commands_b = scripts_b[name]['maya_command_count']
+
+        change = (wall_b or 0.0) - (wall_a or 0.0)
+
+        percent = None
+        if wall_a:
+            percent = round(change / wall_a * 100, 1)
+
+        rows.append([name, wall_a, wall_b, round(change, 4), percent, commands_b - commands_a])
+
+    rows.sort(key = lambda row: abs(row[3]), reverse = True)
+
+    return rows
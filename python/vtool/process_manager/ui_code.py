@@ -3,11 +3,10 @@
 from __future__ import absolute_import
 
 import subprocess
-import re
-import threading
 
 from .. import qt_ui, qt
 from .. import util_file
+from .. import util_code
 from .. import util
 
 from . import ui_data
@@ -359,6 +358,11 @@ class CodeWidget(qt_ui.BasicWidget):
         
         self.completer.name = name
         
+        if self._process_inst:
+            #index the puts of the manifest before the script asks for them
+            scripts = self._process_inst.get_manifest_scripts(basename = False, fast_with_less_checks = True)
+            util_code.get_symbol_index().refresh(scripts)
+        
         name = name + '.py'
         
         if not open_in_window:
@@ -434,6 +438,9 @@ class CodeCompleter(qt_ui.PythonCompleter):
     
     def __init__(self):
         super(CodeCompleter, self).__init__()
+        
+        #Process members are the most common completion, index them before they are needed
+        util_code.get_symbol_index().refresh([get_process_file()])
     
     def keyPressEvent(self):
         return
@@ -491,36 +498,31 @@ class CodeCompleter(qt_ui.PythonCompleter):
         
         if module_name == 'put':
             
-            if hasattr(self, 'name') and hasattr(self, 'process_inst'):
+            found = {}
+            
+            if hasattr(self, 'name') and getattr(self, 'process_inst', None):
                 
                 check_name = self.name + '/' + util_file.get_basename(self.name)
                 
                 scripts = self.process_inst.get_manifest_scripts(basename = False, fast_with_less_checks = True)
                 
-                found = {}
-                inc = 0
+                previous_scripts = []
                 
-                threads = []
                 for script in scripts:
                     
                     if script[:-3].endswith(check_name):
                         break
                     
-                    thread = threading.Thread(target = get_puts_in_file, args = (script,found))
-                    threads.append(thread)
-                    thread.start()
-                    
-                    
-                    inc += 1
+                    previous_scripts.append(script)
                 
-                for thread in threads:
-                    thread.join()
-                
-                put_value = get_put(text)
-                
-                if put_value:
-                    for value in put_value:
-                        found[value] = None
+                #scripts that changed since they were indexed update in the background
+                found.update(util_code.get_symbol_index().get_puts(previous_scripts))
+            
+            put_value = get_put(text)
+            
+            if put_value:
+                for value in put_value:
+                    found[value] = None
             
             keys = list(found.keys())
             keys.sort()
@@ -532,12 +534,7 @@ class CodeCompleter(qt_ui.PythonCompleter):
                 if module_name in assign_map:
                     return []
                 
-            process_file = process.__file__
-            
-            if process_file.endswith('.pyc'):
-                process_file = process_file[:-4] + '.py'
-            
-            functions, _ = util_file.get_ast_class_sub_functions(process_file, 'Process')
+            functions, _ = util_code.get_symbol_index().get_class_members(get_process_file(), 'Process')
             
             return functions
         
@@ -565,29 +562,24 @@ class CodeCompleter(qt_ui.PythonCompleter):
                 functions = dir(pymel)
                 return functions
 
+def get_process_file():
+    
+    process_file = process.__file__
+    
+    if process_file.endswith('.pyc'):
+        process_file = process_file[:-4] + '.py'
+    
+    return process_file
+
 def get_put(text):
     
     puts = []
     
-    find = re.findall('\s*(put.)([a-zA-Z0-9_]*)(?=.*[=])', text)
-                
-    if find:
-        for f in find:
-            puts.append(f[1])
+    for name, line_number in util_code.get_put_assignments(text):
+        puts.append(name)
     
     return puts
 
-def get_puts_in_file(filepath, accum_dict = {}):
-    
-    check_text = util_file.get_file_text(filepath)
-    
-    put_value = get_put(check_text)
-    if put_value:
-        for value in put_value:
-            accum_dict[value] = None
-                    
-    return accum_dict
-        
 class ScriptWidget(qt_ui.DirectoryWidget):
     
     script_open = qt_ui.create_signal(object, object, object)
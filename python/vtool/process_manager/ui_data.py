@@ -3,6 +3,7 @@
 from __future__ import absolute_import
 
 import traceback
+import datetime
 
 from .. import qt_ui
 from .. import util_file
@@ -522,8 +523,9 @@ class DataTreeWidget(qt_ui.FileTreeWidget):
         self.setColumnWidth(0, 140)
         self.setColumnWidth(1, 110)
         self.setColumnWidth(2, 100)
-        #removed because data update slow
-        #self.setColumnWidth(3, 50)
+        self.setColumnWidth(3, 70)
+        
+        self._size_updater = DataSizeUpdater(self)
         
         self.setContextMenuPolicy(qt.QtCore.Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self._item_menu)
@@ -775,9 +777,7 @@ class DataTreeWidget(qt_ui.FileTreeWidget):
         process_tool.delete_data(name)
     
     def _define_header(self):
-        #data size update removed because very slow
-        #return ['Name','Folder', 'Type','Size']
-        return ['Name','Type', 'Sub Folder']
+        return ['Name','Type', 'Sub Folder', 'Size']
     
     def _item_renamed(self, item, old_name):
         
@@ -830,6 +830,7 @@ class DataTreeWidget(qt_ui.FileTreeWidget):
         folder = None
         
         if not folder_item:
+            self._size_updater.clear()
             self.clear()
             folders = process_tool.get_data_folders()
         else:
@@ -890,12 +891,15 @@ class DataTreeWidget(qt_ui.FileTreeWidget):
             item.setText(2, sub_folder)
             
             item.folder = foldername
+            item.size_path = util_file.join_path(data_path, foldername)
             
             if not folder:
                 self.addTopLevelItem(item)
             if folder:
                 folder_item.addChild(item)
             
+            self._size_updater.add_item(item, item.size_path)
+            
             if foldername == new_data:
                 select_item = item
         
@@ -906,16 +910,19 @@ class DataTreeWidget(qt_ui.FileTreeWidget):
             self._expand_active = True
         
     def update_file_size(self, item):
-        return 
-        #process_tool = process.Process()
-        #process_tool.set_directory(self.directory)
+        """
+        Get the size of the item data again, for example after the data was saved.
+        """
+        
+        path = getattr(item, 'size_path', None)
         
-        #data_dir = process_tool.get_data_path()
+        if not path:
+            return
         
-        #size_thread = DataSizeThread()
+        #files saved over in place do not change the folder mtime
+        util_file.get_folder_size_index().clear_directory(path)
         
-        #folder = str(item.text(0))
-        #size_thread.run(data_dir, folder, item)
+        self._size_updater.add_item(item, path)
         
     def update_item(self, item):
         
@@ -928,16 +935,13 @@ class DataTreeWidget(qt_ui.FileTreeWidget):
         process_tool.set_directory(self.directory)
         process_tool.set_data_parent_folder(parent_folder)
         
-        #data_dir = process_tool.get_data_path()
-        
-        #size_thread = DataSizeThread()
-        
         folder = str(item.text(0))
-        #size_thread.run(data_dir, folder, item)
         
         sub = process_tool.get_data_current_sub_folder(folder)
         item.setText(2, sub)
         
+        self.update_file_size(item)
+        
     def get_item_path_string(self, item):
         
         parents = self.get_tree_item_path(item)
@@ -972,19 +976,101 @@ class DataTreeWidget(qt_ui.FileTreeWidget):
     def refresh(self):
         self._load_data()
 
-class DataSizeThread(qt.QtCore.QThread):
+def get_size_text(size):
+    
+    return '%.2f MB' % (size * 0.000001)
+
+class DataSizeUpdater(qt.QtCore.QObject):
+    """
+    Gets the size of data folders on a worker pool and shows them in the data tree as they finish.
+    Sizes come from util_file.FolderSizeIndex, so only folders that changed since the last time are listed.
+    The workers never touch the tree, a timer on the ui thread picks up the finished jobs.
+    """
+    
+    size_column = 3
+    
+    #shown in the tool tip instead of the size column
+    skip_names = ['.version', '.sub']
+    
     def __init__(self, parent = None):
-        super(DataSizeThread, self).__init__(parent)
+        super(DataSizeUpdater, self).__init__(parent)
+        
+        self._pool = None
+        self._pending = []
+        
+        self._timer = qt.QtCore.QTimer(self)
+        self._timer.setInterval(100)
+        self._timer.timeout.connect(self._update_items)
+    
+    def _set_item(self, item, info):
+        
+        if not info:
+            return
+        
+        tool_tip = 'Files: %s\nVersions and sub folders: %s' % (info['count'], get_size_text(info['skipped']))
+        
+        if info['latest']:
+            date_time_value = datetime.datetime.fromtimestamp(info['latest'])
+            tool_tip += '\nModified: %s' % util_file.format_date_time(date_time_value)
+        
+        try:
+            item.setText(self.size_column, get_size_text(info['size']))
+            item.setToolTip(self.size_column, tool_tip)
+        except:
+            #the item was removed from the tree
+            pass
+    
+    def _update_items(self):
+        
+        pending = []
         
-    def run(self, data_path, data_name, item):
+        for job, item in self._pending:
+            
+            if not job.done():
+                pending.append([job, item])
+                continue
+            
+            try:
+                info = job.result()
+            except:
+                log.debug('Could not get data size: %s' % traceback.format_exc())
+                continue
+            
+            self._set_item(item, info)
+        
+        self._pending = pending
+        
+        if not pending:
+            self._timer.stop()
+            self._pool.cancel()
+            self._pool.submit(util_file.get_folder_size_index().save)
+    
+    def add_item(self, item, path):
+        """
+        Get the size of path in the background and show it on item.
+        """
+        
+        if not self._pool:
+            self._pool = util.WorkerPool()
+        
+        index = util_file.get_folder_size_index()
+        
+        job = self._pool.submit(index.get_info, path, self.skip_names)
+        self._pending.append([job, item])
+        
+        if not self._timer.isActive():
+            self._timer.start()
+    
+    def clear(self):
         """
+        Drop the sizes that have not finished, for when the tree is cleared.
         """
-        pass
-        #was too slow
-        #data_folder = util_file.join_path(data_path, data_name)
-        #size = util_file.get_folder_size(data_folder, skip_names=['.version','.sub'])
         
-        #item.setText(3, str(size) )
+        if self._pool:
+            self._pool.cancel()
+        
+        self._pending = []
+        self._timer.stop()
         
 class DataTreeItem(qt_ui.TreeWidgetItem):
     pass
@@ -2129,11 +2215,13 @@ class SaveSkinFileWidget(DataSaveFileWidget):
         single_file = qt.QCheckBox('Single File')
         blend_weights = qt.QCheckBox('Dual Quaternion Blend Weights')
         long_names = qt.QCheckBox('Force Long Mesh Names')
+        binary = qt.QCheckBox('Binary File')
         
         sub_layout1.addStretch(1)
         
         sub_layout1.addWidget(blend_weights)
         sub_layout1.addWidget(version_up)
+        sub_layout1.addWidget(binary)
         sub_layout1.addWidget(single_file)
         sub_layout1.addWidget(long_names)
         sub_layout1.addStretch(1)
@@ -2155,6 +2243,7 @@ class SaveSkinFileWidget(DataSaveFileWidget):
         self.single_file = single_file
         self.blend_weights = blend_weights
         self.long_names = long_names
+        self.binary = binary
         
         self.version_up.setChecked(True)
         self.blend_weights.setChecked(True)
@@ -2164,6 +2253,7 @@ class SaveSkinFileWidget(DataSaveFileWidget):
         version_up.stateChanged.connect(self._set_version_up)
         single_file.stateChanged.connect(self._set_single_file)
         long_names.stateChanged.connect(self._set_long_names)
+        binary.stateChanged.connect(self._set_binary)
         
     def _export_data(self):
         
@@ -2171,6 +2261,7 @@ class SaveSkinFileWidget(DataSaveFileWidget):
         single_file = False
         blend_weights = False
         long_names = False
+        binary = False
         
         if self.data_class.settings.has_setting('version up'):
             version_up = self.data_class.settings.get('version up')
@@ -2184,6 +2275,9 @@ class SaveSkinFileWidget(DataSaveFileWidget):
         if self.data_class.settings.has_setting('long names'):
             long_names = self.data_class.settings.get('long names')
         
+        if self.data_class.settings.has_setting('binary file'):
+            binary = self.data_class.settings.get('binary file')
+        
         comment = None
         
         if version_up:
@@ -2191,7 +2285,7 @@ class SaveSkinFileWidget(DataSaveFileWidget):
             if comment == None:
                 return
         
-        self.data_class.export_data(comment, single_file = single_file, version_up = version_up, blend_weights = blend_weights, long_names = long_names)
+        self.data_class.export_data(comment, single_file = single_file, version_up = version_up, blend_weights = blend_weights, long_names = long_names, binary = binary)
         self.file_changed.emit()
         
     def _export_selected_data(self, second_only = False):
@@ -2199,6 +2293,7 @@ class SaveSkinFileWidget(DataSaveFileWidget):
         single_file = False
         blend_weights = False
         long_names = False
+        binary = False
         
         if self.data_class.settings.has_setting('version up'):
             version_up = self.data_class.settings.get('version up')
@@ -2212,6 +2307,9 @@ class SaveSkinFileWidget(DataSaveFileWidget):
         if self.data_class.settings.has_setting('long names'):
             long_names = self.data_class.settings.get('long names')
         
+        if self.data_class.settings.has_setting('binary file'):
+            binary = self.data_class.settings.get('binary file')
+        
         comment = None
         
         if version_up:
@@ -2226,7 +2324,7 @@ class SaveSkinFileWidget(DataSaveFileWidget):
         if not selection:
             selection = None
         
-        self.data_class.export_data(comment, selection = selection, single_file = single_file, version_up = version_up, blend_weights = blend_weights, long_names = long_names, second_only = second_only)
+        self.data_class.export_data(comment, selection = selection, single_file = single_file, version_up = version_up, blend_weights = blend_weights, long_names = long_names, second_only = second_only, binary = binary)
         self.file_changed.emit()
 
     def _export_second_skin_cluster(self):
@@ -2280,6 +2378,10 @@ class SaveSkinFileWidget(DataSaveFileWidget):
         long_names_state = self.data_class.settings.get('long names')
         if long_names_state:
             self.long_names.setChecked(True)
+        
+        binary_state = self.data_class.settings.get('binary file')
+        if binary_state:
+            self.binary.setChecked(True)
 
     def _set_blend_weights(self):
         state = self.blend_weights.checkState()
@@ -2314,6 +2416,17 @@ class SaveSkinFileWidget(DataSaveFileWidget):
             self.data_class.set_long_names(True)
         else:
             self.data_class.set_long_names(False)
+    
+    def _set_binary(self):
+        state = self.binary.checkState()
+        
+        if state == qt.QtCore.Qt.Checked:
+            self.data_class.set_binary(True)
+        else:
+            self.data_class.set_binary(False)
+        
+        #binary weights are always one file per mesh
+        self.single_file.setDisabled(state == qt.QtCore.Qt.Checked)
 
 class SkinWeightOptionFileWidget(qt_ui.OptionFileWidget):
     
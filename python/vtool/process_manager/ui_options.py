@@ -570,25 +570,27 @@ class ProcessOptionPalette(qt_ui.BasicWidget):
             
             item_count = this_widget.child_layout.count()
             
-            for inc in range(0, item_count):
-                
-                item = self.child_layout.itemAt(inc)
-                widget = item.widget()
-                
-                widget_type = widget.option_type
-                
-                name = self._get_path(widget)
+            with self.process_inst.batch_options():
                 
-                value = widget.get_value()
-                
-                self.process_inst.add_option(name, value, None, widget_type)
-            
-            if type(self) == ProcessReferenceGroup:
-                
-                name = self._get_path(self)
-                value = self.get_value()
+                for inc in range(0, item_count):
+                    
+                    item = self.child_layout.itemAt(inc)
+                    widget = item.widget()
+                    
+                    widget_type = widget.option_type
+                    
+                    name = self._get_path(widget)
+                    
+                    value = widget.get_value()
+                    
+                    self.process_inst.add_option(name, value, None, widget_type)
                 
-                self.process_inst.add_option(name, value, True, self.option_type)
+                if type(self) == ProcessReferenceGroup:
+                    
+                    name = self._get_path(self)
+                    value = self.get_value()
+                    
+                    self.process_inst.add_option(name, value, True, self.option_type)
         
         self.value_change.emit()
         
@@ -596,10 +598,11 @@ class ProcessOptionPalette(qt_ui.BasicWidget):
             
     def _write_all(self):
         
-        self.process_inst.clear_options()
-        palette = self._find_palette(self)
-        
-        self._write_widget_options(palette)
+        with self.process_inst.batch_options():
+            self.process_inst.clear_options()
+            palette = self._find_palette(self)
+            
+            self._write_widget_options(palette)
                     
     def _load_widgets(self, options):
         log.info('Load Option Widgets!!')
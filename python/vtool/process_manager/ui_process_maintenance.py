@@ -3,9 +3,12 @@
 from __future__ import absolute_import
 
 from .. import qt, qt_ui
+from .. import util
+from .. import util_file
 from .. import logger
 
 from . import process
+from . import process_profile
 from . import ui_view
 
 
@@ -28,6 +31,7 @@ class ProcessMaintenance(qt_ui.BasicWidget):
         self.directory = directory
         self.backup_group.set_directory(self.directory)
         self.version_group.set_directory(self.directory)
+        self.profile_group.set_directory(self.directory)
     
     def set_active(self, bool_value):
         
@@ -41,8 +45,12 @@ class ProcessMaintenance(qt_ui.BasicWidget):
         self.version_group = VersionsGroup()
         self.version_group.collapse_group()
         
+        self.profile_group = ProfileGroup()
+        self.profile_group.collapse_group()
+        
         self.main_layout.addWidget(self.backup_group)
         self.main_layout.addWidget(self.version_group)
+        self.main_layout.addWidget(self.profile_group)
         
         self.main_layout.setAlignment(qt.QtCore.Qt.AlignTop)
         
@@ -113,6 +121,140 @@ class VersionsGroup(qt_ui.Group):
         
         self.prune_versions_widget.set_directory(directory)
         
+class ProfileGroup(qt_ui.Group):
+    
+    def __init__(self, name = 'Build Profiles'):
+        super(ProfileGroup, self).__init__(name)
+        self.directory = None
+        
+    def _build_widgets(self):
+        
+        help_label = qt.QLabel('Profile the next builds, then select two runs to compare time per script.\n Speedscope and collapsed stack files are saved next to each run.')
+        
+        mode_layout = qt.QHBoxLayout()
+        
+        self.mode_combo = qt.QComboBox()
+        self.mode_combo.addItems(['Off', 'Time', 'cProfile', 'Sample'])
+        self.mode_combo.setCurrentIndex(process_profile.modes.index(process_profile.get_profile_mode()))
+        self.mode_combo.currentIndexChanged.connect(self._set_mode)
+        
+        self.commands_check = qt.QCheckBox('Count Maya Commands')
+        self.commands_check.setChecked(process_profile.get_count_commands())
+        self.commands_check.stateChanged.connect(self._set_count_commands)
+        
+        mode_layout.addWidget(qt.QLabel('Profile Builds:'))
+        mode_layout.addWidget(self.mode_combo)
+        mode_layout.addWidget(self.commands_check)
+        mode_layout.addStretch()
+        
+        self.profile_list = qt.QListWidget()
+        self.profile_list.setSelectionMode(self.profile_list.ExtendedSelection)
+        self.profile_list.setMaximumHeight(util.scale_dpi(120))
+        
+        button_layout = qt.QHBoxLayout()
+        
+        diff_button = qt.QPushButton('Diff Selected')
+        diff_button.clicked.connect(self._diff)
+        
+        refresh_button = qt.QPushButton('Refresh')
+        refresh_button.clicked.connect(self.load)
+        
+        browse_button = qt.QPushButton('Browse')
+        browse_button.clicked.connect(self._browse)
+        
+        button_layout.addWidget(diff_button)
+        button_layout.addWidget(refresh_button)
+        button_layout.addWidget(browse_button)
+        
+        self.diff_tree = qt.QTreeWidget()
+        self.diff_tree.setHeaderLabels(['Script', 'Run A (s)', 'Run B (s)', 'Change (s)', 'Change %', 'Maya Commands'])
+        
+        self.main_layout.addWidget(help_label)
+        self.main_layout.addLayout(mode_layout)
+        self.main_layout.addWidget(self.profile_list)
+        self.main_layout.addLayout(button_layout)
+        self.main_layout.addWidget(self.diff_tree)
+    
+    def _get_profile_path(self):
+        
+        if not self.directory:
+            return
+        
+        process_inst = process.Process()
+        process_inst.set_directory(self.directory)
+        
+        return process_inst.get_profile_path()
+    
+    def _set_mode(self, index):
+        process_profile.set_profile_mode(process_profile.modes[index])
+    
+    def _set_count_commands(self, state):
+        process_profile.set_count_commands(self.commands_check.isChecked())
+    
+    def _browse(self):
+        
+        path = self._get_profile_path()
+        
+        if path and util_file.is_dir(path):
+            util_file.open_browser(path)
+    
+    def _diff(self):
+        
+        items = self.profile_list.selectedItems()
+        
+        if len(items) != 2:
+            qt_ui.warning('Select two runs to diff.', self)
+            return
+        
+        path = self._get_profile_path()
+        
+        names = sorted([items[0].text(), items[1].text()])
+        
+        profile_a = process_profile.read_profile(util_file.join_path(path, names[0] + '.json'))
+        profile_b = process_profile.read_profile(util_file.join_path(path, names[1] + '.json'))
+        
+        self.diff_tree.clear()
+        self.diff_tree.setHeaderLabels(['Script', names[0], names[1], 'Change (s)', 'Change %', 'Maya Commands'])
+        
+        for row in process_profile.diff_profiles(profile_a, profile_b):
+            
+            texts = []
+            for value in row:
+                if value == None:
+                    value = '-'
+                texts.append(str(value))
+            
+            #rows come biggest change first
+            item = qt.QTreeWidgetItem(texts)
+            self.diff_tree.addTopLevelItem(item)
+    
+    def expand_group(self):
+        super(ProfileGroup, self).expand_group()
+        
+        self.load()
+    
+    def load(self):
+        
+        self.profile_list.clear()
+        
+        path = self._get_profile_path()
+        
+        if not path:
+            return
+        
+        for filename in process_profile.get_profiles(path):
+            self.profile_list.addItem(filename[:-5])
+    
+    def set_directory(self, directory):
+        
+        if not directory:
+            return
+        
+        self.directory = directory
+        
+        if self.isVisible():
+            self.load()
+
 class PruneVersionsWidget(qt_ui.BasicWidget):
     
     def __init__(self):
@@ -9,7 +9,6 @@ from .. import qt_ui, qt, maya_lib
 from .. import logger
 from .. import util_file
 from .. import util
-from ..ramen.ui_lib import ui_nodes 
 
 from . import process
 from . import ui_view
@@ -269,8 +268,6 @@ class ProcessManagerWindow(qt_ui.BasicWindow):
         
         self.code_widget = ui_code.CodeProcessWidget()
         
-        self.ramen_widget = ui_nodes.NodeWindow()
-        
         self.process_tabs.addTab(self.option_widget, 'Options')
         self.process_tabs.addTab(self.data_widget, 'Data')
         self.process_tabs.addTab(self.code_widget, 'Code')
@@ -471,6 +468,12 @@ class ProcessManagerWindow(qt_ui.BasicWindow):
         log.info('Resize')
         super(ProcessManagerWindow, self).resizeEvent(event)
         
+    def closeEvent(self, event):
+        
+        self.view_widget.tree_widget.stop_scans()
+        
+        super(ProcessManagerWindow, self).closeEvent(event)
+        
                 
     def sizeHint(self):
         return qt.QtCore.QSize(400,500)
@@ -1492,7 +1495,7 @@ class ProcessManagerWindow(qt_ui.BasicWindow):
                 if status == 'Success':
                     self.code_widget.set_process_script_state(scripts[inc], 1)
                                 
-                if temp_log.find('Warning!') > -1:
+                if util.has_last_temp_log_warning():
                     self.code_widget.set_process_script_state(scripts[inc], 3)
                 
             
@@ -301,6 +301,11 @@ class ProcessTreeWidget(qt_ui.FileTreeWidget):
         
         self.progress_bar = None
         self.top_is_process = False
+        
+        self._scans = {}
+        self._scan_threads = []
+        self._scan_count = 0
+        self._goto_pending = False
         self._handle_selection_change = True
         
         self.checkable = checkable
@@ -377,6 +382,12 @@ class ProcessTreeWidget(qt_ui.FileTreeWidget):
                           
         )
 
+    def closeEvent(self, event):
+        
+        self.stop_scans()
+        
+        super(ProcessTreeWidget, self).closeEvent(event)
+
     def keyPressEvent(self, event):
         
         if event.key() == qt.QtCore.Qt.Key_Shift:
@@ -584,15 +595,25 @@ class ProcessTreeWidget(qt_ui.FileTreeWidget):
         super(ProcessTreeWidget, self)._item_expanded(item)
         
         if self.shift_activate:
-            child_count = item.childCount()
+            #children are added by a scan thread, they get expanded when the scan finishes
+            self._expand_scan_children(item)
+    
+    def _expand_scan_children(self, item):
+        
+        for scan_id in self._scans:
+            if self._scans[scan_id][0] is item:
+                self._scans[scan_id][1] = True
+                return
+        
+        child_count = item.childCount()
+        
+        for inc in range(0, child_count):
             
-            for inc in range(0, child_count):
-                
-                children = self._get_ancestors(item.child(inc))
-                item.child(inc).setExpanded(True)
-                
-                for child in children:
-                    child.setExpanded(True)
+            children = self._get_ancestors(item.child(inc))
+            item.child(inc).setExpanded(True)
+            
+            for child in children:
+                child.setExpanded(True)
     
     def _get_ancestors(self, item):
         
@@ -1061,6 +1082,8 @@ class ProcessTreeWidget(qt_ui.FileTreeWidget):
 
     def _goto_settings_process(self):
         
+        self._goto_pending = False
+        
         goto_process = self._get_project_setting('process')
         
         log.info('Goto settings process: %s' % goto_process)
@@ -1102,6 +1125,11 @@ class ProcessTreeWidget(qt_ui.FileTreeWidget):
                         if name.startswith(item.name):
                             
                             index = self.indexFromItem(item)
+                            
+                            if not self.isExpanded(index):
+                                #the children load on a scan thread, try again when the scan finishes
+                                self._goto_pending = True
+                            
                             self.setExpanded(index, True)
                             self.scrollToItem(item, self.PositionAtCenter)
                             
@@ -1114,6 +1142,7 @@ class ProcessTreeWidget(qt_ui.FileTreeWidget):
                         if str(name) == str(item.name):                    
                             found_item = item
                             found = True
+                            self._goto_pending = False
                             self.scrollToItem(found_item, self.PositionAtCenter)
                             self.setCurrentItem(found_item)            
                             self.setItemSelected(found_item, True)
@@ -1142,108 +1171,137 @@ class ProcessTreeWidget(qt_ui.FileTreeWidget):
         #    self.setItemSelected(found_item, True)
             
 
-    def _load_processes(self, process_paths, folders = []):
-
-        self.clear()
+    def _save_process_index(self):
         
-        if self.top_is_process:
-            pass
+        index = process.find_process_index(self.directory)
+        
+        if index:
+            index.save()
+        
+    def _start_scan(self, parent_item, path):
+        """
+        List processes and folders under path on a thread. Items are added in batches as they are found.
+        """
+        
+        if parent_item:
+            for scan_id in list(self._scans.keys()):
+                if self._scans[scan_id][0] is parent_item:
+                    self._cancel_scan(scan_id)
+        
+        sub_path = util_file.remove_common_path_simple(self.directory, path)
+        
+        self._scan_count += 1
+        scan_id = self._scan_count
+        
+        #parent item, expand children when done
+        self._scans[scan_id] = [parent_item, False]
+        
+        thread = ProcessScanThread(scan_id, self.directory, path, sub_path, parent = self)
+        thread.found.connect(self._scan_found)
+        thread.scan_done.connect(self._scan_done)
+        thread.finished.connect(self._scan_thread_finished)
+        
+        self._scan_threads.append(thread)
         
         if self.progress_bar:
             self.progress_bar.show()
             self.progress_bar.reset()
-            self.progress_bar.setRange(0, len(process_paths))
-            inc = 0
+            self.progress_bar.setRange(0, 0)
         
-        for process_path in process_paths:
-            if self.progress_bar:
-                self.progress_bar.setValue(inc)
-                inc += 1
-            self._add_process_item(process_path, find_parent_path=False)
-            
-        if self.progress_bar:
-            self.progress_bar.reset()
-            self.progress_bar.setRange(0, len(folders))
-            inc = 0    
+        thread.start()
         
-        try:
-            self.update()
-        except:
-            pass
-        for folder in folders:
-            if self.progress_bar:
-                self.progress_bar.setValue(inc)
-                inc += 1
-            
-            self._add_process_item(folder, folder=True, find_parent_path=False)#create = True, folder = True)
-        try:
-            self.update()
-        except:
-            pass
+        return scan_id
+    
+    def _cancel_scan(self, scan_id):
+        
+        for thread in self._scan_threads:
+            if thread.scan_id == scan_id:
+                thread.cancel()
+        
+        if scan_id in self._scans:
+            self._scans.pop(scan_id)
+    
+    def _cancel_scans(self):
+        
+        for scan_id in list(self._scans.keys()):
+            self._cancel_scan(scan_id)
+        
+        self._goto_pending = False
         
         if self.progress_bar:
             self.progress_bar.reset()
             self.progress_bar.hide()
-
-    def _add_process_items(self, item, path):
+    
+    def stop_scans(self):
+        """
+        Cancel the scans and wait for their threads to finish. Call before the widget goes away.
+        """
         
-        parts, folders = process.find_processes(path, return_also_non_process_list=True)
+        self._cancel_scans()
         
-        self.directory
-        sub_path = util_file.remove_common_path_simple(self.directory, path)
+        for thread in self._scan_threads:
+            thread.cancel()
+            thread.wait()
         
-        if self.progress_bar:
-            self.progress_bar.show()
-            self.progress_bar.reset()
-            self.progress_bar.setRange(0, len(parts))
-            inc = 0
+        self._scan_threads = []
+    
+    def _scan_found(self, scan_id, batch, done, total):
+        
+        if not scan_id in self._scans:
+            return
+        
+        parent_item = self._scans[scan_id][0]
         
-        #self.setUpdatesEnabled(False)
-        for part in parts:
-            
-            if self.progress_bar:
-                self.progress_bar.setValue(inc)
-                inc += 1
-            
-            if sub_path:
-                part = util_file.join_path(sub_path, part)
-                self._add_process_item(part, item, find_parent_path = False)
-            if not sub_path:
-                self._add_process_item(part, item, find_parent_path = False)
-
         if self.progress_bar:
-            self.progress_bar.reset()
-            self.progress_bar.setRange(0, len(folders))
-            inc = 0
+            self.progress_bar.setRange(0, total)
+            self.progress_bar.setValue(done)
         
-        try:
-            self.update()
-        except:
-            pass
+        self._handle_selection_change = False
         
-        for folder in folders:
-            
-            if self.progress_bar:
-                self.progress_bar.setValue(inc)
-                inc += 1
+        for name, folder, enabled, has_parts in batch:
             
-            if sub_path:
-                folder = util_file.join_path(sub_path, folder)
-                self._add_process_item(folder, item, create = False, find_parent_path = False, folder = True)
-            if not sub_path:
-                self._add_process_item(folder, item, create = False, find_parent_path = False, folder = True)
+            try:
+                self._add_process_item(name, parent_item, create = False, find_parent_path = False, folder = folder, 
+                                       enabled = enabled, has_parts = has_parts)
+            except:
+                util.error(traceback.format_exc())
+        
+        self._handle_selection_change = True
+        
+    def _scan_done(self, scan_id):
+        
+        if not scan_id in self._scans:
+            return
+        
+        parent_item, expand_children = self._scans.pop(scan_id)
+        
+        if expand_children and parent_item:
+            self._expand_scan_children(parent_item)
         
         try:         
             self.update()
         except:
             pass
         
-        if self.progress_bar:
-            self.progress_bar.reset()
-            self.progress_bar.hide()
+        if not self._scans:
+            
+            if self.progress_bar:
+                self.progress_bar.reset()
+                self.progress_bar.hide()
             
+            self._save_process_index()
         
-    def _add_process_item(self, name, parent_item = None, create = False, find_parent_path = True, folder = False):
+        if self._goto_pending:
+            self._goto_settings_process()
+    
+    def _scan_thread_finished(self):
+        
+        for thread in list(self._scan_threads):
+            if thread.isFinished():
+                self._scan_threads.remove(thread)
+                thread.deleteLater()
+    
+    def _add_process_item(self, name, parent_item = None, create = False, find_parent_path = True, folder = False, enabled = None, has_parts = None):
         
         log.info('Adding process item: %s' % name)
         
@@ -1291,13 +1349,14 @@ class ProcessTreeWidget(qt_ui.FileTreeWidget):
             is_child = True
         
         if is_child and not folder:
-            process_path = util_file.join_path(self.directory, name)
-            enable = process.is_process_enabled(process_path)
+            enable = enabled
+            
+            if enable == None:
+                process_path = util_file.join_path(self.directory, name)
+                enable = process.is_process_enabled(process_path)
             #enable = process_inst.is_enabled()
-            if not enable and self.checkable:
-                item.setCheckState(0, qt.QtCore.Qt.Unchecked )
-            if enable and self.checkable:
-                item.setCheckState(0, qt.QtCore.Qt.Checked )
+            if self.checkable:
+                item.set_check_state(enable)
                 
         if not parent_item:
             self.addTopLevelItem(item)
@@ -1310,7 +1369,10 @@ class ProcessTreeWidget(qt_ui.FileTreeWidget):
             parent_item.addChild(item)
         
         #has parts takes time because it needs to check children folders
-        if item.has_parts():# and not folder:    
+        if has_parts == None:
+            has_parts = item.has_parts()
+        
+        if has_parts:# and not folder:    
             qt.QTreeWidgetItem(item)
 
         if self._name_filter: 
@@ -1370,14 +1432,7 @@ class ProcessTreeWidget(qt_ui.FileTreeWidget):
             process_name = item.get_name()
             path = util_file.join_path(self.directory, process_name)
         
-        self._handle_selection_change = False
-        
-        try:
-            self._add_process_items(item, path)
-        except:
-            util.error(traceback.format_exc())
-        
-        self._handle_selection_change = True
+        self._start_scan(item, path)
         
     def _browse(self):
         
@@ -1399,15 +1454,21 @@ class ProcessTreeWidget(qt_ui.FileTreeWidget):
 
     def refresh(self):
         
-        processes, folders = process.find_processes(self.directory, return_also_non_process_list=True)
+        self._cancel_scans()
         
-        #this can be slow when there are many processes at the top level, and it checks if each process has sub process.
-        self._load_processes(processes, folders)
+        self.clear()
         
         self.current_item = None
         self.last_item = None
         
-        self._goto_settings_process()
+        if not self.directory:
+            return
+        
+        #listing runs on a thread, so a slow share does not block the ui.
+        #the process index keeps the folder listings between refreshes so only changed folders get listed again.
+        self._start_scan(None, self.directory)
+        
+        self._goto_pending = True
         
     def add_process(self, name):
         
@@ -1631,6 +1692,10 @@ class ProcessTreeWidget(qt_ui.FileTreeWidget):
         self.project_dir = directory
         self.sub_path = sub_path
         
+        self._cancel_scans()
+        
+        process.get_process_index(directory)
+        
         if sub_path:
             directory = util_file.join_path(directory, self.sub_path)
         
@@ -1642,12 +1707,82 @@ class ProcessTreeWidget(qt_ui.FileTreeWidget):
         
         self.settings = settings
 
+class ProcessScanThread(qt.QtCore.QThread):
+    """
+    Find the processes and folders in a directory, and check each one for enable state and sub parts.
+    Results are sent in batches with the found signal. Nothing here touches widgets.
+    """
+    
+    found = qt_ui.create_signal(object, object, object, object)
+    scan_done = qt_ui.create_signal(object)
+    
+    batch_size = 20
+    
+    def __init__(self, scan_id, directory, path, sub_path = None, parent = None):
+        super(ProcessScanThread, self).__init__(parent)
+        
+        self.scan_id = scan_id
+        self.directory = directory
+        self.path = path
+        self.sub_path = sub_path
+        
+        self._cancelled = False
+    
+    def cancel(self):
+        self._cancelled = True
+    
+    def run(self):
+        
+        try:
+            self._scan()
+        except:
+            log.warning(traceback.format_exc())
+        
+        if not self._cancelled:
+            self.scan_done.emit(self.scan_id)
+    
+    def _scan(self):
+        
+        parts, folders = process.find_processes(self.path, return_also_non_process_list = True)
+        
+        entries = [[part, False] for part in parts]
+        entries += [[folder, True] for folder in folders]
+        
+        total = len(entries)
+        batch = []
+        
+        for inc, (name, folder) in enumerate(entries):
+            
+            if self._cancelled:
+                return
+            
+            if self.sub_path:
+                name = util_file.join_path(self.sub_path, name)
+            
+            full_path = util_file.join_path(self.directory, name)
+            
+            enabled = False
+            if not folder:
+                enabled = process.is_process_enabled(full_path)
+            
+            has_parts = process.has_process_parts(full_path)
+            
+            batch.append([name, folder, enabled, has_parts])
+            
+            if len(batch) >= self.batch_size:
+                self.found.emit(self.scan_id, batch, inc + 1, total)
+                batch = []
+        
+        if batch and not self._cancelled:
+            self.found.emit(self.scan_id, batch, total, total)
+
 class ProcessItem(qt.QTreeWidgetItem):
     
     def __init__(self, directory, name, parent_item = None):
         super(ProcessItem, self).__init__(parent_item)
         
         self.process = None
+        self._sync_enable = True
         
         self.directory = directory
         self.name = name
@@ -1667,6 +1802,9 @@ class ProcessItem(qt.QTreeWidgetItem):
     def setData(self, column, role, value):
         super(ProcessItem, self).setData(column, role, value)
         
+        if not self._sync_enable:
+            return
+        
         process = self._get_process()
         
         if not process:
@@ -1763,16 +1901,27 @@ class ProcessItem(qt.QTreeWidgetItem):
         
         return process_instance.process_name
     
+    def set_check_state(self, bool_value):
+        """
+        Show the enable state without writing it back to the process folder.
+        """
+        
+        state = qt.QtCore.Qt.Unchecked
+        if bool_value:
+            state = qt.QtCore.Qt.Checked
+        
+        self._sync_enable = False
+        
+        try:
+            self.setCheckState(0, state)
+        finally:
+            self._sync_enable = True
+    
     def has_parts(self):
         
         process_path = util_file.join_path(self.directory, self.name)
-
-        processes, folders = process.find_processes(process_path, return_also_non_process_list = True, stop_at_one = True)
-        
-        if processes or folders:
-            return True
         
-        return False
+        return process.has_process_parts(process_path)
             
     def matches(self, item):
         
@@ -2468,9 +2617,10 @@ class CopyWidget(qt_ui.BasicWidget):
                 self._set_item_state(item, same, inc2+1)
             
             if other_process:
-                other_process.sync_manifest()
-                for setting in states_to_set:
-                    other_process.set_script_state(setting[0], setting[1])
+                with other_process.get_manifest_model():
+                    other_process.sync_manifest()
+                    for setting in states_to_set:
+                        other_process.set_script_state(setting[0], setting[1])
             self.progress_bar.setValue(inc)
             inc += 1
         
@@ -3139,9 +3289,12 @@ class VersionInfoTree(qt.QTreeWidget):
         
         self.remove_all = self.context_menu.addAction('Remove all but last version')
         self.remove_all_but_10 = self.context_menu.addAction('Remove all but last 10 versions')
+        self.context_menu.addSeparator()
+        self.collect_garbage = self.context_menu.addAction('Reclaim unused version storage')
 
         self.remove_all.triggered.connect(self._remove_all)
         self.remove_all_but_10.triggered.connect(self._remove_all_but_10)
+        self.collect_garbage.triggered.connect(self._collect_garbage)
 
     def _remove(self, keep = 1):
         
@@ -3188,6 +3341,15 @@ class VersionInfoTree(qt.QTreeWidget):
     
     def _remove_all_but_10(self):
         self._remove(10)
+    
+    def _collect_garbage(self):
+        
+        if not self.process:
+            return
+        
+        self.process.collect_version_garbage()
+        
+        self.populate()
 
     def _set_version_info(self, item, folder):
         version_inst = util_file.VersionFile(folder)
@@ -6,6 +6,7 @@ from . import qt
 
 from . import util
 from . import util_file
+from . import util_code
 import string
 import re
 import random
@@ -5625,7 +5626,7 @@ class PythonCompleter(qt.QCompleter):
         get namespaces in a module.
         """
         
-        defined = util_file.get_defined(path)
+        defined = util_code.get_symbol_index().get_defined(path)
         if not defined:
             return
         
@@ -5768,7 +5769,10 @@ class PythonCompleter(qt.QCompleter):
                 imports = self.last_imports
             
             if not imports:
-                imports = util_file.get_line_imports(lines)
+                imports = util_code.get_line_imports(lines)
+                
+                #parse the imported modules ahead of the next completion
+                util_code.get_symbol_index().refresh(list(imports.values()))
             
             self.last_imports = imports
             self.last_lines = lines
@@ -5845,7 +5849,7 @@ class PythonCompleter(qt.QCompleter):
                         sub_variables = self.current_sub_variables
                     
                 if not sub_functions:
-                    result = util_file.get_ast_class_sub_functions(path, sub_part)
+                    result = util_code.get_symbol_index().get_class_members(path, sub_part)
                     if result:
                         sub_functions, sub_variables = result
                         if sub_functions:
@@ -14,7 +14,9 @@ import datetime
 import traceback
 import platform
 import os
+import json
 import base64
+import collections
 
 if python_version < 3:
     import __builtin__
@@ -25,8 +27,17 @@ else:
     
 from functools import wraps
 
-temp_log = ''
-last_temp_log = ''
+try:
+    from concurrent import futures
+except:
+    futures = None
+
+temp_log = None
+last_temp_log = None
+temp_log_script = None
+_keep_temp_log = False
+_temp_log_sinks = []
+_temp_log_file = None
 
 global_tabs = 1
 
@@ -297,39 +308,313 @@ def suggest_env(name, value):
     if not name in os.environ:
         set_env(name, value)
         
+#--- temp log
+
+def get_temp_log_size():
+    """
+    The most records a temp log keeps. Older records are dropped first.
+    Set with VETALA_TEMP_LOG_SIZE.
+    
+    Returns:
+        int:
+    """
+    
+    value = get_env('VETALA_TEMP_LOG_SIZE')
+    
+    try:
+        value = int(value)
+    except:
+        value = 50000
+    
+    if value < 1:
+        value = 1
+    
+    return value
+
+def render_temp_log(records):
+    """
+    Get the text of temp log records, the way the script log shows it.
+    
+    Args:
+        records (list): Records as [time, tabs, script, severity, message]
+        
+    Returns:
+        str:
+    """
+    
+    lines = []
+    
+    for record in records:
+        tabs, severity, message = record[1], record[3], record[4]
+        
+        if severity == 'raw':
+            lines.append(message)
+        elif severity == 'warning':
+            lines.append('\nWarning!:  ')
+            lines.append(message)
+        elif severity == 'error':
+            lines.append('\n')
+            lines.append(message)
+        else:
+            lines.append('\n')
+            lines.append('\t' * tabs)
+            lines.append(message)
+    
+    return ''.join(lines).replace('\t', '  ')
+
+class TempLog(object):
+    """
+    Records messages while a script runs. 
+    Records are kept in a ring buffer and only turned into text when asked for.
+    """
+    
+    def __init__(self, size = None):
+        
+        if size is None:
+            size = get_temp_log_size()
+        
+        self.records = collections.deque(maxlen = size)
+        self.count = 0
+        self._text = None
+        self._text_count = -1
+        
+    def __len__(self):
+        return len(self.records)
+    
+    def append(self, message, severity = 'raw', tabs = 0, script = None):
+        """
+        Args:
+            message (str): The message, without the newline and prefix.
+            severity (str): 'info', 'warning', 'error' or 'raw'. Raw messages are rendered as is.
+            tabs (int): Indent of info messages.
+            script (str): The script that was running.
+            
+        Returns:
+            tuple: The record.
+        """
+        
+        record = (time.time(), tabs, script, severity, message)
+        
+        self.records.append(record)
+        self.count += 1
+        
+        return record
+        
+    def get_dropped_count(self):
+        return self.count - len(self.records)
+        
+    def has_severity(self, severity):
+        
+        for record in self.records:
+            if record[3] == severity:
+                return True
+        
+        return False
+    
+    def has_message_text(self, value):
+        
+        for record in self.records:
+            if record[4].find(value) > -1:
+                return True
+        
+        return False
+    
+    def get_text(self):
+        
+        if self._text_count != self.count:
+            
+            self._text = render_temp_log(self.records)
+            
+            dropped = self.get_dropped_count()
+            if dropped:
+                self._text = '\n... %s older records dropped' % dropped + self._text
+            
+            self._text_count = self.count
+            
+        return self._text
+
+class TempLogFile(object):
+    """
+    Writes temp log records to a json lines file, one record per line.
+    """
+    
+    def __init__(self, filepath):
+        
+        self.filepath = filepath
+        self._open_file = None
+    
+    def write(self, record):
+        
+        if not self._open_file:
+            self._open_file = open(self.filepath, 'a')
+            
+        self._open_file.write(json.dumps(record) + '\n')
+    
+    def flush(self):
+        
+        if self._open_file:
+            self._open_file.flush()
+        
+    def close(self):
+        
+        if self._open_file:
+            self._open_file.close()
+            self._open_file = None
+    
+    def get_records(self):
+        """
+        Returns:
+            list: The records written to the file.
+        """
+        
+        self.flush()
+        
+        return read_temp_log_file(self.filepath)
+    
+    def get_text(self):
+        return render_temp_log(self.get_records())
+
+def read_temp_log_file(filepath):
+    
+    records = []
+    
+    if not os.path.isfile(filepath):
+        return records
+    
+    with open(filepath, 'r') as open_file:
+        for line in open_file:
+            
+            if not line.strip():
+                continue
+            
+            try:
+                records.append(json.loads(line))
+            except:
+                pass
+            
+    return records
+
+def add_temp_log_sink(sink):
+    """
+    Add an object with a write(record) method that gets every recorded temp log record.
+    """
+    
+    if not sink in _temp_log_sinks:
+        _temp_log_sinks.append(sink)
+    
+def remove_temp_log_sink(sink):
+    
+    if sink in _temp_log_sinks:
+        _temp_log_sinks.remove(sink)
+        
+    if hasattr(sink, 'flush'):
+        sink.flush()
+
+def set_temp_log_script(script):
+    """
+    Set the script name that new temp log records get.
+    
+    Returns:
+        str: The previous script name.
+    """
+    
+    global temp_log_script
+    
+    last_script = temp_log_script
+    temp_log_script = script
+    
+    return last_script
+
 def start_temp_log():
     
     set_env('VETALA_KEEP_TEMP_LOG', 'True')
     global temp_log
-    temp_log = ''
+    global _keep_temp_log
+    global _temp_log_file
+    
+    temp_log = TempLog()
+    _keep_temp_log = True
+    
+    filepath = get_env('VETALA_TEMP_LOG_FILE')
+    
+    if filepath and not _temp_log_file:
+        _temp_log_file = TempLogFile(filepath)
+        add_temp_log_sink(_temp_log_file)
 
-def record_temp_log(value):
+def record_temp_log(value, severity = 'raw', tabs = 0):
+    """
+    Record a message to the temp log, if a temp log was started.
     
-    global temp_log
+    Args:
+        value (str): The message.
+        severity (str): 'info', 'warning', 'error' or 'raw'. Raw messages should start with their own newline.
+        tabs (int): Indent of info messages.
+    """
+    
+    if not _keep_temp_log or temp_log is None:
+        return
+    
+    record = temp_log.append(value, severity, tabs, temp_log_script)
     
-    if get_env('VETALA_KEEP_TEMP_LOG') == 'True':
-        value = value.replace('\t', '  ')
-        temp_log += value
+    for sink in _temp_log_sinks:
+        try:
+            sink.write(record)
+        except:
+            pass
         
 def end_temp_log():
     
     global temp_log
     global last_temp_log
+    global _keep_temp_log
+    global _temp_log_file
     
     set_env('VETALA_KEEP_TEMP_LOG', 'False')
-    value = temp_log
-    if value:
+    _keep_temp_log = False
+    
+    if _temp_log_file:
+        remove_temp_log_sink(_temp_log_file)
+        _temp_log_file.close()
+        _temp_log_file = None
+    
+    for sink in _temp_log_sinks:
+        if hasattr(sink, 'flush'):
+            sink.flush()
+    
+    value = ''
+    
+    if temp_log:
         last_temp_log = temp_log
-        
+        value = temp_log.get_text()
     
-        temp_log = ''
+    temp_log = None
     
     return value
 
 def get_last_temp_log():
     
-    global last_temp_log
-    return last_temp_log
+    if last_temp_log is None:
+        return ''
+    
+    return last_temp_log.get_text()
+
+def get_last_temp_log_records():
+    
+    if last_temp_log is None:
+        return []
+    
+    return list(last_temp_log.records)
+
+def has_last_temp_log_warning():
+    
+    if last_temp_log is None:
+        return False
+    
+    if last_temp_log.has_severity('warning'):
+        return True
+    
+    #scripts can print their own warnings
+    return last_temp_log.has_message_text('Warning!')
     
 
 def add_to_PYTHONPATH(path):
@@ -345,6 +630,116 @@ def add_to_PYTHONPATH(path):
     if not path in sys.path:
         sys.path.append(path)
 
+#--- lazy import
+
+class LazyModule(object):
+    """
+    Stands in for a module and imports it the first time an attribute is read from it.
+    Use it for modules that are only needed inside functions, not for base classes.
+    
+    Args:
+        module_name (str): The module to import. Can be relative, like '..ramen.ui_lib.ui_nodes'
+        package (str): The package a relative module_name starts from. Usually __package__ of the calling module.
+    """
+    
+    def __init__(self, module_name, package = None):
+        
+        self.__dict__['_lazy_name'] = module_name
+        self.__dict__['_lazy_package'] = package
+        self.__dict__['_lazy_module'] = None
+    
+    def _load(self):
+        
+        module = self.__dict__['_lazy_module']
+        
+        if module is None:
+            import importlib
+            module = importlib.import_module(self._lazy_name, self._lazy_package)
+            self.__dict__['_lazy_module'] = module
+        
+        return module
+    
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+    
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+    
+    def __dir__(self):
+        return dir(self._load())
+    
+    def __repr__(self):
+        
+        if self.__dict__['_lazy_module'] is None:
+            return '<lazy module %s>' % self._lazy_name
+        
+        return repr(self.__dict__['_lazy_module'])
+
+def lazy_import(module_name, package = None):
+    """
+    Get a module without importing it yet. If the module is already imported it is returned as is.
+    
+    Args:
+        module_name (str): The module to import. Can be relative.
+        package (str): The package a relative module_name starts from.
+    
+    Returns:
+        module or LazyModule
+    """
+    
+    full_name = module_name
+    
+    if module_name.startswith('.') and package:
+        
+        level = len(module_name) - len(module_name.lstrip('.'))
+        parent = package.rsplit('.', level - 1)[0] if level > 1 else package
+        
+        full_name = parent + '.' + module_name[level:]
+    
+    module = sys.modules.get(full_name)
+    
+    if module is not None:
+        return module
+    
+    return LazyModule(module_name, package)
+
+def set_lazy_submodules(package_globals, submodule_names):
+    """
+    Let a package import its submodules the first time they are used as package attributes,
+    for example vtool.maya_lib.core, instead of when the package is imported.
+    This uses module __getattr__ and needs python 3.7 or later.
+    
+    Args:
+        package_globals (dict): globals() of the package __init__
+        submodule_names (list): Names of the submodules.
+    
+    Returns:
+        bool: False if this python can't load submodules lazily. The package should import what it needs instead.
+    """
+    
+    if sys.version_info < (3, 7):
+        return False
+    
+    import importlib
+    
+    package_name = package_globals['__name__']
+    submodule_names = set(submodule_names)
+    
+    def __getattr__(name):
+        
+        if name in submodule_names:
+            return importlib.import_module('%s.%s' % (package_name, name))
+        
+        raise AttributeError('module %r has no attribute %r' % (package_name, name))
+    
+    def __dir__():
+        return sorted(set(package_globals) | submodule_names)
+    
+    package_globals['__getattr__'] = __getattr__
+    package_globals['__dir__'] = __dir__
+    
+    return True
+
 def profiler_event(frame, event, arg, indent = [0]):
     if event == "call":
         indent[0] += 2
@@ -624,6 +1019,148 @@ class StopWatch(object):
         return self.end()
 
 
+def get_worker_count(count = None):
+    """
+    Get how many worker threads a pool should use.
+    If count is not given the VETALA_WORKER_COUNT environment variable is used, otherwise the cpu count up to 8.
+    
+    Args:
+        count (int): A specific count.
+    
+    Returns:
+        int:
+    """
+    
+    if not count:
+        count = get_env('VETALA_WORKER_COUNT')
+    
+    try:
+        count = int(count)
+    except:
+        count = 0
+    
+    if count > 0:
+        return count
+    
+    try:
+        import multiprocessing
+        count = multiprocessing.cpu_count()
+    except:
+        count = 1
+    
+    return max(1, min(8, count))
+
+class FinishedJob(object):
+    """
+    Stand in for a future when a job runs in the calling thread.
+    """
+    def __init__(self, function, *args, **kwargs):
+        
+        self._result = None
+        self._exception = None
+        
+        try:
+            self._result = function(*args, **kwargs)
+        except Exception as exception:
+            self._exception = exception
+    
+    def done(self):
+        return True
+    
+    def cancel(self):
+        return False
+    
+    def result(self, timeout = None):
+        if self._exception:
+            raise self._exception
+        
+        return self._result
+
+class WorkerPool(object):
+    """
+    A bounded pool of threads for file io.
+    Jobs run in the calling thread when concurrent.futures is not available or the worker count is 1.
+    Jobs should not call maya commands.
+    Finished jobs are let go of as new jobs are submitted, so a pool can be kept for a whole session.
+    
+    Args:
+        worker_count (int): The max number of threads. See get_worker_count.
+    """
+    def __init__(self, worker_count = None):
+        
+        self.worker_count = get_worker_count(worker_count)
+        self.jobs = []
+        
+        self._executor = None
+        
+        if futures and self.worker_count > 1:
+            self._executor = futures.ThreadPoolExecutor(max_workers = self.worker_count)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.shutdown()
+    
+    def submit(self, function, *args, **kwargs):
+        """
+        Add a job to the pool.
+        
+        Returns:
+            future: Call result() on it to wait for the return value.
+        """
+        
+        if self._executor:
+            job = self._executor.submit(function, *args, **kwargs)
+        else:
+            job = FinishedJob(function, *args, **kwargs)
+        
+        self.jobs = [found for found in self.jobs if not found.done()]
+        self.jobs.append(job)
+        
+        return job
+    
+    def map(self, function, values):
+        """
+        Run function on each value and wait for all the results.
+        
+        Returns:
+            list: The results in the same order as values.
+        """
+        
+        jobs = [self.submit(function, value) for value in values]
+        
+        return [job.result() for job in jobs]
+    
+    def wait(self):
+        """
+        Wait for the submitted jobs that were not finished when the last job was submitted.
+        
+        Returns:
+            list: The results of those jobs and the last job, in submit order.
+        """
+        
+        jobs = self.jobs
+        self.jobs = []
+        
+        return [job.result() for job in jobs]
+    
+    def cancel(self):
+        """
+        Cancel jobs that have not started yet.
+        """
+        
+        for job in self.jobs:
+            job.cancel()
+        
+        self.jobs = []
+    
+    def shutdown(self, wait = True):
+        
+        if self._executor:
+            self._executor.shutdown(wait = wait)
+            self._executor = None
+
 class Variable(object):
     """
     Simple base class for variables on a node.
@@ -1321,19 +1858,21 @@ def show(*args):
         string_value = show_list_to_string(*args)
         log_value = string_value
         
-        string_value = string_value.replace('\n', '\nV:%s\t' % tab_str)
+        if '\n' in string_value:
+            string_value = string_value.replace('\n', '\nV:%s\t' % tab_str)
         text = 'V:%s\t%s' % (tab_str, string_value)
         
         #do not remove 
         print(text)
         
-        record_temp_log('\n%s%s' % (log_tab_str, log_value))
+        if _keep_temp_log:
+            record_temp_log(log_value, 'info', len(log_tab_str))
     
     except:
         #do not remove
         text = 'V:%s\tCould not show %s' % (tab_str, args)
         print(text)
-        record_temp_log('\n%s%s' % (tab_str, log_value))
+        record_temp_log('%s' % log_value, 'info', len(tab_str))
         raise RuntimeError('Error showing')
         
         
@@ -1341,7 +1880,8 @@ def warning(*args):
     
     try:    
         string_value = show_list_to_string(*args)
-        string_value = string_value.replace('\n', '\nV:\t\t')
+        if '\n' in string_value:
+            string_value = string_value.replace('\n', '\nV:\t\t')
         
         text = 'V: Warning!\t%s' % string_value
         #do not remove
@@ -1351,7 +1891,7 @@ def warning(*args):
             import maya.cmds as cmds
             cmds.warning('V: \t%s' % string_value)
         
-        record_temp_log('\nWarning!:  %s' % string_value)
+        record_temp_log(string_value, 'warning')
         
     except:
         raise RuntimeError
@@ -1360,13 +1900,14 @@ def error(*args):
     
     try:    
         string_value = show_list_to_string(*args)
-        string_value = string_value.replace('\n', '\nV:\t\t')
+        if '\n' in string_value:
+            string_value = string_value.replace('\n', '\nV:\t\t')
         #do not remove
         
         text = 'V: Error!\t%s' % string_value 
         print(text)
         
-        record_temp_log('\n%s' % string_value)
+        record_temp_log(string_value, 'error')
         
     except:
         raise RuntimeError
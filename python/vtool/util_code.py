@@ -0,0 +1,584 @@
+# Copyright (C) 2022 Louis Vottero louis.vot@gmail.com    All rights reserved.
+
+"""
+    Maya independent index of the classes, functions, assignments and imports defined in python files.
+
+    Each file is parsed once per change to the file. Code completion reads the index from memory,
+    files can be parsed ahead of time on a background thread, and the index is saved to the Vetala settings directory.
+"""
+
+from __future__ import print_function
+from __future__ import absolute_import
+
+import os
+import re
+import sys
+import ast
+import time
+import threading
+
+from . import util_file
+
+from . import logger
+log = logger.get_logger(__name__)
+
+#only used when a script does not parse. The targets are what comes before the first = of the line
+_put_pattern = re.compile(r'(?<![\w.])put\.([A-Za-z_]\w*)')
+_assign_pattern = re.compile(r'(?<![=!<>])=(?!=)')
+
+def _get_stamp(filepath):
+
+    try:
+        stat = os.stat(filepath)
+    except:
+        return
+
+    return [stat.st_mtime, stat.st_size]
+
+def _get_variable(target_name, value_node):
+    """
+    Same formatting as util_file.get_ast_class_members, except lists show their values instead of ast nodes.
+    """
+
+    if hasattr(value_node, 's'):
+        return "%s = '%s'" % (target_name, value_node.s)
+    elif hasattr(value_node, 'n'):
+        return '%s = %s' % (target_name, value_node.n)
+    elif hasattr(value_node, 'elts'):
+        try:
+            return '%s = %s' % (target_name, ast.literal_eval(value_node))
+        except:
+            pass
+
+    return target_name
+
+def _get_class_symbols(class_node):
+
+    init_args = ''
+    functions = []
+    variables = []
+
+    visited = {}
+
+    for node in class_node.body:
+
+        if isinstance(node, ast.FunctionDef):
+
+            #get_ast_function_args reverses the node args in place, so it can only run once per node
+            found_args = ','.join(util_file.get_ast_function_args(node))
+
+            if node.name == '__init__':
+                init_args = found_args
+
+            if node.name in visited:
+                continue
+
+            functions.append([node.name, '%s(%s)' % (node.name, found_args)])
+            visited[node.name] = None
+
+        if isinstance(node, ast.Assign):
+
+            for target in node.targets:
+
+                if not hasattr(target, 'id') or target.id in visited:
+                    continue
+
+                variables.append(_get_variable(target.id, node.value))
+                visited[target.id] = None
+
+    bases = [base.id for base in class_node.bases if hasattr(base, 'id')]
+
+    return {'signature' : '%s(%s)' % (class_node.name, init_args),
+            'bases' : bases,
+            'functions' : functions,
+            'variables' : variables}
+
+def parse_symbols(text):
+    """
+    Parse the top level symbols of python code.
+
+    Returns:
+        dict: {'functions':[[name, signature]], 'classes':{name:class info}, 'class_names':[], 'assignments':[], 'imports':{name:module}}
+        None if the text does not parse.
+    """
+
+    try:
+        ast_tree = ast.parse(text, 'string', 'exec')
+    except:
+        return
+
+    symbols = {'functions' : [],
+               'classes' : {},
+               'class_names' : [],
+               'assignments' : [],
+               'imports' : {}}
+
+    for node in ast_tree.body:
+
+        if isinstance(node, ast.FunctionDef):
+
+            found_args = ','.join(util_file.get_ast_function_args(node))
+            symbols['functions'].append([node.name, '%s(%s)' % (node.name, found_args)])
+
+        if isinstance(node, ast.ClassDef):
+
+            symbols['classes'][node.name] = _get_class_symbols(node)
+            symbols['class_names'].append(node.name)
+
+        if isinstance(node, ast.Assign):
+
+            for target in node.targets:
+                if hasattr(target, 'id'):
+                    symbols['assignments'].append(target.id)
+
+        if isinstance(node, ast.Import):
+
+            for name in node.names:
+                symbols['imports'][name.asname or name.name] = name.name
+
+        if isinstance(node, ast.ImportFrom):
+
+            module = node.module or ''
+
+            for name in node.names:
+                symbols['imports'][name.asname or name.name] = '%s.%s' % (module, name.name)
+
+    return symbols
+
+def _get_put_targets(node, found):
+
+    if isinstance(node, (ast.Tuple, ast.List)):
+        for sub_node in node.elts:
+            _get_put_targets(sub_node, found)
+        return
+
+    if node.__class__.__name__ == 'Starred':
+        _get_put_targets(node.value, found)
+        return
+
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == 'put':
+        found.append([node.attr, node.lineno])
+
+def _get_put_lines(text):
+
+    found = []
+
+    for line_number, line in enumerate(text.splitlines(), 1):
+
+        if line.find('put.') == -1:
+            continue
+
+        match = _assign_pattern.search(line)
+
+        if not match:
+            continue
+
+        targets = line[:match.start()]
+
+        if targets.find('(') > -1:
+            continue
+
+        for put_match in _put_pattern.finditer(targets):
+            found.append([put_match.group(1), line_number])
+
+    return found
+
+def get_put_assignments(text):
+    """
+    Find the assignments to put.<name> in the text of a process script.
+    This includes augmented, annotated and unpacking assignments like put.a, put.b = 1, 2
+    If the text does not parse, the lines are checked one at a time.
+
+    Returns:
+        list: [name, line number] for each assignment.
+    """
+
+    if text.find('put.') == -1:
+        return []
+
+    try:
+        tree = ast.parse(text)
+    except:
+        return _get_put_lines(text)
+
+    found = []
+
+    for node in ast.walk(tree):
+
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, ast.AugAssign):
+            targets = [node.target]
+        elif node.__class__.__name__ == 'AnnAssign':
+            targets = [node.target]
+        else:
+            continue
+
+        for target in targets:
+            _get_put_targets(target, found)
+
+    found.sort(key = lambda value: value[1])
+
+    return found
+
+def _get_member_names(class_info, skip_list):
+
+    functions = []
+
+    for name, signature in class_info['functions']:
+
+        if name in skip_list:
+            continue
+
+        skip_list.append(name)
+
+        if signature.startswith('_'):
+            continue
+
+        functions.append(signature.replace('self', ''))
+
+    return functions
+
+class SymbolIndex(util_file.JsonIndex):
+    """
+    Symbols of python files, keyed by the mtime and size of each file.
+    A file is only parsed again when it changed, or while its mtime is too recent to tell same second edits apart.
+    If a changed file does not parse, the last symbols found are kept.
+    Each file also keeps its put.<name> assignments, for process scripts.
+
+    The index can be used from threads, files are parsed outside the lock.
+
+    Args:
+        index_file (str): The json file to keep the index in between sessions, see get_symbol_index.
+    """
+
+    index_version = 4
+
+    #past this count the files that changed longest ago are dropped when saving
+    max_records = 2000
+
+    def __init__(self, index_file = None):
+
+        self._pending = []
+        self._thread = None
+
+        super(SymbolIndex, self).__init__(index_file)
+
+    def _get_record_time(self, record):
+        return record['stamp'][0]
+
+    def _parse(self, filepath, stamp):
+
+        text = util_file.get_file_text(filepath)
+
+        symbols = None
+
+        if text is not None:
+            symbols = parse_symbols(text)
+
+        with self._lock:
+
+            record = self.records.get(filepath)
+
+            if symbols is None and record:
+                #keep the last good symbols while the file has an error
+                symbols = record['symbols']
+
+            if symbols is None:
+                symbols = parse_symbols('')
+
+            record = {'stamp' : stamp,
+                      'parsed' : time.time(),
+                      'symbols' : symbols,
+                      'puts' : get_put_assignments(text or '')}
+
+            self.records[filepath] = record
+            self.dirty = True
+
+        return record
+
+    def _is_current(self, record, stamp):
+
+        if not record or record['stamp'] != stamp:
+            return False
+
+        return not self.is_racy(stamp[0], record['parsed'])
+
+    def is_current(self, filepath):
+
+        return self._is_current(self.records.get(filepath), _get_stamp(filepath))
+
+    def get_symbols(self, filepath):
+        """
+        Get the symbols of a file, parsing it only if it changed.
+
+        Returns:
+            dict: See parse_symbols. None if the file does not exist.
+        """
+
+        if not filepath:
+            return
+
+        stamp = _get_stamp(filepath)
+
+        if not stamp:
+            return
+
+        record = self.records.get(filepath)
+
+        if not self._is_current(record, stamp):
+            record = self._parse(filepath, stamp)
+
+        return record['symbols']
+
+    def get_defined(self, filepath, name_only = False):
+        """
+        Same as util_file.get_defined, from the index.
+
+        Returns:
+            list: Classes with their __init__ arguments, then functions.
+        """
+
+        symbols = self.get_symbols(filepath)
+
+        if not symbols:
+            return
+
+        classes = [symbols['classes'][name]['signature'] for name in symbols['class_names']]
+
+        if name_only:
+            functions = [function[0] for function in symbols['functions']]
+        else:
+            functions = [function[1] for function in symbols['functions']]
+
+        classes.sort()
+        functions.sort()
+
+        return classes + functions
+
+    def get_class_members(self, filepath, class_name):
+        """
+        Same as util_file.get_ast_class_sub_functions, from the index.
+        Members of parent classes defined in the same file are included.
+
+        Returns:
+            tuple: (functions, variables)
+        """
+
+        symbols = self.get_symbols(filepath)
+
+        if not symbols or not symbols['class_names']:
+            return None, None
+
+        classes = symbols['classes']
+
+        if not class_name in classes:
+            return
+
+        class_info = classes[class_name]
+
+        parents = []
+        bases = class_info['bases']
+
+        while bases:
+
+            find_bases = []
+
+            for base in bases:
+
+                if base in classes:
+                    parents.append(classes[base])
+                    find_bases += classes[base]['bases']
+
+            bases = find_bases
+
+        skip_list = []
+
+        class_functions = _get_member_names(class_info, skip_list)
+
+        functions = []
+        variables = []
+
+        for parent in parents:
+            functions += _get_member_names(parent, skip_list)
+            variables += parent['variables']
+
+        functions += class_functions
+        variables += class_info['variables']
+
+        return functions, variables
+
+    def get_imports(self, filepath):
+        """
+        Returns:
+            dict: dict[name in the file] = imported module or module.name
+        """
+
+        symbols = self.get_symbols(filepath)
+
+        if not symbols:
+            return {}
+
+        return dict(symbols['imports'])
+
+    def get_puts(self, filepaths):
+        """
+        Get the put.<name> assignments in files, without parsing on this thread.
+        Files that are new or changed are parsed in the background and show up in a later call.
+
+        Returns:
+            dict: dict[name] = [[filepath, line number], ...] in the order of filepaths.
+        """
+
+        found = {}
+        stale = []
+
+        for filepath in filepaths:
+
+            record = self.records.get(filepath)
+
+            if not self._is_current(record, _get_stamp(filepath)):
+                stale.append(filepath)
+
+            if not record:
+                continue
+
+            for name, line_number in record['puts']:
+
+                if not name in found:
+                    found[name] = []
+
+                found[name].append([filepath, line_number])
+
+        if stale:
+            self._queue(stale)
+
+        return found
+
+    def refresh(self, filepaths):
+        """
+        Parse files that changed on a background thread.
+        The index is saved when the thread runs out of files.
+        """
+
+        filepaths = [filepath for filepath in filepaths if filepath and not self.is_current(filepath)]
+
+        if filepaths:
+            self._queue(filepaths)
+
+    def _queue(self, filepaths):
+
+        with self._lock:
+
+            for filepath in filepaths:
+                if not filepath in self._pending:
+                    self._pending.append(filepath)
+
+            if self._thread and self._thread.is_alive():
+                return
+
+            self._thread = threading.Thread(target = self._run_pending)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _run_pending(self):
+
+        while True:
+
+            with self._lock:
+
+                if not self._pending:
+                    self._thread = None
+                    break
+
+                filepath = self._pending.pop(0)
+
+            try:
+                self.get_symbols(filepath)
+            except:
+                log.debug('Could not index %s' % filepath)
+
+        self.save()
+
+    def wait(self, timeout = None):
+        """
+        Wait for the background thread to finish.
+        """
+
+        thread = self._thread
+
+        if thread:
+            thread.join(timeout)
+
+_symbol_index = None
+
+def get_symbol_index():
+    """
+    Get the symbol index for this session. It is saved to symbol_index.json in the Vetala settings directory.
+
+    Returns:
+        SymbolIndex:
+    """
+
+    global _symbol_index
+
+    if _symbol_index is None:
+        _symbol_index = SymbolIndex(util_file.get_settings_file('symbol_index.json'))
+
+    return _symbol_index
+
+_module_paths = {}
+_module_paths_key = None
+
+def get_module_path(module_name):
+    """
+    Same as util_file.get_package_path_from_name with return_module_path, remembered until sys.path changes.
+    """
+
+    global _module_paths_key
+
+    path_key = tuple(sys.path)
+
+    if path_key != _module_paths_key:
+        _module_paths.clear()
+        _module_paths_key = path_key
+
+    if not module_name in _module_paths:
+        _module_paths[module_name] = util_file.get_package_path_from_name(module_name, return_module_path = True)
+
+    return _module_paths[module_name]
+
+def get_line_imports(lines):
+    """
+    Same as util_file.get_line_imports, with module paths looked up once.
+
+    Returns:
+        dict: dict[namespace] = module path
+    """
+
+    module_dict = {}
+
+    for line in lines:
+
+        split_line = str(line).split()
+        split_line_count = len(split_line)
+
+        for inc in range(0, split_line_count):
+
+            if split_line[inc] != 'import' or inc >= split_line_count - 1:
+                continue
+
+            module_prefix = ''
+
+            if inc > 1 and split_line[inc-2] == 'from':
+                module_prefix = split_line[inc-1]
+
+            module = split_line[inc+1]
+            namespace = module
+
+            if module_prefix:
+                module = '%s.%s' % (module_prefix, module)
+
+            module_dict[namespace] = get_module_path(module)
+
+    return module_dict
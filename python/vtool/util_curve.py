@@ -0,0 +1,493 @@
+# Copyright (C) 2022 Louis Vottero louis.vot@gmail.com    All rights reserved.
+
+"""
+    Maya independent reading and writing of curve shape libraries.
+
+    A library is a text .data file. Each curve starts with a line "-> name curve_type",
+    followed by one line of nurbsCurve setAttr data for each of its shapes.
+
+    A library can also be compiled to a binary file. The file starts with a json index of curve names to byte offsets,
+    followed by the degree, form, knots and cvs of every shape. Curves are only decoded when they are first asked for.
+"""
+
+from __future__ import print_function
+from __future__ import absolute_import
+
+import os
+import json
+import struct
+import hashlib
+
+from . import util
+from . import util_file
+
+_magic = b'VCRV'
+_format_version = 1
+_header_struct = '<4sII'
+
+#degree, spans, form, rational, dimension, knot count
+_shape_struct = '<6i'
+
+_shape_arrays = 0
+_shape_text = 1
+
+_true_values = ['yes', 'true', 'on']
+
+_libraries = {}
+
+def _get_stamp(filepath):
+
+    try:
+        stat = os.stat(filepath)
+    except:
+        return
+
+    return (stat.st_mtime, stat.st_size)
+
+def _get_hash(data):
+
+    return hashlib.sha1(data).hexdigest()
+
+def _to_int(value):
+
+    if value.lower() in _true_values:
+        return 1
+    if value.lower() in ['no', 'false', 'off']:
+        return 0
+
+    return int(value)
+
+def _format_float(value):
+
+    return repr(float(value))
+
+def parse_library_text(text):
+    """
+    Parse the text of a .data curve library.
+
+    Returns:
+        dict: dict[curve_name] = [shape data lines, curve_type]
+    """
+
+    curves = {}
+
+    curve_name = None
+    curve_type = ''
+    curve_data_lines = []
+
+    for line in text.splitlines():
+
+        if line.startswith('->'):
+
+            if curve_data_lines:
+                curves[curve_name] = [curve_data_lines, curve_type]
+
+            line_split = line.split()
+
+            curve_name = line_split[1].strip()
+            curve_type = ''
+
+            if len(line_split) > 2:
+                curve_type = line_split[2]
+
+            curve_data_lines = []
+            continue
+
+        if curve_name is None:
+            continue
+
+        line = line.strip()
+
+        if line:
+            curve_data_lines.append(line)
+
+    if curve_data_lines:
+        curves[curve_name] = [curve_data_lines, curve_type]
+
+    return curves
+
+def encode_shape(shape_line):
+    """
+    Encode one line of nurbsCurve data. Lines that are not plain numbers are kept as text.
+
+    Returns:
+        bytes:
+    """
+
+    values = shape_line.split()
+
+    try:
+        header = [_to_int(value) for value in values[:5]]
+
+        knot_count = int(values[5])
+        knots = [float(value) for value in values[6:6 + knot_count]]
+
+        cv_count = int(values[6 + knot_count])
+        cvs = [float(value) for value in values[7 + knot_count:]]
+
+        if len(knots) != knot_count:
+            raise ValueError('Knot count does not match.')
+
+    except:
+        text = shape_line.encode('utf-8')
+        return struct.pack('<iI', _shape_text, len(text)) + text
+
+    data = struct.pack('<i', _shape_arrays)
+    data += struct.pack(_shape_struct, *(header + [knot_count]))
+    data += struct.pack('<%sd' % knot_count, *knots)
+    data += struct.pack('<iI', cv_count, len(cvs))
+    data += struct.pack('<%sd' % len(cvs), *cvs)
+
+    return data
+
+def decode_shape(data, offset = 0):
+    """
+    Decode a shape written by encode_shape back to a line of nurbsCurve data.
+
+    Returns:
+        tuple: (shape_line, offset after the shape)
+    """
+
+    shape_kind = struct.unpack_from('<i', data, offset)[0]
+    offset += 4
+
+    if shape_kind == _shape_text:
+        size = struct.unpack_from('<I', data, offset)[0]
+        offset += 4
+
+        return data[offset:offset + size].decode('utf-8'), offset + size
+
+    header = struct.unpack_from(_shape_struct, data, offset)
+    offset += struct.calcsize(_shape_struct)
+
+    knot_count = header[5]
+    knots = struct.unpack_from('<%sd' % knot_count, data, offset)
+    offset += knot_count * 8
+
+    cv_count, value_count = struct.unpack_from('<iI', data, offset)
+    offset += 8
+
+    cvs = struct.unpack_from('<%sd' % value_count, data, offset)
+    offset += value_count * 8
+
+    values = ['%d' % value for value in header]
+    values += [_format_float(value) for value in knots]
+    values.append('%d' % cv_count)
+    values += [_format_float(value) for value in cvs]
+
+    return ' '.join(values), offset
+
+def encode_curve(shape_lines):
+
+    data = struct.pack('<I', len(shape_lines))
+
+    for shape_line in shape_lines:
+        data += encode_shape(shape_line)
+
+    return data
+
+def decode_curve(data, offset = 0):
+
+    shape_count = struct.unpack_from('<I', data, offset)[0]
+    offset += 4
+
+    shape_lines = []
+
+    for inc in range(0, shape_count):
+        shape_line, offset = decode_shape(data, offset)
+        shape_lines.append(shape_line)
+
+    return shape_lines
+
+def write_compiled_library(filepath, curves, source_data = None):
+    """
+    Write curves to a compiled binary library.
+
+    Args:
+        filepath (str): The file to write.
+        curves (dict): dict[curve_name] = [shape data lines, curve_type], see parse_library_text
+        source_data (bytes): The text of the .data file the curves came from. Its hash is stored so stale files can be found.
+
+    Returns:
+        str: The filepath.
+    """
+
+    index = {}
+    blob = b''
+
+    for curve_name in sorted(curves):
+
+        shape_lines, curve_type = curves[curve_name]
+
+        curve_data = encode_curve(shape_lines)
+
+        index[curve_name] = [len(blob), len(curve_data), curve_type]
+        blob += curve_data
+
+    header = {'curves' : index}
+
+    if source_data is not None:
+        header['source'] = {'size' : len(source_data),
+                            'sha1' : _get_hash(source_data)}
+
+    header_bytes = json.dumps(header, sort_keys = True).encode('utf-8')
+
+    data = struct.pack(_header_struct, _magic, _format_version, len(header_bytes))
+
+    util_file.write_file(filepath, data + header_bytes + blob)
+
+    return filepath
+
+class CompiledCurveLibrary(object):
+    """
+    A compiled library. Only the index is read when it loads, curves are decoded the first time they are asked for.
+
+    Args:
+        data (bytes): The contents of a compiled library file.
+    """
+
+    def __init__(self, data):
+
+        header_size = struct.calcsize(_header_struct)
+        magic, version, json_size = struct.unpack_from(_header_struct, data, 0)
+
+        if magic != _magic or version > _format_version:
+            raise ValueError('Not a compiled curve library.')
+
+        header = json.loads(data[header_size:header_size + json_size].decode('utf-8'))
+
+        self.source = header.get('source')
+
+        self._index = header['curves']
+        self._data = data
+        self._data_offset = header_size + json_size
+        self._decoded = {}
+
+    def is_source(self, source_data):
+        """
+        Check if the library was compiled from source_data.
+        """
+
+        if not self.source:
+            return False
+
+        if self.source['size'] != len(source_data):
+            return False
+
+        return self.source['sha1'] == _get_hash(source_data)
+
+    def get_curve_names(self):
+        return list(self._index.keys())
+
+    def has_curve(self, curve_name):
+        return curve_name in self._index
+
+    def get_curve(self, curve_name):
+        """
+        Returns:
+            list: [shape data lines, curve_type] None if the curve is not in the library.
+        """
+
+        if curve_name in self._decoded:
+            return self._decoded[curve_name]
+
+        if not curve_name in self._index:
+            return
+
+        offset, size, curve_type = self._index[curve_name]
+
+        shape_lines = decode_curve(self._data, self._data_offset + offset)
+
+        self._decoded[curve_name] = [shape_lines, curve_type]
+
+        return self._decoded[curve_name]
+
+class TextCurveLibrary(object):
+    """
+    A library parsed straight from .data text. Has the same interface as CompiledCurveLibrary.
+    """
+
+    def __init__(self, text):
+
+        self._curves = parse_library_text(text)
+
+    def get_curve_names(self):
+        return list(self._curves.keys())
+
+    def has_curve(self, curve_name):
+        return curve_name in self._curves
+
+    def get_curve(self, curve_name):
+        return self._curves.get(curve_name)
+
+def _read_bytes(filepath):
+
+    with open(filepath, 'rb') as open_file:
+        return open_file.read()
+
+def _load_library(filepath, compiled_path = None):
+
+    source_data = b''
+
+    if util_file.is_file(filepath):
+        source_data = _read_bytes(filepath)
+
+    if compiled_path and util_file.is_file(compiled_path):
+
+        try:
+            library = CompiledCurveLibrary(_read_bytes(compiled_path))
+
+            if library.is_source(source_data):
+                return library
+
+        except:
+            util.warning('Could not read compiled curve library: %s' % compiled_path)
+
+    text = source_data.decode('utf-8', 'replace')
+
+    if not compiled_path:
+        return TextCurveLibrary(text)
+
+    curves = parse_library_text(text)
+
+    try:
+        write_compiled_library(compiled_path, curves, source_data)
+        return CompiledCurveLibrary(_read_bytes(compiled_path))
+    except:
+        util.warning('Could not write compiled curve library: %s' % compiled_path)
+
+    return TextCurveLibrary(text)
+
+def get_library(filepath, compiled_path = None):
+    """
+    Get a curve library, loaded once per change to the file.
+
+    Args:
+        filepath (str): The .data file.
+        compiled_path (str): Where to keep a compiled copy. It is rebuilt when the .data file changes.
+            Without it the .data file is parsed in memory.
+
+    Returns:
+        CompiledCurveLibrary or TextCurveLibrary
+    """
+
+    stamp = _get_stamp(filepath)
+
+    if filepath in _libraries:
+
+        last_stamp, library = _libraries[filepath]
+
+        if stamp == last_stamp:
+            return library
+
+    library = _load_library(filepath, compiled_path)
+
+    _libraries[filepath] = [stamp, library]
+
+    return library
+
+def clear_library(filepath = None):
+    """
+    Forget a loaded library, or all of them if filepath is None.
+    """
+
+    if filepath is None:
+        _libraries.clear()
+        return
+
+    _libraries.pop(filepath, None)
+
+class CurveDict(object):
+    """
+    A dictionary of curve_name: [shape data lines, curve_type] for one library.
+    The library is loaded the first time the dictionary is used. Changes stay in this dictionary and do not touch the loaded library.
+
+    Args:
+        filepath (str): The .data file.
+        compiled_path (str): See get_library
+    """
+
+    def __init__(self, filepath = None, compiled_path = None):
+
+        self.filepath = filepath
+        self.compiled_path = compiled_path
+
+        self._library = None
+        self._changed = {}
+        self._removed = set()
+
+    def _get_library(self):
+
+        if self._library is None:
+
+            if self.filepath:
+                self._library = get_library(self.filepath, self.compiled_path)
+            else:
+                self._library = TextCurveLibrary('')
+
+        return self._library
+
+    def keys(self):
+
+        names = set(self._get_library().get_curve_names())
+        names.update(self._changed)
+        names.difference_update(self._removed)
+
+        return list(names)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __contains__(self, curve_name):
+
+        if curve_name in self._changed:
+            return True
+
+        if curve_name in self._removed:
+            return False
+
+        return self._get_library().has_curve(curve_name)
+
+    def __getitem__(self, curve_name):
+
+        if curve_name in self._changed:
+            return self._changed[curve_name]
+
+        if not curve_name in self._removed:
+            found = self._get_library().get_curve(curve_name)
+
+            if found is not None:
+                return found
+
+        raise KeyError(curve_name)
+
+    def __setitem__(self, curve_name, value):
+
+        self._changed[curve_name] = value
+        self._removed.discard(curve_name)
+
+    def get(self, curve_name, default = None):
+
+        if curve_name in self:
+            return self[curve_name]
+
+        return default
+
+    def pop(self, curve_name, *args):
+
+        if curve_name in self:
+
+            value = self[curve_name]
+
+            self._changed.pop(curve_name, None)
+            self._removed.add(curve_name)
+
+            return value
+
+        if args:
+            return args[0]
+
+        raise KeyError(curve_name)
@@ -8,8 +8,9 @@ import json
 import sys
 import os
 import shutil
-import imp
 import traceback
+import marshal
+import types
 import getpass
 import re
 import datetime
@@ -21,6 +22,21 @@ import ast
 import filecmp
 import time
 import hashlib
+import atexit
+import socket
+import errno
+from functools import wraps
+
+try:
+    import importlib.util as importlib_util
+except:
+    importlib_util = None
+    import imp
+
+try:
+    import fcntl
+except:
+    fcntl = None
 
 from . import util
 from . import logger
@@ -111,6 +127,10 @@ def get_vetala_directory():
 
 
 class ProcessLog(object):
+    """
+    Keeps the temp log records of a session in .log/log_<date and time>/temp_log.jsonl under path.
+    Text is only rendered when asked for.
+    """
     
     def __init__(self, path):
         
@@ -120,26 +140,35 @@ class ProcessLog(object):
         
         date_and_time = get_date_and_time(separators = False)
         
-        self.log_path = create_dir('log_' % date_and_time, self.log_path)
-    
-        temp_log_path = util.get_env('VETALA_TEMP_LOG')
-    
-        util.set_env('VETALA_KEEP_TEMP_LOG', 'True')
+        self.log_path = create_dir('log_%s' % date_and_time, self.log_path)
         
-        if not temp_log_path:
-            util.set_env('VETALA_TEMP_LOG', self.log_path)
+        self.sink = util.TempLogFile(join_path(self.log_path, 'temp_log.jsonl'))
+        util.add_temp_log_sink(self.sink)
         
     def record_temp_log(self, name, value):
+        """
+        Write value to name.txt in the log folder.
+        """
+        
+        value = value.replace('\t', '  ')
+        
+        filepath = create_file('%s.txt' % name, self.log_path)
+        
+        with open(filepath, 'w') as open_file:
+            open_file.write(value)
+        
+        return filepath
     
-        if util.get_env('VETALA_KEEP_TEMP_LOG') == 'True':
-            value = value.replace('\t', '  ')
-            
-            create_file('%s.txt' % name, self.log_path)
-            
+    def get_records(self):
+        return self.sink.get_records()
+    
+    def get_text(self):
+        return self.sink.get_text()
 
     def end_temp_log(self):
-        util.set_env('VETALA_KEEP_TEMP_LOG', 'False')
-        util.set_env('VETAL_TEMP_LOG', '')
+        
+        util.remove_temp_log_sink(self.sink)
+        self.sink.close()
         
 
 class WatchDirectoryThread(threading.Thread):
@@ -172,6 +201,10 @@ class VersionFile(object):
     """
     Convenience to version a file or folder.
     
+    When the content store is on (VETALA_VERSION_STORE = True), a version is a small manifest file instead of a copy.
+    The manifest lists the hash of each file, and the file content is stored once in .version/.objects.
+    get_version_path restores a manifest version to .version/.restore on demand.
+    
     Args:
         filepath (str): The path to the file to version.
     """
@@ -189,6 +222,8 @@ class VersionFile(object):
         self.version_folder = None
         self.updated_old = False
         
+        self.content_store = util.get_env('VETALA_VERSION_STORE') == 'True'
+        
     def _prep_directories(self):
         self._create_version_folder()
         self._create_comment_file()
@@ -237,6 +272,14 @@ class VersionFile(object):
         
         return path
     
+    def _get_lock_path(self):
+        """
+        The version folder saves go to. Saves and collect_garbage lock it.
+        The lock file sits next to the version folder, outside of a folder being versioned.
+        """
+        
+        return join_path(self.path, self.version_folder_name)
+    
     def _get_comment_path(self):
         folder = self._get_version_folder()
         
@@ -252,10 +295,236 @@ class VersionFile(object):
         self._create_version_folder()
         self._create_comment_file()
         
+        if self.content_store:
+            self._save_manifest(filename)
+            return
+        
         if is_dir(self.filepath):
             copy_dir(self.filepath, filename)
         if is_file(self.filepath):
             copy_file(self.filepath, filename)
+    
+    def _get_object_path(self, version_folder, hash_value):
+        return join_path(version_folder, '.objects/%s/%s' % (hash_value[:2], hash_value))
+    
+    def _get_latest_manifest(self, version_folder):
+        
+        numbers = []
+        
+        for name in get_files(version_folder):
+            
+            split_name = name.split('.')
+            
+            if len(split_name) == 2 and split_name[0] == self.version_name and split_name[1].isdigit():
+                numbers.append(int(split_name[1]))
+        
+        if not numbers:
+            return
+        
+        return get_version_manifest(join_path(version_folder, '%s.%s' % (self.version_name, max(numbers))))
+    
+    def _store_object(self, version_folder, filepath, hash_value):
+        
+        object_path = self._get_object_path(version_folder, hash_value)
+        
+        if is_file(object_path):
+            #in use again, so collect_garbage gives it the full grace period
+            os.utime(object_path, None)
+            return
+        
+        object_dir = get_dirname(object_path)
+        
+        if not is_dir(object_dir):
+            create_dir(object_dir)
+        
+        #copy next to the object and rename so a partial copy never looks like a stored object
+        temp_path = '%s.%s.tmp' % (object_path, os.getpid())
+        shutil.copyfile(filepath, temp_path)
+        
+        try:
+            os.rename(temp_path, object_path)
+        except:
+            delete_file(temp_path)
+    
+    def _save_manifest(self, filename):
+        
+        version_folder = get_dirname(filename)
+        
+        if is_dir(self.filepath):
+            manifest_type = 'folder'
+            
+            paths = []
+            
+            for root, dirs, files in os.walk(self.filepath):
+                
+                if self.version_folder_name in dirs:
+                    dirs.remove(self.version_folder_name)
+                
+                for name in files:
+                    filepath = join_path(root, name)
+                    paths.append([fix_slashes(os.path.relpath(filepath, self.filepath)), filepath])
+        
+        elif is_file(self.filepath):
+            manifest_type = 'file'
+            paths = [[get_basename(self.filepath), self.filepath]]
+        
+        else:
+            return
+        
+        last_manifest = self._get_latest_manifest(version_folder)
+        last_files = {}
+        
+        if last_manifest:
+            last_files = last_manifest['files']
+        
+        files = {}
+        
+        for relative_path, filepath in paths:
+            
+            file_stat = os.stat(filepath)
+            size = file_stat.st_size
+            mtime = file_stat.st_mtime
+            
+            hash_value = None
+            
+            #same size and modified time as the last version, reuse the hash instead of reading the file
+            if relative_path in last_files:
+                last_hash, last_size, last_mtime = last_files[relative_path]
+                
+                if last_size == size and last_mtime == mtime and is_file(self._get_object_path(version_folder, last_hash)):
+                    hash_value = last_hash
+            
+            if not hash_value:
+                hash_value = get_file_hash(filepath)
+                self._store_object(version_folder, filepath, hash_value)
+            
+            files[relative_path] = [hash_value, size, mtime]
+        
+        manifest = {MANIFEST_KEY : 1,
+                    'type' : manifest_type,
+                    'files' : files}
+        
+        with open(filename, 'w') as open_file:
+            json.dump(manifest, open_file, indent = 1, sort_keys = True)
+        
+        get_permission(filename)
+    
+    def _restore_manifest(self, version_path, manifest):
+        
+        version_folder = get_dirname(version_path)
+        restore_path = join_path(version_folder, '.restore/%s' % get_basename(version_path))
+        
+        if exists(restore_path):
+            return restore_path
+        
+        temp_path = restore_path + '.tmp'
+        
+        if exists(temp_path):
+            if is_dir(temp_path):
+                delete_dir(temp_path)
+            else:
+                delete_file(temp_path)
+        
+        files = manifest['files']
+        
+        for relative_path in files:
+            
+            object_path = self._get_object_path(version_folder, files[relative_path][0])
+            
+            if not is_file(object_path):
+                util.warning('Version store object missing for %s in %s' % (relative_path, version_path))
+                continue
+            
+            if manifest['type'] == 'file':
+                target_path = temp_path
+            else:
+                target_path = join_path(temp_path, relative_path)
+            
+            target_dir = get_dirname(target_path)
+            if not is_dir(target_dir):
+                create_dir(target_dir)
+            
+            shutil.copyfile(object_path, target_path)
+        
+        if manifest['type'] == 'folder' and not exists(temp_path):
+            create_dir(temp_path)
+        
+        os.rename(temp_path, restore_path)
+        
+        return restore_path
+    
+    def collect_garbage(self, grace_seconds = 86400):
+        """
+        Remove stored objects that no version manifest points to, and remove restored versions.
+        Holds the same lock as save. 
+        Objects and restored versions newer than grace_seconds are kept, they can belong to a save or restore still running.
+        
+        Returns:
+            tuple: (removed object count, freed size in MB)
+        """
+        
+        version_folder = self._get_version_folder()
+        
+        with lock_file(version_folder):
+            return self._collect_garbage(version_folder, time.time() - grace_seconds)
+    
+    def _collect_garbage(self, version_folder, before):
+        
+        object_folder = join_path(version_folder, '.objects')
+        
+        restore_folder = join_path(version_folder, '.restore')
+        if is_dir(restore_folder):
+            
+            for name in os.listdir(restore_folder):
+                
+                restore_path = join_path(restore_folder, name)
+                
+                if os.path.getmtime(restore_path) > before:
+                    continue
+                
+                if is_dir(restore_path):
+                    delete_dir(restore_path)
+                else:
+                    delete_file(restore_path)
+        
+        if not is_dir(object_folder):
+            return 0, 0
+        
+        used = set()
+        
+        for name in get_files(version_folder):
+            
+            manifest = get_version_manifest(join_path(version_folder, name))
+            
+            if not manifest:
+                continue
+            
+            for relative_path in manifest['files']:
+                used.add(manifest['files'][relative_path][0])
+        
+        removed = 0
+        size = 0
+        
+        for root, dirs, files in os.walk(object_folder):
+            
+            for name in files:
+                
+                if name in used:
+                    continue
+                
+                filepath = join_path(root, name)
+                
+                if os.path.getmtime(filepath) > before:
+                    continue
+                
+                size += os.path.getsize(filepath)
+                delete_file(filepath)
+                removed += 1
+            
+            if root != object_folder and not os.listdir(root):
+                os.rmdir(root)
+        
+        return removed, round(size * 0.000001, 2)
   
     def save_comment(self, comment = None, version_file = None, ):
         """
@@ -301,11 +570,13 @@ class VersionFile(object):
         if comment == None:
             comment = ' '
         
-        inc_file_name = self._increment_version_file_name()
-        
-        self._save(inc_file_name)
+        with lock_file(self._get_lock_path()):
             
-        self.save_comment(comment, inc_file_name)
+            inc_file_name = self._increment_version_file_name()
+            
+            self._save(inc_file_name)
+                
+            self.save_comment(comment, inc_file_name)
         
         return inc_file_name
     
@@ -390,7 +661,14 @@ class VersionFile(object):
         Returns:
             str: The path to the version.
         """
-        return self._get_version_path(version_int)
+        path = self._get_version_path(version_int)
+        
+        manifest = get_version_manifest(path)
+        
+        if manifest:
+            return self._restore_manifest(path, manifest)
+        
+        return path
         
     def get_version_comment(self, version_int):
         """
@@ -472,7 +750,12 @@ class VersionFile(object):
                 version_file = version_paths[(version)]
                 version_file = join_path(self.filepath, '%s/%s' % (self.version_folder_name, version_file))
                 
-                file_size = get_filesize(version_file)
+                manifest = get_version_manifest(version_file)
+                
+                if manifest:
+                    file_size = get_manifest_size(manifest)
+                else:
+                    file_size = get_filesize(version_file)
                 modified = get_last_modified_date(version_file)
                 
                 datas.append([version, comment, user, file_size, modified, version_file])
@@ -638,16 +921,51 @@ class VersionFile(object):
         return filename
     
     def delete_version(self, version_number):
+        """
+        Delete a version. Objects in the content store are kept until collect_garbage runs.
+        """
         
-        path = self.get_version_path(version_number)
+        path = self._get_version_path(version_number)
+        
+        if get_version_manifest(path):
+            restore_path = join_path(get_dirname(path), '.restore/%s' % get_basename(path))
+            
+            if is_dir(restore_path):
+                delete_dir(restore_path)
+            elif is_file(restore_path):
+                delete_file(restore_path)
         
         if is_file(path):
             delete_file(path)
         else:
             delete_dir(path)
+    
+    def set_content_store(self, bool_value):
+        """
+        Save new versions as manifests into the shared object store instead of full copies.
+        """
+        self.content_store = bool_value
             
     
+_pending_settings = []
+
+def flush_settings():
+    """
+    Write every SettingsFile that is waiting on an autosave.
+    """
+    
+    for settings in list(_pending_settings):
+        settings.flush()
+
+atexit.register(flush_settings)
+
 class SettingsFile(object):
+    """
+    Settings stored in a json file, in order.
+    
+    Every set writes the file unless writes are batched with batch() or autosave is on.
+    Files are written to a temp file and then swapped in, so readers never see half a file.
+    """
     
     def __init__(self):
         
@@ -659,6 +977,51 @@ class SettingsFile(object):
         self.settings_order = []
         self.write = None 
         self._has_json = None
+        
+        self.autosave_delay = None
+        
+        self._batch = 0
+        self._dirty = False
+        self._stamp = None
+        self._timer = None
+        self._lock = threading.RLock()
+    
+    def __enter__(self):
+        
+        self._batch += 1
+        
+        return self
+    
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        
+        self._batch -= 1
+        
+        if not self._batch and self._dirty:
+            self._write()
+    
+    def _get_stamp(self, filepath = None):
+        
+        if not filepath:
+            filepath = self.filepath
+        
+        try:
+            file_stat = os.stat(filepath)
+        except:
+            return
+        
+        return file_stat.st_mtime, file_stat.st_size
+    
+    def _start_autosave(self):
+        
+        if self._timer:
+            return
+        
+        if not self in _pending_settings:
+            _pending_settings.append(self)
+        
+        self._timer = threading.Timer(self.autosave_delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
     
     def _get_json_file(self):
         directory = get_dirname(self.filepath)
@@ -751,6 +1114,7 @@ class SettingsFile(object):
         
         self.settings_order = list(data.keys())
         self.settings_dict = data
+        self._stamp = self._get_stamp(filepath)
         
     def _update_old(self, filename):
         
@@ -782,7 +1146,16 @@ class SettingsFile(object):
             
     def _write(self):
         
-        self._write_json()
+        self._dirty = True
+        
+        if self._batch:
+            return
+        
+        if self.autosave_delay:
+            self._start_autosave()
+            return
+        
+        self.flush()
         
 
     def _write_json(self):
@@ -801,7 +1174,63 @@ class SettingsFile(object):
             
         out_data = OrderedDict(out_list)
         
-        set_json(filepath, list(out_data.items()))
+        set_json(filepath, list(out_data.items()), atomic = True)
+        
+        self._has_json = True
+        self._stamp = self._get_stamp(filepath)
+    
+    def batch(self):
+        """
+        Collect sets into one write, made when the with block ends.
+        
+        Example:
+            with settings.batch():
+                settings.set('a', 1)
+                settings.set('b', 2)
+        """
+        
+        return self
+    
+    def set_autosave(self, delay):
+        """
+        Wait delay seconds after a set before writing, so sets close together write once.
+        
+        Args:
+            delay (float): Seconds to wait. None or 0 writes on every set.
+        """
+        
+        self.autosave_delay = delay
+        
+        if not delay:
+            self.flush()
+    
+    def is_dirty(self):
+        """
+        Returns:
+            bool: True if there are sets that are not written yet.
+        """
+        return self._dirty
+    
+    def flush(self):
+        """
+        Write pending sets now.
+        """
+        
+        with self._lock:
+            
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            
+            if self in _pending_settings:
+                _pending_settings.remove(self)
+            
+            if not self._dirty:
+                return
+            
+            self._dirty = False
+            
+            self._write_json()
         
     def set(self, name, value):
                 
@@ -864,6 +1293,16 @@ class SettingsFile(object):
         self._write()
     
     def reload(self):
+        """
+        Read the file again, unless it has not changed since it was last read or written.
+        Pending sets are written first.
+        """
+        
+        self.flush()
+        
+        if self._stamp and self._get_stamp() == self._stamp:
+            if time.time() - self._stamp[0] > 2:
+                return
         
         self._read_json()
     
@@ -1267,69 +1706,407 @@ def remove_lock(filepath):
     #if is_locked(filepath):
     delete_file(lock)
 
-def get_lock_name(filepath):
-    
-    return filepath + '.lock'
+MANIFEST_KEY = 'vetala_version_manifest'
 
-def queue_file_access(func):
+def get_version_manifest(filepath):
+    """
+    Get the manifest of a version saved with the content store.
     
-    def wrapper(*args, **kwargs):
-        
-        filepath = args[0]
-        
-        inc = 0
-        while is_locked(args[0]):
-            if inc == 0:
-                util.show( 'waiting... to use file: %s' % filepath)
-            
-            if inc == 400:
-                util.show( 'still waiting... to use file: %s' % filepath)
+    Returns:
+        dict: None if the path is not a manifest version.
+    """
+    
+    if not is_file(filepath):
+        return
+    
+    try:
+        with open(filepath, 'r') as open_file:
             
-            if inc == 800:
-                remove_lock(filepath)
+            if not open_file.read(1) == '{':
+                return
             
-            time.sleep(0.005)
-            inc += 1
+            open_file.seek(0)
+            manifest = json.load(open_file)
+    except:
+        return
     
-        lock(filepath)
-        
-        result = None
-        
-        try:
-            result = func(*args, **kwargs)
-        except:
-            status = traceback.format_exc()
-            util.error(status)
-            
-        remove_lock(filepath)
-        return result
-        
-    return wrapper
-
-
+    if not type(manifest) == dict or not MANIFEST_KEY in manifest:
+        return
     
-#---- get
-
+    return manifest
 
-def get_basename(directory):
+def get_manifest_size(manifest, round_value = 2):
+    """
+    Get the size of the files a manifest points to in MB.
     """
-    Get the last part of a directory name. If the name is C:/goo/foo, this will return foo.
     
-    Args:
-        directoroy(str): A directory path.
+    size = 0
+    
+    for entry in manifest['files'].values():
+        size += entry[1]
+    
+    return round(size * 0.000001, round_value)
+
+def get_file_hash(filepath):
+    
+    hash_value = hashlib.sha1()
+    
+    with open(filepath, 'rb') as open_file:
         
-    Returns:
-        str: The last part of the directory path.
-    """
+        while True:
+            chunk = open_file.read(1048576)
+            
+            if not chunk:
+                break
+            
+            hash_value.update(chunk)
     
-    if directory:
-        return os.path.basename(directory)
+    return hash_value.hexdigest()
 
-def get_basename_no_extension(filepath):
+def collect_version_garbage(directory, grace_seconds = 86400):
     """
-    Get the last part of a directory name. If the name is C:/goo/foo.py, this will return foo.
+    Run VersionFile.collect_garbage on every version folder under directory.
     
-    Args:
+    Returns:
+        tuple: (removed object count, freed size in MB)
+    """
+    
+    removed = 0
+    size = 0
+    
+    for root, dirs, files in os.walk(directory):
+        
+        if not '.version' in dirs:
+            continue
+        
+        #nothing to collect inside a version folder
+        dirs.remove('.version')
+        
+        version_folder = join_path(root, '.version')
+        
+        if not is_dir(join_path(version_folder, '.objects')):
+            continue
+        
+        version = VersionFile(fix_slashes(root))
+        
+        sub_removed, sub_size = version.collect_garbage(grace_seconds)
+        
+        removed += sub_removed
+        size += sub_size
+    
+    return removed, round(size, 2)
+
+def get_lock_name(filepath):
+    
+    return filepath + '.lock'
+
+def is_file_locking():
+    """
+    Wether set_json, get_json, write_lines and VersionFile.save lock the files they use.
+    Set with VETALA_FILE_LOCKS.
+    """
+    
+    if util.get_env('VETALA_FILE_LOCKS') == 'True':
+        return True
+    
+    return False
+
+def _is_process_alive(pid):
+    
+    if pid == os.getpid():
+        return True
+    
+    if util.is_windows():
+        try:
+            import ctypes
+            handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)
+            if not handle:
+                return False
+            ctypes.windll.kernel32.CloseHandle(handle)
+            return True
+        except:
+            return True
+    
+    try:
+        os.kill(pid, 0)
+    except OSError as error:
+        if error.errno == errno.ESRCH:
+            return False
+    
+    return True
+
+class FileLockTimeout(RuntimeError):
+    pass
+
+class FileLock(object):
+    """
+    An advisory lock on a file, held in the sidecar file filepath.lock.
+    
+    Shared locks can be held by many readers at once, an exclusive lock by one writer.
+    Uses fcntl.flock where available. Elsewhere the lock file is created with O_EXCL 
+    and shared locks behave like exclusive ones.
+    Lock files record the host and pid of their owner. 
+    A lock left by a dead process on this host, or older than stale_seconds, is removed.
+    Locks are reentrant within a thread.
+    
+    Example:
+        with FileLock(filepath):
+            write_lines(filepath, lines)
+    
+    Args:
+        filepath (str): The file to lock.
+        shared (bool): Take a reader lock instead of a writer lock.
+        timeout (float): Seconds to wait before raising FileLockTimeout. None waits forever.
+    """
+    
+    stale_seconds = 600
+    
+    _held = {}
+    _held_lock = threading.Lock()
+    
+    def __init__(self, filepath, shared = False, timeout = 120):
+        
+        self.filepath = filepath
+        self.lock_path = get_lock_name(filepath)
+        self.shared = shared
+        self.timeout = timeout
+        
+        self._fd = None
+        self._reentered = False
+        
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.release()
+    
+    def _get_key(self):
+        return os.path.abspath(self.lock_path), threading.current_thread().ident
+    
+    def _get_owner(self):
+        
+        return json.dumps({'host' : socket.gethostname(), 
+                           'pid' : os.getpid(), 
+                           'time' : time.time()})
+    
+    def _try_flock(self):
+        
+        flags = fcntl.LOCK_EX
+        if self.shared:
+            flags = fcntl.LOCK_SH
+        
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o666)
+        
+        try:
+            fcntl.flock(fd, flags | fcntl.LOCK_NB)
+        except (IOError, OSError):
+            os.close(fd)
+            return False
+        
+        try:
+            same_file = os.fstat(fd).st_ino == os.stat(self.lock_path).st_ino
+        except OSError:
+            same_file = False
+        
+        if not same_file:
+            #the lock file was removed by the last owner before the lock was taken.
+            os.close(fd)
+            return False
+        
+        if not self.shared:
+            os.ftruncate(fd, 0)
+            os.write(fd, self._get_owner().encode())
+        
+        self._fd = fd
+        return True
+    
+    def _try_exclusive_file(self):
+        
+        try:
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o666)
+        except OSError as error:
+            if error.errno != errno.EEXIST:
+                raise
+            
+            if self._is_stale():
+                log.info('Removing stale lock %s' % self.lock_path)
+                try:
+                    os.remove(self.lock_path)
+                except OSError:
+                    pass
+            
+            return False
+        
+        os.write(fd, self._get_owner().encode())
+        
+        self._fd = fd
+        return True
+    
+    def _is_stale(self):
+        
+        try:
+            lock_age = time.time() - os.stat(self.lock_path).st_mtime
+        except OSError:
+            return False
+        
+        owner = None
+        try:
+            with open(self.lock_path, 'r') as open_file:
+                owner = json.loads(open_file.read())
+        except:
+            pass
+        
+        if owner and owner.get('host') == socket.gethostname():
+            return not _is_process_alive(owner.get('pid'))
+        
+        if lock_age > self.stale_seconds:
+            return True
+        
+        return False
+    
+    def acquire(self):
+        """
+        Wait for the lock. Waits start short and grow, up to a quarter second apart.
+        """
+        
+        key = self._get_key()
+        
+        with FileLock._held_lock:
+            if key in FileLock._held:
+                FileLock._held[key] += 1
+                self._reentered = True
+                return
+        
+        start = time.time()
+        delay = 0.005
+        shown = False
+        
+        while True:
+            
+            if fcntl:
+                acquired = self._try_flock()
+            else:
+                acquired = self._try_exclusive_file()
+            
+            if acquired:
+                break
+            
+            waited = time.time() - start
+            
+            if self.timeout is not None and waited > self.timeout:
+                raise FileLockTimeout('Timed out waiting for lock on: %s' % self.filepath)
+            
+            if not shown and waited > 1:
+                util.show('waiting... to use file: %s' % self.filepath)
+                shown = True
+            
+            time.sleep(delay)
+            delay = min(delay * 2, 0.25)
+        
+        with FileLock._held_lock:
+            FileLock._held[key] = 1
+    
+    def release(self):
+        
+        key = self._get_key()
+        
+        with FileLock._held_lock:
+            
+            if self._reentered:
+                FileLock._held[key] -= 1
+                self._reentered = False
+                return
+            
+            if key in FileLock._held:
+                del FileLock._held[key]
+        
+        if self._fd is None:
+            return
+        
+        if fcntl:
+            remove = not self.shared
+            
+            if self.shared:
+                #the last reader removes the lock file. Taking it exclusive only works when no one else holds it.
+                try:
+                    fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    remove = True
+                except (IOError, OSError):
+                    pass
+            
+            if remove:
+                try:
+                    os.remove(self.lock_path)
+                except OSError:
+                    pass
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+        else:
+            os.close(self._fd)
+            try:
+                os.remove(self.lock_path)
+            except OSError:
+                pass
+            
+        self._fd = None
+
+class _NoLock(object):
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        pass
+
+def lock_file(filepath, shared = False):
+    """
+    Get a FileLock for filepath if file locking is on, otherwise a lock that does nothing.
+    Use it in a with statement.
+    """
+    
+    if not is_file_locking():
+        return _NoLock()
+    
+    return FileLock(filepath, shared)
+
+def queue_file_access(func):
+    """
+    Decorator that holds an exclusive FileLock on the first argument while func runs.
+    """
+    
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        
+        with FileLock(args[0]):
+            return func(*args, **kwargs)
+        
+    return wrapper
+
+
+    
+#---- get
+
+
+def get_basename(directory):
+    """
+    Get the last part of a directory name. If the name is C:/goo/foo, this will return foo.
+    
+    Args:
+        directoroy(str): A directory path.
+        
+    Returns:
+        str: The last part of the directory path.
+    """
+    
+    if directory:
+        return os.path.basename(directory)
+
+def get_basename_no_extension(filepath):
+    """
+    Get the last part of a directory name. If the name is C:/goo/foo.py, this will return foo.
+    
+    Args:
         directoroy(str): A directory path.
         
     Returns:
@@ -1726,38 +2503,341 @@ def get_filesize(filepath, round_value = 2):
     Args:
         filepath (str)
         
-    Retrun
-        float: The size of the file specified by filepath.
-    """
+    Retrun
+        float: The size of the file specified by filepath.
+    """
+    
+    size = os.path.getsize(filepath)
+    size_format = round( size * 0.000001, round_value )
+
+    return size_format
+
+def get_folder_size(path, round_value = 2, skip_names = []):
+    """
+    skip_names will skip folders and files that have the same name specified in skip_names list.
+    """
+    size = 0
+    
+    skip_names = util.convert_to_sequence(skip_names)
+    
+    for root, dirs, files in os.walk(path):
+        
+        root_name = get_basename(root)
+        if root_name in skip_names:
+            continue
+        
+        for name in files:
+            
+            if name in skip_names:
+                
+                continue
+            
+            size += get_filesize( join_path(root, name), round_value )
+            
+    return size
+
+def get_settings_file(name):
+    """
+    Get the path to a file in the Vetala settings directory.
+    
+    Returns:
+        str: None if VETALA_SETTINGS is not set.
+    """
+    
+    settings_directory = util.get_env('VETALA_SETTINGS')
+    
+    if not settings_directory:
+        return
+    
+    return join_path(settings_directory, name)
+
+class JsonIndex(object):
+    """
+    Base for the indexes that remember something about paths between sessions, like FolderSizeIndex.
+    
+    Records are a dict keyed by path, loaded from and saved to a json file. 
+    A file saved with a different index_version or header is ignored.
+    Past max_records, the records with the oldest record time are dropped when saving.
+    
+    Records keyed by an mtime should be checked again while is_racy, 
+    an edit made in the same mtime tick as the last check can not be told apart from it.
+    
+    The index can be used from threads, change records while holding _lock.
+    
+    Args:
+        index_file (str): The json file to keep the records in between sessions.
+    """
+    
+    index_version = 1
+    
+    #mtimes closer than this to the check time might not show a change made in the same tick.
+    racy_seconds = 2.0
+    
+    #None keeps every record
+    max_records = None
+    
+    def __init__(self, index_file = None):
+        
+        self.index_file = index_file
+        self.records = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+        
+        self._load()
+    
+    def _get_header(self):
+        """
+        Values saved with the records. The file is only loaded when they match.
+        """
+        return {}
+    
+    def _get_record_time(self, record):
+        """
+        The time used to pick the records to drop past max_records. The newest are kept.
+        """
+        return record.get('scanned', 0)
+    
+    def _load(self):
+        
+        if not self.index_file or not is_file(self.index_file):
+            return
+        
+        try:
+            with open(self.index_file, 'r') as open_file:
+                index_dict = json.load(open_file)
+        except:
+            log.debug('Could not read %s %s' % (self.__class__.__name__, self.index_file))
+            return
+        
+        if index_dict.get('version') != self.index_version:
+            return
+        
+        header = self._get_header()
+        
+        for key in header:
+            if index_dict.get(key) != header[key]:
+                return
+        
+        self.records = index_dict.get('records', {})
+    
+    def is_racy(self, mtime, checked):
+        """
+        Check if an mtime is too close to the time it was checked to trust that nothing changed since.
+        """
+        
+        return checked - mtime <= self.racy_seconds
+    
+    def save(self):
+        """
+        Write the index to disk if anything changed.
+        """
+        
+        if not self.dirty or not self.index_file:
+            return
+        
+        with self._lock:
+            
+            records = dict(self.records)
+            
+            if self.max_records and len(records) > self.max_records:
+                names = sorted(records, key = lambda name: self._get_record_time(records[name]), reverse = True)
+                records = dict([(name, records[name]) for name in names[:self.max_records]])
+                self.records = dict(records)
+            
+            index_dict = self._get_header()
+            index_dict['version'] = self.index_version
+            index_dict['records'] = records
+            
+            self.dirty = False
+        
+        try:
+            create_dir(get_dirname(self.index_file))
+            write_file(self.index_file, json.dumps(index_dict))
+        except:
+            log.debug('Could not save %s %s' % (self.__class__.__name__, self.index_file))
+            self.dirty = True
+    
+    def clear(self):
+        
+        with self._lock:
+            self.records = {}
+            self.dirty = True
+
+class FolderSizeIndex(JsonIndex):
+    """
+    Cache of file sizes per directory, used to get folder sizes without walking every folder each time.
+    
+    Each directory record holds the total size, count and newest mtime of the files directly in it, and its sub folder names.
+    A record is keyed by the mtime of its directory and the directory is only listed again with os.scandir when that changed.
+    Folder totals are summed from the records, so a refresh stats each directory once and only lists the ones that changed.
+    A file rewritten in place does not change its directory mtime, call clear_directory after writing data.
+    
+    The index can be used from worker threads, the listing happens outside the lock.
+    
+    Args:
+        index_file (str): The json file to keep the records in between sessions, see get_folder_size_index.
+    """
+    
+    #past this count the records scanned longest ago are dropped when saving
+    max_records = 20000
+    
+    def _scan(self, directory, mtime):
+        
+        size = 0
+        count = 0
+        latest = 0
+        folders = []
+        
+        try:
+            if hasattr(os, 'scandir'):
+                for entry in os.scandir(directory):
+                    try:
+                        if entry.is_dir(follow_symlinks = False):
+                            folders.append(entry.name)
+                            continue
+                        
+                        entry_stat = entry.stat(follow_symlinks = False)
+                    except:
+                        continue
+                    
+                    size += entry_stat.st_size
+                    count += 1
+                    latest = max(latest, entry_stat.st_mtime)
+            else:
+                for name in os.listdir(directory):
+                    path = os.path.join(directory, name)
+                    
+                    if os.path.isdir(path) and not os.path.islink(path):
+                        folders.append(name)
+                        continue
+                    
+                    try:
+                        entry_stat = os.lstat(path)
+                    except:
+                        continue
+                    
+                    size += entry_stat.st_size
+                    count += 1
+                    latest = max(latest, entry_stat.st_mtime)
+        except:
+            return
+        
+        folders.sort()
+        
+        record = {'mtime' : mtime,
+                  'scanned' : time.time(),
+                  'size' : size,
+                  'count' : count,
+                  'latest' : latest,
+                  'folders' : folders}
+        
+        with self._lock:
+            self.records[directory] = record
+            self.dirty = True
+        
+        return record
+    
+    def get_record(self, directory):
+        """
+        Get the files total of a directory, listing it again only if its mtime changed.
+        
+        Returns:
+            dict: The record with size, count, latest and folders. None if the directory does not exist.
+        """
+        
+        directory = fix_slashes(directory)
+        
+        try:
+            mtime = os.stat(directory).st_mtime
+        except:
+            with self._lock:
+                if directory in self.records:
+                    self.records.pop(directory)
+                    self.dirty = True
+            return
+        
+        record = self.records.get(directory)
+        
+        if record and record['mtime'] == mtime and not self.is_racy(mtime, record['scanned']):
+            return record
+        
+        return self._scan(directory, mtime)
+    
+    def get_info(self, directory, skip_names = None):
+        """
+        Get the size of a folder and everything in it.
+        
+        Args:
+            directory (str): The folder.
+            skip_names (list): Names of sub folders, at any depth, to count separately. For example ['.version'].
+        
+        Returns:
+            dict: {'size':bytes, 'count':file count, 'latest':newest file mtime, 'skipped':bytes in skipped folders} 
+            None if the directory does not exist.
+        """
+        
+        skip_names = util.convert_to_sequence(skip_names)
+        
+        info = {'size' : 0, 'count' : 0, 'latest' : 0, 'skipped' : 0}
+        
+        directories = [[fix_slashes(directory), False]]
+        found = False
+        
+        while directories:
+            
+            current, skipped = directories.pop()
+            
+            record = self.get_record(current)
+            
+            if not record:
+                continue
+            
+            found = True
+            
+            if skipped:
+                info['skipped'] += record['size']
+            else:
+                info['size'] += record['size']
+                info['count'] += record['count']
+                info['latest'] = max(info['latest'], record['latest'])
+            
+            for folder in record['folders']:
+                directories.append([join_path(current, folder), skipped or folder in skip_names])
+        
+        if not found:
+            return
+        
+        return info
     
-    size = os.path.getsize(filepath)
-    size_format = round( size * 0.000001, round_value )
+    def clear_directory(self, directory):
+        """
+        Forget the records of a directory and everything under it, so they are listed again.
+        """
+        
+        directory = fix_slashes(directory)
+        
+        with self._lock:
+            for name in list(self.records.keys()):
+                if name == directory or name.startswith(directory + '/'):
+                    self.records.pop(name)
+                    self.dirty = True
 
-    return size_format
+_folder_size_index = None
 
-def get_folder_size(path, round_value = 2, skip_names = []):
+def get_folder_size_index():
     """
-    skip_names will skip folders and files that have the same name specified in skip_names list.
+    Get the folder size index for this session. It is saved to folder_size_index.json in the Vetala settings directory.
+    
+    Returns:
+        FolderSizeIndex:
     """
-    size = 0
     
-    skip_names = util.convert_to_sequence(skip_names)
+    global _folder_size_index
     
-    for root, dirs, files in os.walk(path):
-        
-        root_name = get_basename(root)
-        if root_name in skip_names:
-            continue
-        
-        for name in files:
-            
-            if name in skip_names:
-                
-                continue
-            
-            size += get_filesize( join_path(root, name), round_value )
-            
-    return size
+    if _folder_size_index is None:
+        _folder_size_index = FolderSizeIndex(get_settings_file('folder_size_index.json'))
+    
+    return _folder_size_index
 
 def format_date_time(python_date_time_value, separators = True):
     
@@ -1883,14 +2963,37 @@ def get_file_lines(filepath):
 
 
 #@queue_file_access
-def set_json(filepath, data, append = False):
+def set_json(filepath, data, append = False, atomic = False):
+    """
+    Args:
+        filepath (str): The json file.
+        data: Anything json can write.
+        append (bool): Add to the end of the file instead of replacing it.
+        atomic (bool): Write a temp file next to filepath and swap it in, so readers never see a half written file. Ignored when appending.
+    """
     
-    get_permission(filepath)
+    with lock_file(filepath):
+        _set_json(filepath, data, append, atomic)
+
+def _set_json(filepath, data, append, atomic):
     
     log.info('Writing json %s' % filepath)
     write_mode = 'w'
     if append:
         write_mode = 'a'
+        atomic = False
+    
+    if atomic:
+        try:
+            text = json.dumps(data, indent=4, sort_keys=True,separators=(',', ':'))
+            write_file(filepath, text)
+        except:
+            util.error(traceback.format_exc())
+            util.warning('Trouble writing json file: %s' % util.show(filepath))
+        
+        return
+    
+    get_permission(filepath)
     
     with open(filepath, write_mode) as json_file:
         try:
@@ -1898,6 +3001,231 @@ def set_json(filepath, data, append = False):
         except:
             util.error(traceback.format_exc())
             util.warning('Trouble writing json file: %s' % util.show(filepath))
+
+def replace_file(source_file, target_file):
+    """
+    Move source_file over target_file in one step. The target keeps its permissions.
+    """
+    
+    if os.path.exists(target_file):
+        try:
+            shutil.copymode(target_file, source_file)
+        except:
+            pass
+    
+    try:
+        _replace_file(source_file, target_file)
+    except OSError:
+        #a read only target on windows can not be replaced until its permission is raised.
+        if not get_permission(target_file):
+            raise
+        _replace_file(source_file, target_file)
+
+def _replace_file(source_file, target_file):
+    
+    if hasattr(os, 'replace'):
+        os.replace(source_file, target_file)
+        return
+    
+    if util.is_windows() and os.path.exists(target_file):
+        os.remove(target_file)
+    
+    os.rename(source_file, target_file)
+
+def _get_temp_path(filepath):
+    
+    directory, name = os.path.split(filepath)
+    
+    return os.path.join(directory, '.%s.%s_%s.tmp' % (name, os.getpid(), threading.current_thread().ident))
+
+def _write_temp(filepath, text, fsync = False):
+    
+    if os.path.islink(filepath):
+        filepath = os.path.realpath(filepath)
+    
+    temp_path = _get_temp_path(filepath)
+    
+    write_mode = 'w'
+    if type(text) == bytes:
+        write_mode = 'wb'
+    
+    try:
+        with open(temp_path, write_mode) as open_file:
+            open_file.write(text)
+            
+            if fsync:
+                open_file.flush()
+                os.fsync(open_file.fileno())
+    except:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    
+    return filepath, temp_path
+
+def _write_in_place(filepath, text, fsync = False):
+    
+    write_mode = 'w'
+    if type(text) == bytes:
+        write_mode = 'wb'
+    
+    with open(filepath, write_mode) as open_file:
+        open_file.write(text)
+        
+        if fsync:
+            open_file.flush()
+            os.fsync(open_file.fileno())
+
+def write_file(filepath, text, fsync = False):
+    """
+    Write text to filepath through a temp file next to it that is then swapped in.
+    Readers see the old file or the new one, never a partly written one.
+    If the folder is read only but the file is not, the file is written in place.
+    
+    Args:
+        filepath (str): The file to write. Its folder needs to exist.
+        text (str): Text, or bytes to write a binary file.
+        fsync (bool): Wether to wait for the data to reach the disk before swapping.
+        
+    Returns:
+        str: The filepath.
+    """
+    
+    try:
+        target_path, temp_path = _write_temp(filepath, text, fsync)
+    except (IOError, OSError):
+        if not os.path.isfile(filepath) or not os.access(filepath, os.W_OK):
+            raise
+        
+        #no temp file can be made next to it
+        _write_in_place(filepath, text, fsync)
+        return filepath
+    
+    try:
+        replace_file(temp_path, target_path)
+    except:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    
+    return filepath
+
+class FileBatch(object):
+    """
+    Collect many small files and write them together, for exporters.
+    
+    Folders are made once, files are written to temp files on a WorkerPool 
+    and only swapped in after every temp file was written.
+    New folders and files get permissions once, the way create_dir and create_file give them.
+    If writing fails or the with block raises, no file is replaced.
+    
+    Example:
+        with util_file.FileBatch() as batch:
+            batch.add_lines(join_path(path, 'a.weights'), [weights])
+    
+    Args:
+        fsync (bool): Wether to wait for the data to reach the disk before swapping.
+    """
+    
+    def __init__(self, fsync = False):
+        
+        self.fsync = fsync
+        self.files = OrderedDict()
+        self.directories = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        
+        if exc_type:
+            self.files.clear()
+            self.directories = []
+            return
+        
+        self.flush()
+    
+    def add_dir(self, directory):
+        """
+        Add a folder to make, even if no file is added to it.
+        """
+        
+        self.directories.append(directory)
+    
+    def add(self, filepath, text):
+        """
+        Add a file. Adding the same filepath again replaces its text.
+        """
+        
+        self.files[filepath] = text
+        
+    def add_lines(self, filepath, lines):
+        """
+        Add a file the way write_lines would write it.
+        """
+        
+        lines = util.convert_to_sequence(lines)
+        
+        self.add(filepath, '\n'.join(map(str, lines)))
+    
+    def flush(self):
+        """
+        Write the files.
+        
+        Returns:
+            list: The filepaths written.
+        """
+        
+        if not self.files and not self.directories:
+            return []
+        
+        items = list(self.files.items())
+        self.files.clear()
+        
+        directories = set(self.directories)
+        self.directories = []
+        
+        for filepath, text in items:
+            directories.add(os.path.dirname(filepath))
+        
+        for directory in directories:
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+                get_permission(directory)
+        
+        new_files = set()
+        for filepath, text in items:
+            if not os.path.exists(filepath):
+                new_files.add(filepath)
+        
+        temp_files = []
+        
+        with util.WorkerPool() as pool:
+            jobs = [pool.submit(_write_temp, filepath, text, self.fsync) for filepath, text in items]
+            
+            failed = None
+            
+            for job in jobs:
+                try:
+                    temp_files.append(job.result())
+                except:
+                    failed = traceback.format_exc()
+        
+        if failed:
+            for target_path, temp_path in temp_files:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            util.error(failed)
+            raise IOError('Could not write files: %s' % os.path.dirname(items[0][0]))
+        
+        for target_path, temp_path in temp_files:
+            replace_file(temp_path, target_path)
+        
+        #existing files keep their permissions through replace_file
+        for filepath in new_files:
+            get_permission(filepath)
+        
+        return [filepath for filepath, text in items]
                          
 #@queue_file_access   
 def get_json(filepath):
@@ -1911,14 +3239,15 @@ def get_json(filepath):
     if os.stat(filepath).st_size == 0:
         return
     
-    with open(filepath, 'r') as json_file:
-                 
-        try:
-            data = json.load(json_file)
-        except:
-
-            util.error(traceback.format_exc())
-            util.warning('Trouble reading json file: %s' % util.show(filepath))
+    with lock_file(filepath, shared = True):
+        with open(filepath, 'r') as json_file:
+                     
+            try:
+                data = json.load(json_file)
+            except:
+    
+                util.error(traceback.format_exc())
+                util.warning('Trouble reading json file: %s' % util.show(filepath))
     return data
 
 def exists(directory, case_sensitive = False):
@@ -2406,32 +3735,29 @@ def write_lines(filepath, lines, append = False):
     
     """
     
-    permission = get_permission(filepath)
-        
     lines = util.convert_to_sequence(lines)
     
-    write_string = 'w'
-    
     text = '\n'.join(map(str, lines))
     
-    if append:
-        write_string = 'a'
-        text = '\n' + text
-    
-    with open(filepath, write_string) as open_file:
-        open_file.write(text)
+    with lock_file(filepath):
+        
+        if not append:
+            write_file(filepath, text)
+            get_permission(filepath)
+            return
+        
+        get_permission(filepath)
+        
+        with open(filepath, 'a') as open_file:
+            open_file.write('\n' + text)
 
 def write_replace(filepath, stuff_to_write):
     
-    open_file = open(filepath, 'w')
-    
     try:
-        open_file.write(stuff_to_write)
+        write_file(filepath, stuff_to_write)
     except:
         util.warning( 'Could not write: %s' %  stuff_to_write)
     
-    open_file.close()
-    
 
 #---- create
 
@@ -2733,6 +4059,8 @@ def delete_versions(folder, keep = 1):
         if count - deleted == keep:
             break
     
+    version_inst.collect_garbage()
+    
 #---- python
 
 def delete_pyc(python_script):
@@ -2777,30 +4105,166 @@ def remove_sourced_code(code_directory):
         if key in sys.modules:
             sys.modules.pop(key)
 
-def source_python_module(code_directory):
+class CodeCache(object):
+    """
+    Compiled code objects for sourced scripts. 
     
-    get_permission(code_directory)
+    Entries are keyed on the script path, a hash of the script contents and the interpreter, 
+    so an edited script or a different Python never gets old code.
+    With a cache directory the code is also marshaled to disk, so a new session (batch or farm) does not compile again.
+    """
     
-    try:
+    compiled = {}
+    
+    cache_magic = b'VCC1'
+    
+    @classmethod
+    def get_interpreter_tag(cls):
+        
+        cache_tag = getattr(getattr(sys, 'implementation', None), 'cache_tag', None)
+        
+        if cache_tag:
+            return cache_tag
+        
+        return 'python-%s%s' % (sys.version_info[0], sys.version_info[1])
+    
+    @classmethod
+    def get_cache_file(cls, filepath, cache_directory):
+        
+        name = hashlib.md5(filepath.encode('utf-8')).hexdigest()
+        
+        return join_path(cache_directory, '%s.%s.vcc' % (name, cls.get_interpreter_tag()))
+    
+    @classmethod
+    def _read_cache_file(cls, cache_file, key):
+        
+        if not is_file(cache_file):
+            return
+        
+        try:
+            with open(cache_file, 'rb') as open_file:
+                
+                if open_file.read(len(cls.cache_magic)) != cls.cache_magic:
+                    return
+                
+                file_key = open_file.read(len(key))
+                
+                if file_key != key:
+                    return
+                
+                return marshal.loads(open_file.read())
+        except:
+            log.debug('Could not read code cache %s' % cache_file)
+    
+    @classmethod
+    def _write_cache_file(cls, cache_file, key, code):
+        
         try:
-            remove_sourced_code(code_directory)
+            cache_directory = get_dirname(cache_file)
             
-            fin = open(code_directory, 'r')
+            if not is_dir(cache_directory):
+                create_dir(cache_directory)
             
-            module_inst = imp.load_source(hashlib.md5(code_directory.encode()).hexdigest(), code_directory, fin)
+            write_file(cache_file, cls.cache_magic + key + marshal.dumps(code))
+        except:
+            log.debug('Could not write code cache %s' % cache_file)
+    
+    @classmethod
+    def get_code(cls, filepath, cache_directory = None):
+        """
+        Get the compiled code for a script. Compiles only if the script changed since it was last cached.
+        
+        Args:
+            filepath (str): The path to a python script.
+            cache_directory (str): Optional folder to keep compiled code on disk.
+            
+        Returns:
+            code: Raises the compile error if the script does not compile.
+        """
+        
+        with open(filepath, 'rb') as open_file:
+            source = open_file.read()
+        
+        key = hashlib.sha1(source + cls.get_interpreter_tag().encode('utf-8')).hexdigest().encode('utf-8')
+        
+        if filepath in cls.compiled:
+            cached_key, code = cls.compiled[filepath]
             
-            return module_inst
+            if cached_key == key:
+                return code
         
-        except:
-            return traceback.format_exc()
+        code = None
+        cache_file = None
         
-        finally:
-            try: fin.close()
-            except: pass
+        if cache_directory:
+            cache_file = cls.get_cache_file(filepath, cache_directory)
+            code = cls._read_cache_file(cache_file, key)
+        
+        if not code:
+            code = compile(source, filepath, 'exec', dont_inherit = True)
             
-    except ImportError:
-        traceback.print_exc(file = sys.stderr)
-        return None
+            if cache_file:
+                cls._write_cache_file(cache_file, key, code)
+        
+        cls.compiled[filepath] = [key, code]
+        
+        return code
+    
+    @classmethod
+    def remove_code(cls, filepath):
+        
+        if filepath in cls.compiled:
+            cls.compiled.pop(filepath)
+    
+    @classmethod
+    def clear(cls, cache_directory = None):
+        
+        cls.compiled = {}
+        
+        if cache_directory and is_dir(cache_directory):
+            delete_dir(cache_directory)
+
+def source_python_module(code_directory, cache_directory = None):
+    """
+    Run a script in a new module. The compiled code is reused from CodeCache when the script has not changed.
+    
+    Args:
+        code_directory (str): The path to the script.
+        cache_directory (str): Optional folder to keep compiled code on disk.
+        
+    Returns:
+        module: The module, or the traceback as a string if the script failed.
+    """
+    
+    get_permission(code_directory)
+    
+    module_name = hashlib.md5(code_directory.encode()).hexdigest()
+    
+    try:
+        if module_name in sys.modules:
+            sys.modules.pop(module_name)
+        
+        code = CodeCache.get_code(code_directory, cache_directory)
+        
+        if importlib_util:
+            spec = importlib_util.spec_from_file_location(module_name, code_directory)
+            module_inst = importlib_util.module_from_spec(spec)
+        else:
+            module_inst = types.ModuleType(module_name)
+            module_inst.__file__ = code_directory
+        
+        sys.modules[module_name] = module_inst
+        
+        try:
+            exec(code, module_inst.__dict__)
+        except:
+            sys.modules.pop(module_name, None)
+            raise
+        
+        return module_inst
+    
+    except:
+        return traceback.format_exc()
 
 def load_python_module(module_name, directory):
     """
@@ -2823,6 +4287,22 @@ def load_python_module(module_name, directory):
     
     split_name = module_name.split('.')
     
+    if importlib_util:
+        
+        if is_dir(full_path):
+            full_path = join_path(full_path, '__init__.py')
+        
+        try:
+            spec = importlib_util.spec_from_file_location(module_name, full_path)
+            module = importlib_util.module_from_spec(spec)
+            sys.modules[module_name] = module
+            spec.loader.exec_module(module)
+        except:
+            sys.modules.pop(module_name, None)
+            return traceback.format_exc()
+        
+        return module
+    
     filepath, pathname, description = imp.find_module(split_name[0], 
                                                 [directory])
     
@@ -2844,8 +4324,6 @@ def load_python_module(module_name, directory):
         
 def run_python_module(script_path):
     
-    delete_pyc(script_path)
-    
     util.reset_code_builtins()
     util.setup_code_builtins()
     
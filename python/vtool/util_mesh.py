@@ -0,0 +1,828 @@
+# Copyright (C) 2022 Louis Vottero louis.vot@gmail.com    All rights reserved.
+
+"""
+    Maya independent helpers for mesh topology.
+"""
+
+from __future__ import print_function
+from __future__ import absolute_import
+
+import sys
+import json
+import array
+import struct
+import hashlib
+import collections
+
+try:
+    import numpy
+except:
+    numpy = None
+
+from . import util
+from . import util_file
+from . import util_spatial
+
+_mirror_magic = b'VMIR'
+_mirror_version = 1
+_mirror_header = '<4sII'
+
+def _to_bytes(values, typecode = 'i'):
+
+    if numpy is not None:
+        return numpy.ascontiguousarray(values, dtype = '<i4').tobytes()
+
+    array_value = array.array(typecode, values)
+
+    if sys.byteorder == 'big':
+        array_value.byteswap()
+
+    if hasattr(array_value, 'tobytes'):
+        return array_value.tobytes()
+
+    return array_value.tostring()
+
+def get_topology_fingerprint(face_counts, face_vertices):
+    """
+    Get a hash of a mesh topology. Meshes with the same point count and face layout get the same fingerprint, whatever their shape.
+
+    Args:
+        face_counts (list): The vertex count of each face.
+        face_vertices (list): The vertex indices of every face, one face after the other.
+
+    Returns:
+        str:
+    """
+
+    hash_value = hashlib.sha1()
+
+    hash_value.update(_to_bytes(face_counts))
+    hash_value.update(b'|')
+    hash_value.update(_to_bytes(face_vertices))
+
+    return hash_value.hexdigest()
+
+def get_points_fingerprint(points):
+    """
+    Get a hash of point positions.
+    """
+
+    if numpy is not None:
+        data = numpy.ascontiguousarray(points, dtype = '<f8').tobytes()
+    else:
+        flat = []
+        for point in points:
+            flat += [float(value) for value in point[:3]]
+        data = struct.pack('<%sd' % len(flat), *flat)
+
+    return hashlib.sha1(data).hexdigest()
+
+class MirrorMapCache(object):
+    """
+    Mirror maps already found in this session, by (fingerprint, axis, tolerance)
+    Only the most recently used are kept.
+    """
+
+    max_count = 16
+
+    maps = collections.OrderedDict()
+
+    @classmethod
+    def get(cls, key):
+
+        mirror_map = cls.maps.pop(key, None)
+
+        if mirror_map is not None:
+            cls.maps[key] = mirror_map
+
+        return mirror_map
+
+    @classmethod
+    def set(cls, key, mirror_map):
+
+        cls.maps.pop(key, None)
+        cls.maps[key] = mirror_map
+
+        while len(cls.maps) > cls.max_count:
+            cls.maps.popitem(last = False)
+
+    @classmethod
+    def get_items(cls, fingerprint):
+        """
+        Returns:
+            list: [key, mirror map] for each map found for the fingerprint.
+        """
+
+        return [[key, cls.maps[key]] for key in cls.maps if key[0] == fingerprint]
+
+    @classmethod
+    def clear(cls):
+        cls.maps = collections.OrderedDict()
+
+def get_mirror_map_path(directory, axis = 'x'):
+
+    return util_file.join_path(directory, 'mirror_%s.map' % axis.lower())
+
+def _to_int_array(values):
+
+    if numpy is not None:
+        mirror_map = numpy.array(values, dtype = numpy.int32)
+        mirror_map.setflags(write = False)
+        return mirror_map
+
+    return array.array('i', values)
+
+def write_mirror_map(filepath, mirror_map, fingerprint, axis, tolerance):
+    """
+    Write a mirror map to a small binary file. A json header is followed by little endian int32 indices.
+    """
+
+    header = {'fingerprint' : fingerprint,
+              'axis' : axis.lower(),
+              'tolerance' : float(tolerance),
+              'count' : len(mirror_map)}
+
+    header_bytes = json.dumps(header).encode('utf-8')
+
+    data = struct.pack(_mirror_header, _mirror_magic, _mirror_version, len(header_bytes))
+    data += header_bytes + _to_bytes(mirror_map)
+
+    util_file.write_file(filepath, data)
+
+    return filepath
+
+def _read_mirror_file(filepath, fingerprint = None, axis = None, tolerance = None):
+
+    if not util_file.is_file(filepath):
+        return None, None
+
+    try:
+        with open(filepath, 'rb') as open_file:
+
+            header_size = struct.calcsize(_mirror_header)
+            magic, version, json_size = struct.unpack(_mirror_header, open_file.read(header_size))
+
+            if magic != _mirror_magic or version > _mirror_version:
+                return None, None
+
+            header = json.loads(open_file.read(json_size).decode('utf-8'))
+
+            if fingerprint and header['fingerprint'] != fingerprint:
+                return None, None
+            if axis and header['axis'] != axis.lower():
+                return None, None
+            if tolerance is not None and header['tolerance'] != float(tolerance):
+                return None, None
+
+            data = open_file.read(header['count'] * 4)
+    except:
+        util.warning('Could not read mirror map: %s' % filepath)
+        return None, None
+
+    return header, data
+
+def read_mirror_map(filepath, fingerprint = None, axis = None, tolerance = None):
+    """
+    Read a mirror map written by write_mirror_map.
+
+    Returns:
+        The map as an int array. None if the file is missing or was written for a different fingerprint, axis or tolerance.
+    """
+
+    header, data = _read_mirror_file(filepath, fingerprint, axis, tolerance)
+
+    if header is None:
+        return
+
+    return _from_bytes(data)
+
+def _from_bytes(data):
+
+    if numpy is not None:
+        return _to_int_array(numpy.frombuffer(data, dtype = '<i4'))
+
+    mirror_map = array.array('i')
+    if hasattr(mirror_map, 'frombytes'):
+        mirror_map.frombytes(data)
+    else:
+        mirror_map.fromstring(data)
+
+    if sys.byteorder == 'big':
+        mirror_map.byteswap()
+
+    return mirror_map
+
+def get_match_ratio(mirror_map):
+    """
+    The share of indices in a mirror map that have a mirror.
+    """
+
+    if not len(mirror_map):
+        return 1.0
+
+    if numpy is not None:
+        return numpy.count_nonzero(numpy.asarray(mirror_map) > -1) / float(len(mirror_map))
+
+    return sum(1 for index in mirror_map if index > -1) / float(len(mirror_map))
+
+def get_mirror_map(points, fingerprint = None, axis = 'x', tolerance = 0.00001, directory = None, min_match_ratio = 0.9):
+    """
+    Get the index of the mirror point for every point, -1 where a point has no mirror.
+    Points on the mirror plane map to themselves.
+
+    The map is found once per (fingerprint, axis, tolerance) and kept in MirrorMapCache.
+    If directory is given it is also saved there and read back next time, see also load_mirror_maps and save_mirror_maps.
+    A map that matches less than min_match_ratio of the points is returned but not cached or saved, 
+    the points are probably not in their symmetric pose.
+
+    Args:
+        points: [x,y,z] positions of the symmetric pose, or a function that returns them.
+            A function is only called when the map has to be found.
+        fingerprint (str): Identifies the mesh, usually get_topology_fingerprint. Without it nothing is cached.
+        axis (str): 'x', 'y' or 'z'
+        tolerance (float): How far a mirrored point can be from its match.
+        directory (str): A folder to save the map in.
+        min_match_ratio (float): The share of points that need a mirror before the map is cached.
+
+    Returns:
+        A read only numpy int32 array, or an array.array when numpy is not available.
+    """
+
+    key = None
+
+    if fingerprint:
+        key = (fingerprint, axis.lower(), float(tolerance))
+
+        mirror_map = MirrorMapCache.get(key)
+
+        if mirror_map is not None:
+            return mirror_map
+
+    filepath = None
+
+    if directory and fingerprint:
+        filepath = get_mirror_map_path(directory, axis)
+
+        mirror_map = read_mirror_map(filepath, fingerprint, axis, tolerance)
+
+        if mirror_map is not None:
+            MirrorMapCache.set(key, mirror_map)
+            return mirror_map
+
+    if callable(points):
+        points = points()
+
+    mirror_map = _to_int_array(util_spatial.get_mirror_matches(points, axis, tolerance))
+
+    if key and get_match_ratio(mirror_map) < min_match_ratio:
+        util.warning('Only %s%% of the points have a mirror across %s. The mirror map was not cached.' % (round(get_match_ratio(mirror_map) * 100, 1), axis))
+        return mirror_map
+
+    if key:
+        MirrorMapCache.set(key, mirror_map)
+
+    if filepath:
+        try:
+            util_file.create_dir(directory)
+            write_mirror_map(filepath, mirror_map, fingerprint, axis, tolerance)
+        except:
+            util.warning('Could not save mirror map: %s' % filepath)
+
+    return mirror_map
+
+def load_mirror_maps(directory, fingerprint):
+    """
+    Read the mirror maps saved in directory into the session cache, so get_mirror_map does not need to find them.
+    Maps written for a different topology are skipped.
+
+    Args:
+        directory (str): A folder with mirror_<axis>.map files, eg. the skin weights folder of a mesh.
+        fingerprint: The fingerprint of the mesh, or a function that returns it. A function is only called when a map file exists.
+
+    Returns:
+        list: The axes loaded.
+    """
+
+    filepaths = []
+
+    for axis in 'xyz':
+        filepath = get_mirror_map_path(directory, axis)
+
+        if util_file.is_file(filepath):
+            filepaths.append([axis, filepath])
+
+    if not filepaths:
+        return []
+
+    if callable(fingerprint):
+        fingerprint = fingerprint()
+
+    found = []
+
+    for axis, filepath in filepaths:
+
+        header, data = _read_mirror_file(filepath, fingerprint, axis)
+
+        if header is None:
+            continue
+
+        MirrorMapCache.set((fingerprint, axis, header['tolerance']), _from_bytes(data))
+        found.append(axis)
+
+    return found
+
+def save_mirror_maps(directory, fingerprint):
+    """
+    Write the mirror maps found this session for a topology to directory, so load_mirror_maps can read them back.
+
+    Args:
+        directory (str): A folder that exists.
+        fingerprint: The fingerprint of the mesh, or a function that returns it. A function is only called when there are maps to save.
+
+    Returns:
+        list: The filepaths written.
+    """
+
+    if not MirrorMapCache.maps:
+        return []
+
+    if callable(fingerprint):
+        fingerprint = fingerprint()
+
+    filepaths = []
+
+    for key, mirror_map in MirrorMapCache.get_items(fingerprint):
+
+        fingerprint, axis, tolerance = key
+
+        filepath = write_mirror_map(get_mirror_map_path(directory, axis), mirror_map, fingerprint, axis, tolerance)
+        util_file.get_permission(filepath)
+        filepaths.append(filepath)
+
+    return filepaths
+
+def mirror_values(values, mirror_map, negate_axis = None):
+    """
+    Copy each point's value from its mirror point. Points without a mirror keep their value.
+
+    Args:
+        values: A numpy array with one row per point, eg. weights (n,) or deltas (n, 3)
+        mirror_map: From get_mirror_map
+        negate_axis (str): Flip this component of (n, 3) values, eg. 'x' for shape deltas.
+
+    Returns:
+        numpy.ndarray: A new array.
+    """
+
+    values = numpy.asarray(values)
+    mirror_map = numpy.asarray(mirror_map)
+
+    found = values.copy()
+
+    has_mirror = mirror_map > -1
+
+    found[has_mirror] = values[mirror_map[has_mirror]]
+
+    if negate_axis:
+        found[has_mirror, 'xyz'.index(negate_axis.lower())] *= -1
+
+    return found
+
+#--- topology
+
+def _get_csr_rows(offsets, indices, rows):
+    """
+    Get the entries of many compressed sparse rows at once.
+
+    Returns:
+        tuple: (owners, values) For each value, the position in rows it came from.
+    """
+
+    starts = offsets[rows]
+    counts = offsets[rows + 1] - starts
+
+    owners = numpy.repeat(numpy.arange(len(rows)), counts)
+
+    positions = numpy.arange(int(counts.sum())) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+
+    return owners, indices[numpy.repeat(starts, counts) + positions]
+
+class MeshTopology(object):
+    """
+    Mesh connectivity stored as compressed sparse row arrays.
+    Each relation has an offsets array and an indices array. The items for row i are indices[offsets[i]:offsets[i+1]]
+
+    face_offsets, face_vertices: The vertices of each face in winding order.
+    vertex_face_offsets, vertex_faces: The faces that use each vertex.
+    neighbor_offsets, neighbors: The vertices that share an edge with each vertex, sorted.
+
+    Arrays are numpy int64 arrays when numpy is available, otherwise lists.
+
+    Args:
+        face_counts (list): The vertex count of each face.
+        face_vertices (list): The vertex indices of every face, one face after the other.
+        vert_count (int): The number of vertices. By default the highest index used plus one.
+    """
+
+    def __init__(self, face_counts, face_vertices, vert_count = None):
+
+        if numpy is not None:
+            self._build_arrays(face_counts, face_vertices, vert_count)
+        else:
+            self._build_lists(face_counts, face_vertices, vert_count)
+
+        self.face_count = len(self.face_offsets) - 1
+
+        self._island_ids = None
+
+    def _build_arrays(self, face_counts, face_vertices, vert_count):
+
+        face_counts = numpy.asarray(face_counts, dtype = numpy.int64).ravel()
+        face_vertices = numpy.asarray(face_vertices, dtype = numpy.int64).ravel()
+
+        if vert_count is None:
+            vert_count = int(face_vertices.max()) + 1 if len(face_vertices) else 0
+
+        self.vert_count = vert_count
+
+        self.face_offsets = numpy.zeros(len(face_counts) + 1, dtype = numpy.int64)
+        numpy.cumsum(face_counts, out = self.face_offsets[1:])
+        self.face_vertices = face_vertices
+
+        face_owners = numpy.repeat(numpy.arange(len(face_counts)), face_counts)
+
+        order = numpy.argsort(face_vertices, kind = 'stable')
+        self.vertex_faces = face_owners[order]
+        self.vertex_face_offsets = self._get_offsets(face_vertices)
+
+        #each face vertex makes an edge with the next one, the last wraps to the first
+        next_index = numpy.arange(1, len(face_vertices) + 1)
+        has_vertices = face_counts > 0
+        next_index[self.face_offsets[1:][has_vertices] - 1] = self.face_offsets[:-1][has_vertices]
+
+        start = face_vertices
+        end = face_vertices[next_index] if len(face_vertices) else face_vertices
+
+        not_degenerate = start != end
+        start = start[not_degenerate]
+        end = end[not_degenerate]
+
+        keys = numpy.concatenate((start * vert_count + end, end * vert_count + start))
+        keys.sort()
+
+        if len(keys):
+            keys = keys[numpy.concatenate(([True], keys[1:] != keys[:-1]))]
+
+        self.neighbor_offsets = self._get_offsets(keys // vert_count if vert_count else keys)
+        self.neighbors = keys % vert_count if vert_count else keys
+
+    def _get_offsets(self, sorted_rows):
+
+        offsets = numpy.zeros(self.vert_count + 1, dtype = numpy.int64)
+        numpy.cumsum(numpy.bincount(sorted_rows, minlength = self.vert_count), out = offsets[1:])
+
+        return offsets
+
+    def _build_lists(self, face_counts, face_vertices, vert_count):
+
+        face_counts = [int(count) for count in face_counts]
+        face_vertices = [int(vertex) for vertex in face_vertices]
+
+        if vert_count is None:
+            vert_count = max(face_vertices) + 1 if face_vertices else 0
+
+        self.vert_count = vert_count
+
+        vertex_faces = [[] for _ in range(vert_count)]
+        neighbors = [set() for _ in range(vert_count)]
+
+        self.face_offsets = [0]
+        self.face_vertices = face_vertices
+
+        for face_index, count in enumerate(face_counts):
+
+            start = self.face_offsets[-1]
+            self.face_offsets.append(start + count)
+
+            vertices = face_vertices[start:start + count]
+
+            for inc, vertex in enumerate(vertices):
+
+                vertex_faces[vertex].append(face_index)
+
+                next_vertex = vertices[(inc + 1) % count]
+
+                if next_vertex != vertex:
+                    neighbors[vertex].add(next_vertex)
+                    neighbors[next_vertex].add(vertex)
+
+        self.vertex_face_offsets, self.vertex_faces = self._to_csr(vertex_faces)
+        self.neighbor_offsets, self.neighbors = self._to_csr([sorted(found) for found in neighbors])
+
+    def _to_csr(self, rows):
+
+        offsets = [0]
+        indices = []
+
+        for row in rows:
+            indices += row
+            offsets.append(len(indices))
+
+        return offsets, indices
+
+    def _get_row(self, offsets, indices, index):
+
+        found = indices[offsets[index]:offsets[index+1]]
+
+        if numpy is not None:
+            return found.tolist()
+
+        return list(found)
+
+    def get_face_vertices(self, face_index):
+        """
+        Get the vertices of a face in winding order.
+        """
+
+        return self._get_row(self.face_offsets, self.face_vertices, face_index)
+
+    def get_vertex_faces(self, vertex_index):
+        """
+        Get the faces that use a vertex.
+        """
+
+        return self._get_row(self.vertex_face_offsets, self.vertex_faces, vertex_index)
+
+    def get_vertex_neighbors(self, vertex_index):
+        """
+        Get the vertices that share an edge with a vertex.
+        """
+
+        return self._get_row(self.neighbor_offsets, self.neighbors, vertex_index)
+
+    def get_face_ring(self, face_index):
+        """
+        Get the vertices that share an edge with the vertices of a face, not counting the face's own vertices.
+        This matches MItMeshPolygon.getConnectedVertices
+        """
+
+        face_vertices = self.get_face_vertices(face_index)
+
+        found = set()
+
+        for vertex in face_vertices:
+            found.update(self.get_vertex_neighbors(vertex))
+
+        found.difference_update(face_vertices)
+
+        return sorted(found)
+
+    def get_surrounding_vertices(self, vertex_index):
+        """
+        Get the face rings of all the faces that use a vertex.
+        """
+
+        found = set()
+
+        for face_index in self.get_vertex_faces(vertex_index):
+            found.update(self.get_face_ring(face_index))
+
+        return sorted(found)
+
+    def get_vertex_rings(self, vertex_indices = None, surrounding = False):
+        """
+        Get the vertices around many vertices at once, as compressed sparse rows.
+
+        Args:
+            vertex_indices (list): The vertices to get rings for. By default all of them.
+            surrounding (bool): Use get_surrounding_vertices instead of get_vertex_neighbors.
+
+        Returns:
+            tuple: (offsets, indices) The ring of vertex_indices[i] is indices[offsets[i]:offsets[i+1]], sorted.
+        """
+
+        if vertex_indices is None:
+            vertex_indices = range(self.vert_count)
+
+        if numpy is None:
+
+            if surrounding:
+                rings = [self.get_surrounding_vertices(vertex_index) for vertex_index in vertex_indices]
+            else:
+                rings = [self.get_vertex_neighbors(vertex_index) for vertex_index in vertex_indices]
+
+            return self._to_csr(rings)
+
+        vertex_indices = numpy.asarray(vertex_indices, dtype = numpy.int64)
+
+        vert_count = max(self.vert_count, 1)
+
+        if not surrounding:
+            owners, found = _get_csr_rows(self.neighbor_offsets, self.neighbors, vertex_indices)
+
+        if surrounding:
+            owners, faces = _get_csr_rows(self.vertex_face_offsets, self.vertex_faces, vertex_indices)
+
+            face_owners, face_vertices = _get_csr_rows(self.face_offsets, self.face_vertices, faces)
+
+            neighbor_owners, found = _get_csr_rows(self.neighbor_offsets, self.neighbors, face_vertices)
+            faces = faces[face_owners][neighbor_owners]
+            owners = owners[face_owners][neighbor_owners]
+
+            #drop neighbors that are on the face they were found from
+            face_keys = numpy.repeat(numpy.arange(self.face_count), numpy.diff(self.face_offsets)) * vert_count
+            face_keys = numpy.sort(face_keys + self.face_vertices)
+
+            keys = faces * vert_count + found
+
+            if len(face_keys):
+                positions = numpy.minimum(numpy.searchsorted(face_keys, keys), len(face_keys) - 1)
+                off_face = face_keys[positions] != keys
+
+                owners = owners[off_face]
+                found = found[off_face]
+
+        keys = owners * vert_count + found
+        keys.sort()
+
+        if len(keys):
+            keys = keys[numpy.concatenate(([True], keys[1:] != keys[:-1]))]
+
+        offsets = numpy.zeros(len(vertex_indices) + 1, dtype = numpy.int64)
+        numpy.cumsum(numpy.bincount(keys // vert_count, minlength = len(vertex_indices)), out = offsets[1:])
+
+        return offsets, keys % vert_count
+
+    def get_island_ids(self):
+        """
+        Find the connected pieces of the mesh with union find.
+
+        Returns:
+            list: For each vertex, the lowest vertex index on its island. A numpy array when numpy is available.
+        """
+
+        if self._island_ids is not None:
+            return self._island_ids
+
+        if numpy is not None:
+            self._island_ids = self._get_island_ids_array()
+        else:
+            self._island_ids = self._get_island_ids_list()
+
+        return self._island_ids
+
+    def _get_island_ids_array(self):
+
+        rows = numpy.repeat(numpy.arange(self.vert_count), numpy.diff(self.neighbor_offsets))
+
+        lower = rows < self.neighbors
+        start = rows[lower]
+        end = self.neighbors[lower]
+
+        parents = numpy.arange(self.vert_count)
+
+        while True:
+
+            start_roots = parents[start]
+            end_roots = parents[end]
+
+            low = numpy.minimum(start_roots, end_roots)
+            high = numpy.maximum(start_roots, end_roots)
+
+            separate = low != high
+
+            if not separate.any():
+                break
+
+            #link roots to the lowest root they touch, then flatten the trees
+            numpy.minimum.at(parents, high[separate], low[separate])
+
+            while True:
+                grand_parents = parents[parents]
+
+                if numpy.array_equal(grand_parents, parents):
+                    break
+
+                parents = grand_parents
+
+        return parents
+
+    def _get_island_ids_list(self):
+
+        parents = list(range(self.vert_count))
+
+        def find(index):
+
+            root = index
+            while parents[root] != root:
+                root = parents[root]
+
+            while parents[index] != root:
+                parents[index], index = root, parents[index]
+
+            return root
+
+        for vertex_index in range(self.vert_count):
+
+            for inc in range(self.neighbor_offsets[vertex_index], self.neighbor_offsets[vertex_index+1]):
+
+                neighbor = self.neighbors[inc]
+
+                if neighbor < vertex_index:
+                    continue
+
+                root1 = find(vertex_index)
+                root2 = find(neighbor)
+
+                if root1 != root2:
+                    parents[max(root1, root2)] = min(root1, root2)
+
+        return [find(vertex_index) for vertex_index in range(self.vert_count)]
+
+    def get_islands(self):
+        """
+        Get the vertices of each connected piece of the mesh.
+
+        Returns:
+            list: A sorted list of vertex indices for each island, ordered by their lowest vertex.
+        """
+
+        island_ids = self.get_island_ids()
+
+        if numpy is not None:
+
+            order = numpy.argsort(island_ids, kind = 'stable')
+            splits = numpy.nonzero(numpy.diff(island_ids[order]))[0] + 1
+
+            return [island.tolist() for island in numpy.split(order, splits) if len(island)]
+
+        islands = {}
+
+        for vertex_index, island_id in enumerate(island_ids):
+
+            if not island_id in islands:
+                islands[island_id] = []
+
+            islands[island_id].append(vertex_index)
+
+        return [islands[island_id] for island_id in sorted(islands)]
+
+class TopologyCache(object):
+    """
+    Mesh topologies already built in this session, by (fingerprint, vert count).
+    Only the most recently used are kept.
+    """
+
+    max_count = 16
+
+    topologies = collections.OrderedDict()
+
+    @classmethod
+    def get(cls, key):
+
+        topology = cls.topologies.pop(key, None)
+
+        if topology is not None:
+            cls.topologies[key] = topology
+
+        return topology
+
+    @classmethod
+    def set(cls, key, topology):
+
+        cls.topologies.pop(key, None)
+        cls.topologies[key] = topology
+
+        while len(cls.topologies) > cls.max_count:
+            cls.topologies.popitem(last = False)
+
+    @classmethod
+    def clear(cls):
+        cls.topologies = collections.OrderedDict()
+
+def get_topology(face_counts, face_vertices, vert_count = None, fingerprint = None):
+    """
+    Get the MeshTopology for a face layout. It is only built once per fingerprint for the session.
+
+    Args:
+        face_counts (list): The vertex count of each face.
+        face_vertices (list): The vertex indices of every face, one face after the other.
+        vert_count (int): The number of vertices.
+        fingerprint (str): From get_topology_fingerprint. Found from the faces if not given.
+
+    Returns:
+        MeshTopology:
+    """
+
+    if not fingerprint:
+        fingerprint = get_topology_fingerprint(face_counts, face_vertices)
+
+    key = (fingerprint, vert_count)
+
+    topology = TopologyCache.get(key)
+
+    if topology is None:
+        topology = MeshTopology(face_counts, face_vertices, vert_count)
+        TopologyCache.set(key, topology)
+
+    return topology
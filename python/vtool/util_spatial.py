@@ -0,0 +1,446 @@
+# Copyright (C) 2022 Louis Vottero louis.vot@gmail.com    All rights reserved.
+
+"""
+    Maya independent spatial index for finding points near other points.
+"""
+
+from __future__ import print_function
+from __future__ import absolute_import
+
+import math
+import itertools
+
+try:
+    import numpy
+except:
+    numpy = None
+
+def _get_ring_cells(cell, ring, dims = None):
+    """
+    Get the cells at chebyshev distance ring from cell.
+    With dims, only cells inside a grid of that size are returned.
+    """
+
+    if ring == 0:
+        return [tuple(cell)]
+
+    steps = []
+
+    for inc in range(3):
+
+        low = -ring
+        high = ring
+
+        if dims:
+            low = max(low, -cell[inc])
+            high = min(high, dims[inc] - 1 - cell[inc])
+
+        steps.append(range(low, high + 1))
+
+    z_edges = [z for z in (-ring, ring) if z in steps[2]]
+
+    found = []
+
+    for x in steps[0]:
+        x_edge = abs(x) == ring
+
+        for y in steps[1]:
+            y_edge = x_edge or abs(y) == ring
+
+            if y_edge:
+                for z in steps[2]:
+                    found.append((cell[0] + x, cell[1] + y, cell[2] + z))
+            else:
+                for z in z_edges:
+                    found.append((cell[0] + x, cell[1] + y, cell[2] + z))
+
+    return found
+
+class SpatialIndex(object):
+    """
+    A uniform grid over 3d points, so nearby points can be found without testing every point.
+    Uses numpy when it is available.
+
+    Query results are point indices, closest first. Equal distances are ordered by index.
+
+    Args:
+        points (list): [x,y,z] positions, or a numpy array with shape (n, 3)
+        cell_size (float): The size of a grid cell. By default cells hold a few points each.
+    """
+
+    def __init__(self, points, cell_size = None):
+
+        if numpy is not None:
+            self.points = numpy.asarray(points, dtype = numpy.float64).reshape(-1, 3)
+        else:
+            self.points = [(float(point[0]), float(point[1]), float(point[2])) for point in points]
+
+        self.count = len(self.points)
+
+        self._min = [0.0, 0.0, 0.0]
+        self._dims = [1, 1, 1]
+
+        self._keys = None
+        self._order = None
+        self._cells = {}
+
+        if not cell_size:
+            cell_size = self._get_cell_size()
+
+        self.cell_size = float(cell_size)
+
+        self._build()
+
+    def __len__(self):
+        return self.count
+
+    def _get_bounds(self):
+
+        if numpy is not None:
+            return self.points.min(axis = 0).tolist(), self.points.max(axis = 0).tolist()
+
+        return [min(values) for values in zip(*self.points)], [max(values) for values in zip(*self.points)]
+
+    def _get_cell_size(self):
+
+        if not self.count:
+            return 1.0
+
+        min_value, max_value = self._get_bounds()
+
+        extent = max([max_value[inc] - min_value[inc] for inc in range(3)])
+
+        if extent <= 0:
+            return 1.0
+
+        return extent / max(1.0, self.count ** (1.0/3.0))
+
+    def _build(self):
+
+        if not self.count:
+            return
+
+        self._min = self._get_bounds()[0]
+
+        if numpy is not None:
+
+            cells = numpy.floor((self.points - self._min) / self.cell_size).astype(numpy.int64)
+            self._dims = (cells.max(axis = 0) + 1).tolist()
+
+            keys = self._get_keys(cells)
+
+            self._order = numpy.argsort(keys, kind = 'stable')
+            self._keys = keys[self._order]
+
+            return
+
+        for inc, point in enumerate(self.points):
+
+            cell = self._get_cell(point)
+
+            if not cell in self._cells:
+                self._cells[cell] = []
+
+            self._cells[cell].append(inc)
+
+        for inc in range(3):
+            self._dims[inc] = max([cell[inc] for cell in self._cells]) + 1
+
+    def _get_keys(self, cells):
+
+        return (cells[:,0] * self._dims[1] + cells[:,1]) * self._dims[2] + cells[:,2]
+
+    def _get_cell(self, position):
+
+        return tuple([int(math.floor((position[inc] - self._min[inc]) / self.cell_size)) for inc in range(3)])
+
+    def _get_cell_points(self, cells):
+        """
+        Get the indices of the points in cells.
+        """
+
+        if numpy is None:
+            found = []
+            for cell in cells:
+                found += self._cells.get(cell, [])
+            return found
+
+        cells = numpy.asarray(cells, dtype = numpy.int64).reshape(-1, 3)
+
+        valid = numpy.all((cells >= 0) & (cells < self._dims), axis = 1)
+
+        keys = self._get_keys(cells[valid])
+
+        return self._get_key_points(keys)[0]
+
+    def _get_key_points(self, keys):
+        """
+        Returns:
+            tuple: (point indices, index into keys for each point)
+        """
+
+        left = numpy.searchsorted(self._keys, keys, 'left')
+        right = numpy.searchsorted(self._keys, keys, 'right')
+
+        counts = right - left
+        total = int(counts.sum())
+
+        owners = numpy.repeat(numpy.arange(len(keys)), counts)
+
+        offsets = numpy.arange(total) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+
+        return self._order[numpy.repeat(left, counts) + offsets], owners
+
+    def _get_sorted(self, position, indices, max_distance = None):
+        """
+        Returns:
+            list: [distance, index] pairs sorted by distance then index.
+        """
+
+        if numpy is not None:
+
+            indices = numpy.asarray(indices, dtype = numpy.int64)
+
+            distances = numpy.sqrt(((self.points[indices] - position)**2).sum(axis = 1))
+
+            if max_distance is not None:
+                within = distances <= max_distance
+                indices = indices[within]
+                distances = distances[within]
+
+            order = numpy.lexsort((indices, distances))
+
+            return list(zip(distances[order].tolist(), indices[order].tolist()))
+
+        found = []
+
+        for index in indices:
+
+            point = self.points[index]
+
+            distance = math.sqrt((point[0] - position[0])**2 +
+                                 (point[1] - position[1])**2 +
+                                 (point[2] - position[2])**2)
+
+            if max_distance is not None and distance > max_distance:
+                continue
+
+            found.append((distance, index))
+
+        found.sort()
+
+        return found
+
+    def _get_min_ring(self, cell):
+        """
+        The first ring around cell that reaches the grid.
+        """
+
+        min_ring = 0
+
+        for inc in range(3):
+            min_ring = max(min_ring, -cell[inc], cell[inc] - (self._dims[inc] - 1))
+
+        return min_ring
+
+    def _get_max_ring(self, cell):
+
+        max_ring = 0
+
+        for inc in range(3):
+            max_ring = max(max_ring, abs(cell[inc]), abs(self._dims[inc] - 1 - cell[inc]))
+
+        return max_ring
+
+    def query_radius(self, position, radius):
+        """
+        Get the points within radius of position.
+
+        Returns:
+            list: Point indices, closest first.
+        """
+
+        if not self.count:
+            return []
+
+        low = self._get_cell([position[inc] - radius for inc in range(3)])
+        high = self._get_cell([position[inc] + radius for inc in range(3)])
+
+        ranges = []
+
+        for inc in range(3):
+            ranges.append(range(max(low[inc], 0), min(high[inc], self._dims[inc] - 1) + 1))
+
+        cells = list(itertools.product(*ranges))
+
+        if not cells:
+            return []
+
+        return [index for distance, index in self._get_sorted(position, self._get_cell_points(cells), radius)]
+
+    def query_k_nearest(self, position, count, max_distance = None):
+        """
+        Get the count closest points to position.
+
+        Args:
+            position (list): [x,y,z]
+            count (int): How many points to get.
+            max_distance (float): Ignore points further than this.
+
+        Returns:
+            list: Point indices, closest first. Can be shorter than count.
+        """
+
+        if not self.count or count < 1:
+            return []
+
+        cell = self._get_cell(position)
+        max_ring = self._get_max_ring(cell)
+
+        found = []
+
+        #rings closer than min_ring are outside the grid
+        for ring in range(self._get_min_ring(cell), max_ring + 1):
+
+            #points in this ring and beyond are at least this far
+            ring_distance = (ring - 1) * self.cell_size
+
+            if max_distance is not None and ring_distance > max_distance:
+                break
+
+            if len(found) >= count and found[count - 1][0] <= ring_distance:
+                break
+
+            indices = self._get_cell_points(_get_ring_cells(cell, ring, self._dims))
+
+            if len(indices):
+                found = sorted(found + self._get_sorted(position, indices, max_distance))
+
+        return [index for distance, index in found[:count]]
+
+    def query_nearest(self, position, max_distance = None):
+        """
+        Get the closest point to position.
+
+        Args:
+            position (list): [x,y,z]
+            max_distance (float): Ignore points further than this.
+
+        Returns:
+            int: The point index, or None if no point was found.
+        """
+
+        found = self.query_k_nearest(position, 1, max_distance)
+
+        if found:
+            return found[0]
+
+    def query_nearest_many(self, positions, max_distance = None):
+        """
+        Get the closest point to each position.
+
+        Returns:
+            list: A point index for each position, None where no point was found.
+        """
+
+        return [self.query_nearest(position, max_distance) for position in positions]
+
+    def get_matches(self, positions, tolerance = 0.00001):
+        """
+        Find the point that sits at each position, within tolerance.
+
+        Args:
+            positions (list): [x,y,z] positions, or a numpy array with shape (n, 3)
+            tolerance (float): The max distance between a position and its point.
+
+        Returns:
+            list: A point index for each position, -1 where there is no point. A numpy int array when numpy is available.
+        """
+
+        if numpy is None or tolerance > self.cell_size:
+
+            found = self.query_nearest_many(positions, tolerance)
+            found = [-1 if index is None else index for index in found]
+
+            if numpy is not None:
+                found = numpy.array(found, dtype = numpy.int64)
+
+            return found
+
+        positions = numpy.asarray(positions, dtype = numpy.float64).reshape(-1, 3)
+
+        matches = numpy.full(len(positions), -1, dtype = numpy.int64)
+
+        if not self.count or not len(positions):
+            return matches
+
+        #the tolerance box around a position touches at most two cells per axis
+        corners = []
+        for offset in itertools.product((-tolerance, tolerance), repeat = 3):
+            corners.append(numpy.floor((positions + offset - self._min) / self.cell_size).astype(numpy.int64))
+
+        cells = numpy.stack(corners, axis = 1).reshape(-1, 3)
+        owners = numpy.repeat(numpy.arange(len(positions)), 8)
+
+        valid = numpy.all((cells >= 0) & (cells < self._dims), axis = 1)
+
+        cells = cells[valid]
+        owners = owners[valid]
+
+        keys = self._get_keys(cells)
+
+        #corners in the same cell give the same key
+        unique = numpy.unique(owners * (int(numpy.prod(self._dims)) + 1) + keys, return_index = True)[1]
+        keys = keys[unique]
+        owners = owners[unique]
+
+        indices, key_owners = self._get_key_points(keys)
+        owners = owners[key_owners]
+
+        distances = numpy.sqrt(((self.points[indices] - positions[owners])**2).sum(axis = 1))
+
+        within = distances <= tolerance
+
+        indices = indices[within]
+        owners = owners[within]
+        distances = distances[within]
+
+        order = numpy.lexsort((indices, distances, owners))
+
+        owners = owners[order]
+        first = numpy.ones(len(owners), dtype = bool)
+        first[1:] = owners[1:] != owners[:-1]
+
+        matches[owners[first]] = indices[order][first]
+
+        return matches
+
+def get_mirror_matches(points, axis = 'x', tolerance = 0.00001):
+    """
+    Find the point on the other side of the axis for every point.
+
+    Args:
+        points (list): [x,y,z] positions, or a numpy array with shape (n, 3)
+        axis (str): The axis to mirror across, 'x', 'y' or 'z'
+        tolerance (float): Max distance between a mirrored point and its match.
+
+    Returns:
+        list: The index of the mirror point for each point, -1 where there is none.
+        Points on the mirror plane match themselves. A numpy int array when numpy is available.
+    """
+
+    axis_index = 'xyz'.index(axis.lower())
+
+    index = SpatialIndex(points)
+
+    if numpy is not None:
+        mirrored = numpy.array(index.points)
+        mirrored[:,axis_index] *= -1
+    else:
+        mirrored = []
+        for point in index.points:
+            point = list(point)
+            point[axis_index] *= -1
+            mirrored.append(point)
+
+    return index.get_matches(mirrored, tolerance)
@@ -0,0 +1,846 @@
+# Copyright (C) 2022 Louis Vottero louis.vot@gmail.com    All rights reserved.
+
+"""
+    Maya independent helpers for storing and working with deformer weights.
+"""
+
+from __future__ import print_function
+from __future__ import absolute_import
+
+import sys
+import json
+import zlib
+import array
+import struct
+
+try:
+    import numpy
+except:
+    numpy = None
+
+from . import util
+
+BINARY_WEIGHTS_FILE = 'weights.csr'
+
+_magic = b'VCSR'
+_format_version = 2
+_header_struct = '<4sII'
+_alignment = 8
+
+#name, array typecode, numpy dtype
+_array_types = {'positions' : ['d', '<f8'],
+                'indptr' : ['I', '<u4'],
+                'indices' : ['H', '<u2'],
+                'weights' : ['f', '<f4']}
+
+_array_order = ['positions', 'indptr', 'indices', 'weights']
+
+_typecode_dtypes = dict(_array_types.values())
+
+def has_numpy():
+    """
+    Check if numpy is available.
+
+    Returns:
+        bool:
+    """
+    if numpy:
+        return True
+
+    return False
+
+def _get_padding(size):
+
+    remainder = size % _alignment
+
+    if not remainder:
+        return 0
+
+    return _alignment - remainder
+
+def _to_array(typecode, values):
+
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        return numpy.ascontiguousarray(values, dtype = _typecode_dtypes[typecode])
+
+    array_value = array.array(typecode, values)
+
+    if sys.byteorder == 'big':
+        array_value.byteswap()
+
+    return array_value
+
+def _columns_to_csr(weights, vert_count):
+
+    if numpy is not None:
+
+        #only the non zero entries of each column are gathered, so no dense vert by influence matrix is built
+        verts = []
+        indices = []
+        values = []
+
+        for inc in range(0, len(weights)):
+
+            column = numpy.asarray(weights[inc], dtype = numpy.float32)
+            found_verts = numpy.flatnonzero(column)
+
+            verts.append(found_verts)
+            indices.append(numpy.full(len(found_verts), inc, dtype = numpy.uint16))
+            values.append(column[found_verts])
+
+        if not verts:
+            return numpy.zeros(vert_count + 1, dtype = numpy.uint32), numpy.zeros(0, dtype = numpy.uint16), numpy.zeros(0, dtype = numpy.float32)
+
+        verts = numpy.concatenate(verts)
+        indices = numpy.concatenate(indices)
+        values = numpy.concatenate(values)
+
+        #a stable sort keeps the influences of each vertex in column order
+        order = numpy.argsort(verts, kind = 'stable')
+
+        counts = numpy.bincount(verts, minlength = vert_count)
+        indptr = numpy.zeros(vert_count + 1, dtype = numpy.uint32)
+        numpy.cumsum(counts, out = indptr[1:])
+
+        return indptr, indices[order], values[order]
+
+    rows = [[] for _ in range(vert_count)]
+
+    for inc in range(0, len(weights)):
+
+        for vert_index, weight in enumerate(weights[inc]):
+            if weight:
+                rows[vert_index].append((inc, weight))
+
+    indptr = [0]
+    indices = []
+    values = []
+
+    for row in rows:
+        for influence_index, weight in row:
+            indices.append(influence_index)
+            values.append(weight)
+
+        indptr.append(len(indices))
+
+    return indptr, indices, values
+
+class SkinWeightsCsr(object):
+    """
+    Skin weights stored as a compressed sparse row matrix.
+    Each row is a vertex and each column an influence.
+    Only non zero weights are stored.
+
+    Arrays are numpy arrays when numpy is available, otherwise python arrays.
+    """
+
+    def __init__(self, influences, positions, indptr, indices, weights, vert_count):
+
+        self.influences = influences
+        self.positions = positions
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.vert_count = vert_count
+
+    def get_position(self, influence):
+
+        if not influence in self.influences:
+            return
+
+        index = self.influences.index(influence)
+
+        return [float(value) for value in self.positions[index*3:index*3+3]]
+
+    def get_influence_count(self):
+        return len(self.influences)
+
+    def get_dense(self):
+        """
+        Get the full weight matrix.
+
+        Returns:
+            numpy.ndarray: Float32 array of shape (vert_count, influence_count)
+        """
+
+        if numpy is None:
+            util.warning('Numpy is needed to get the dense weight matrix.')
+            return
+
+        influence_count = len(self.influences)
+
+        dense = numpy.zeros((self.vert_count, influence_count), dtype = numpy.float32)
+
+        indptr = numpy.asarray(self.indptr, dtype = numpy.int64)
+        rows = numpy.repeat(numpy.arange(self.vert_count), numpy.diff(indptr))
+
+        dense[rows, numpy.asarray(self.indices, dtype = numpy.int64)] = self.weights
+
+        return dense
+
+    def get_influence_weights(self):
+        """
+        Get the weights per influence, the same layout the text weight files use.
+
+        Returns:
+            dict: dict[influence_name] = weights in point order. Numpy arrays when numpy is available, otherwise lists.
+        """
+
+        found = {}
+
+        if numpy is not None:
+
+            dense = self.get_dense()
+
+            for inc in range(0, len(self.influences)):
+                found[self.influences[inc]] = dense[:,inc]
+
+            return found
+
+        columns = []
+
+        for influence in self.influences:
+            columns.append([0.0] * self.vert_count)
+
+        for vert_index in range(0, self.vert_count):
+
+            for inc in range(self.indptr[vert_index], self.indptr[vert_index+1]):
+                columns[self.indices[inc]][vert_index] = self.weights[inc]
+
+        for inc in range(0, len(self.influences)):
+            found[self.influences[inc]] = columns[inc]
+
+        return found
+
+def _to_bytes(array_value):
+
+    if hasattr(array_value, 'tobytes'):
+        return array_value.tobytes()
+
+    return array_value.tostring()
+
+def write_skin_weights(filepath, influences, positions, weights, vert_count, compress = False):
+    """
+    Write skin weights to a single binary file.
+    The file has a small json header followed by the positions, indptr, indices and weights arrays.
+    Arrays are little endian and aligned so they can be read with numpy.memmap.
+
+    Args:
+        filepath (str): The file to write.
+        influences (list): Influence names.
+        positions (list): A world position [x,y,z] for each influence.
+        weights (list): A list of weights in point order for each influence.
+        vert_count (int): The number of points on the geometry.
+        compress (bool): Compress the arrays with zlib. Smaller files, but they are read into memory instead of mapped.
+            Versions of Vetala before compression was added can not read them.
+
+    Returns:
+        str: The filepath.
+    """
+
+    indptr, indices, values = _columns_to_csr(weights, vert_count)
+
+    flat_positions = []
+    for position in positions:
+        flat_positions += [float(value) for value in position]
+
+    arrays = {'positions' : _to_array('d', flat_positions),
+              'indptr' : _to_array('I', indptr),
+              'indices' : _to_array('H', indices),
+              'weights' : _to_array('f', values)}
+
+    array_info = {}
+    offset = 0
+
+    for name in _array_order:
+
+        count = len(arrays[name])
+        array_info[name] = [offset, _array_types[name][1], count]
+
+        size = count * arrays[name].itemsize
+        offset += size + _get_padding(size)
+
+    header = {'vert_count' : vert_count,
+              'influences' : list(influences),
+              'arrays' : array_info}
+
+    #uncompressed files keep version 1 so older versions of Vetala still read them
+    version = 1
+
+    if compress:
+        header['compression'] = 'zlib'
+        version = _format_version
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    header_bytes += b' ' * _get_padding(struct.calcsize(_header_struct) + len(header_bytes))
+
+    with open(filepath, 'wb') as open_file:
+
+        open_file.write(struct.pack(_header_struct, _magic, version, len(header_bytes)))
+        open_file.write(header_bytes)
+
+        if compress:
+            data = []
+
+            for name in _array_order:
+                data.append(_to_bytes(arrays[name]))
+                data.append(b'\0' * _get_padding(len(data[-1])))
+
+            open_file.write(zlib.compress(b''.join(data)))
+
+            return filepath
+
+        for name in _array_order:
+
+            arrays[name].tofile(open_file)
+
+            size = len(arrays[name]) * arrays[name].itemsize
+            open_file.write(b'\0' * _get_padding(size))
+
+    return filepath
+
+def _from_bytes(name, data):
+
+    if numpy is not None:
+        return numpy.frombuffer(data, dtype = _array_types[name][1])
+
+    array_value = array.array(_array_types[name][0])
+
+    if hasattr(array_value, 'frombytes'):
+        array_value.frombytes(data)
+    else:
+        array_value.fromstring(data)
+
+    if sys.byteorder == 'big':
+        array_value.byteswap()
+
+    return array_value
+
+def read_skin_weights(filepath, memory_map = True):
+    """
+    Read skin weights written with write_skin_weights.
+
+    Args:
+        filepath (str): The file to read.
+        memory_map (bool): Wether to map the arrays with numpy.memmap instead of reading them into memory. Needs numpy.
+            Compressed files are always read into memory.
+
+    Returns:
+        SkinWeightsCsr: None if the file is not a binary weights file.
+    """
+
+    with open(filepath, 'rb') as open_file:
+
+        header_size = struct.calcsize(_header_struct)
+        magic, version, json_size = struct.unpack(_header_struct, open_file.read(header_size))
+
+        if magic != _magic:
+            util.warning('Not a binary weights file: %s' % filepath)
+            return
+
+        if version > _format_version:
+            util.warning('Binary weights file was written by a newer version of Vetala: %s' % filepath)
+            return
+
+        header = json.loads(open_file.read(json_size).decode('utf-8'))
+        data_offset = header_size + json_size
+
+        data = None
+
+        if header.get('compression') == 'zlib':
+            data = zlib.decompress(open_file.read())
+
+        arrays = {}
+
+        for name in _array_order:
+
+            offset, dtype, count = header['arrays'][name]
+
+            if data is not None:
+                arrays[name] = _from_bytes(name, data[offset:offset + count * array.array(_array_types[name][0]).itemsize])
+                continue
+
+            if numpy is not None:
+
+                if memory_map and count:
+                    arrays[name] = numpy.memmap(filepath, dtype = dtype, mode = 'r',
+                                                offset = data_offset + offset, shape = (count,))
+                else:
+                    open_file.seek(data_offset + offset)
+                    arrays[name] = numpy.fromfile(open_file, dtype = dtype, count = count)
+
+                continue
+
+            array_value = array.array(_array_types[name][0])
+            open_file.seek(data_offset + offset)
+            array_value.fromfile(open_file, count)
+
+            if sys.byteorder == 'big':
+                array_value.byteswap()
+
+            arrays[name] = array_value
+
+    return SkinWeightsCsr(header['influences'],
+                          arrays['positions'],
+                          arrays['indptr'],
+                          arrays['indices'],
+                          arrays['weights'],
+                          header['vert_count'])
+
+#--- weight matrix
+
+def get_weight_matrix(weights, vert_count = None):
+    """
+    Get a (vert_count, influence_count) float64 weight matrix.
+
+    Args:
+        weights: A SkinWeightsCsr, a numpy array that is already a matrix, 
+            or a list with the weights in point order for each influence.
+        vert_count (int): Only used when weights is an empty list.
+
+    Returns:
+        numpy.ndarray:
+    """
+
+    if isinstance(weights, SkinWeightsCsr):
+        return weights.get_dense().astype(numpy.float64)
+
+    if isinstance(weights, numpy.ndarray):
+        return numpy.array(weights, dtype = numpy.float64, ndmin = 2)
+
+    if not weights:
+        return numpy.zeros((vert_count or 0, 0), dtype = numpy.float64)
+
+    matrix = numpy.empty((len(weights[0]), len(weights)), dtype = numpy.float64)
+
+    for inc in range(0, len(weights)):
+        matrix[:,inc] = weights[inc]
+
+    return matrix
+
+def prune_weights(matrix, value = 0.0001):
+    """
+    Set weights below value to zero. Edits the matrix in place.
+
+    Returns:
+        numpy.ndarray: The matrix.
+    """
+
+    matrix[matrix < value] = 0.0
+
+    return matrix
+
+def normalize_weights(matrix, locked = None):
+    """
+    Scale each row so its weights add up to one. Rows with no weight are left at zero. Edits the matrix in place.
+
+    Args:
+        matrix (numpy.ndarray): A weight matrix.
+        locked (list): A bool for each influence. Locked influences are left alone and the others fill what they leave.
+
+    Returns:
+        numpy.ndarray: The matrix.
+    """
+
+    if locked is None:
+        totals = matrix.sum(axis = 1)
+        has_weight = totals > 0
+
+        matrix[has_weight] /= totals[has_weight][:,None]
+
+        return matrix
+
+    locked = numpy.asarray(locked, dtype = bool)
+    unlocked = ~locked
+
+    remaining = numpy.maximum(1.0 - matrix[:,locked].sum(axis = 1), 0.0)
+    totals = matrix[:,unlocked].sum(axis = 1)
+
+    has_weight = totals > 0
+
+    scale = numpy.zeros(len(matrix), dtype = matrix.dtype)
+    scale[has_weight] = remaining[has_weight] / totals[has_weight]
+
+    matrix[:,unlocked] *= scale[:,None]
+
+    return matrix
+
+def limit_weights(matrix, max_influences):
+    """
+    Keep only the max_influences biggest weights on each row. Edits the matrix in place.
+
+    Returns:
+        numpy.ndarray: The matrix.
+    """
+
+    if not max_influences or max_influences >= matrix.shape[1]:
+        return matrix
+
+    smallest = numpy.argpartition(matrix, matrix.shape[1] - max_influences, axis = 1)
+    smallest = smallest[:,:matrix.shape[1] - max_influences]
+
+    numpy.put_along_axis(matrix, smallest, 0.0, axis = 1)
+
+    return matrix
+
+def _get_ring_sums(matrix, ring_offsets, ring_indices, chunk_size = 512):
+    """
+    Add up the rows of matrix listed for each ring.
+    Rings are done a chunk at a time so the gathered rows stay small.
+    """
+
+    ring_offsets = numpy.asarray(ring_offsets, dtype = numpy.int64)
+    ring_indices = numpy.asarray(ring_indices, dtype = numpy.int64)
+
+    counts = numpy.diff(ring_offsets)
+
+    sums = numpy.zeros((len(counts), matrix.shape[1]), dtype = matrix.dtype)
+
+    for start in range(0, len(counts), chunk_size):
+
+        end = min(start + chunk_size, len(counts))
+
+        offsets = ring_offsets[start:end + 1]
+        has_ring = counts[start:end] > 0
+
+        if not has_ring.any():
+            continue
+
+        rows = matrix[ring_indices[offsets[0]:offsets[-1]]]
+
+        #empty rings share their offset with the next ring so they can be skipped
+        sums[start:end][has_ring] = numpy.add.reduceat(rows, offsets[:-1][has_ring] - offsets[0], axis = 0)
+
+    return sums, counts
+
+def _finish_weights(new_weights, current, percent, locked, normalize, max_influences, prune):
+
+    if isinstance(percent, numpy.ndarray) or percent != 1:
+        new_weights = new_weights * percent + current * (1 - percent)
+
+    if prune:
+        prune_weights(new_weights, prune)
+
+    if max_influences:
+        limit_weights(new_weights, max_influences)
+
+    if locked is not None:
+        new_weights[:,locked] = current[:,locked]
+
+    if normalize:
+        normalize_weights(new_weights, locked)
+
+    return new_weights
+
+def _get_filter_settings(matrix, vert_indices, percent, mask, locked):
+
+    if vert_indices is None:
+        vert_indices = numpy.arange(len(matrix))
+    else:
+        vert_indices = numpy.asarray(vert_indices, dtype = numpy.int64)
+
+    if mask is not None:
+        percent = numpy.clip(numpy.asarray(mask, dtype = numpy.float64) * percent, 0, 1)[:,None]
+
+    if locked is not None:
+        locked = numpy.asarray(locked, dtype = bool)
+
+        if not locked.any():
+            locked = None
+
+    return vert_indices, percent, locked
+
+def smooth_weights(matrix, ring_offsets, ring_indices, vert_indices = None, iterations = 1, percent = 1.0,
+                   mask = None, locked = None, normalize = True, max_influences = None, prune = 0.0):
+    """
+    Average the weights of each vertex with the weights of the vertices around it.
+    Every iteration reads the weights left by the one before.
+
+    Args:
+        matrix (numpy.ndarray): A (vert_count, influence_count) weight matrix, see get_weight_matrix
+        ring_offsets (list): Offsets into ring_indices, one ring per entry in vert_indices plus one.
+        ring_indices (list): The vertices around each vertex, see util_mesh.MeshTopology.get_vertex_rings
+        vert_indices (list): The vertices to smooth. By default all of them.
+        iterations (int): How many times to smooth.
+        percent (float): How much of the smoothed weight to use, 1 is all of it.
+        mask (list): A value for each entry in vert_indices that scales percent.
+        locked (list): A bool for each influence. Locked influences keep their weights.
+        normalize (bool): Wether to make the weights of each vertex add up to one.
+        max_influences (int): Keep only this many influences on each vertex.
+        prune (float): Weights below this value are set to zero.
+
+    Returns:
+        numpy.ndarray: A new weight matrix.
+    """
+
+    matrix = numpy.array(matrix, dtype = numpy.float64)
+
+    vert_indices, percent, locked = _get_filter_settings(matrix, vert_indices, percent, mask, locked)
+
+    for inc in range(0, iterations):
+
+        current = matrix[vert_indices]
+
+        sums, counts = _get_ring_sums(matrix, ring_offsets, ring_indices)
+
+        average = numpy.minimum((sums + current) / (counts + 1.0)[:,None], 1.0)
+
+        matrix[vert_indices] = _finish_weights(average, current, percent, locked, normalize, max_influences, prune)
+
+    return matrix
+
+def sharpen_weights(matrix, vert_indices = None, iterations = 1, percent = 1.0,
+                    mask = None, locked = None, normalize = True, max_influences = None, prune = 0.0):
+    """
+    Push the weights of each vertex toward its strongest influences by squaring them and scaling them back to one.
+    Takes the same arguments as smooth_weights, without the rings.
+
+    Returns:
+        numpy.ndarray: A new weight matrix.
+    """
+
+    matrix = numpy.array(matrix, dtype = numpy.float64)
+
+    vert_indices, percent, locked = _get_filter_settings(matrix, vert_indices, percent, mask, locked)
+
+    for inc in range(0, iterations):
+
+        current = matrix[vert_indices]
+
+        risen = current**2
+        totals = risen.sum(axis = 1)
+
+        has_weight = totals > 0
+        risen[has_weight] /= totals[has_weight][:,None]
+
+        matrix[vert_indices] = _finish_weights(risen, current, percent, locked, normalize, max_influences, prune)
+
+    return matrix
+
+def assemble_weights(weights, vert_count = None, prune = 0.0, normalize = False):
+    """
+    Get the flat weight buffer Maya expects when setting all weights at once. 
+    Weights for vertex 0 on every influence come first, then vertex 1, and so on.
+
+    Args:
+        weights: Anything get_weight_matrix accepts.
+        vert_count (int): Only used when weights is an empty list.
+        prune (float): Weights below this value are set to zero.
+        normalize (bool): Wether to normalize each vertex after pruning.
+
+    Returns:
+        numpy.ndarray: A flat float64 array of length vert_count * influence_count.
+    """
+
+    matrix = get_weight_matrix(weights, vert_count)
+
+    if prune:
+        prune_weights(matrix, prune)
+
+    if normalize:
+        normalize_weights(matrix)
+
+    return numpy.ascontiguousarray(matrix).ravel()
+
+def get_nonzero_weights(matrix):
+    """
+    Get the non zero entries of a weight matrix.
+
+    Returns:
+        tuple: (vert_indices, influence_indices, weights) as numpy arrays, sorted by vertex.
+    """
+
+    verts, influences = numpy.nonzero(matrix)
+
+    return verts, influences, matrix[verts, influences]
+
+#--- auto weights
+
+def fade_cosine(values):
+    """
+    Array version of util_math.fade_cosine
+    """
+
+    return (1 - numpy.cos(numpy.pi * values)) * 0.5
+
+def fade_smoothstep(values):
+    """
+    Array version of util_math.fade_smoothstep
+    """
+
+    return values * values * (3 - 2 * values)
+
+def _set_segment_weight(matrix, assigned, totals, column, value, points):
+
+    points = points & (totals <= 1)
+
+    matrix[points, column] = value[points] if isinstance(value, numpy.ndarray) else value
+    assigned[points, column] = True
+
+def get_segment_weights(positions, joint_positions, fade = None, multiplier = None, prune = None):
+    """
+    Weight points along a chain of joints in 2D, the way deform.AutoWeight2D does.
+    Each point is projected onto every segment of the chain and the two joints of a segment share the point by how far along it is.
+    Points before the first joint go to the first joint and points past the last joint to the last joint.
+    Segments are checked in order and a weight that would bring a point's total over one is skipped.
+
+    Args:
+        positions (list): [x,y] for each point, or a numpy array with shape (n, 2)
+        joint_positions (list): [x,y] for each joint in chain order.
+        fade (str): None, 'cosine' or 'smoothstep'
+        multiplier (list): A value for each point that the weights are scaled by. Points under 0.0001 get no weights.
+        prune (list): A value for each point. Points at zero or less get no weights.
+
+    Returns:
+        tuple: (weights, assigned) Two (point_count, joint_count) arrays. 
+        weights holds the weights and assigned is True where a weight was given, even a zero weight.
+    """
+
+    positions = numpy.asarray(positions, dtype = numpy.float64).reshape(-1, 2)
+    joint_positions = numpy.asarray(joint_positions, dtype = numpy.float64).reshape(-1, 2)
+
+    point_count = len(positions)
+    joint_count = len(joint_positions)
+
+    matrix = numpy.zeros((point_count, joint_count), dtype = numpy.float64)
+    assigned = numpy.zeros((point_count, joint_count), dtype = bool)
+    totals = numpy.zeros(point_count, dtype = numpy.float64)
+
+    active = numpy.ones(point_count, dtype = bool)
+
+    if prune is not None:
+        active &= numpy.asarray(prune, dtype = numpy.float64) > 0.0
+
+    if multiplier is not None:
+        multiplier = numpy.asarray(multiplier, dtype = numpy.float64)
+        active &= multiplier >= 0.0001
+
+    for inc in range(0, joint_count - 1):
+
+        start = joint_positions[inc]
+        start_to_end = joint_positions[inc+1] - start
+
+        with numpy.errstate(divide = 'ignore', invalid = 'ignore'):
+            percent = ((positions - start) * start_to_end).sum(axis = 1) / start_to_end.dot(start_to_end)
+
+        before = active & (percent <= 0)
+        totals[before] += 1.0
+        _set_segment_weight(matrix, assigned, totals, inc, 1.0, before)
+
+        between = active & ~before
+
+        if inc == joint_count - 2:
+            after = between & (percent >= 1)
+            totals[after] += 1.0
+            _set_segment_weight(matrix, assigned, totals, inc + 1, 1.0, after)
+
+            between &= ~after
+
+        between &= ~(percent > 1)
+
+        if fade == 'cosine':
+            percent = fade_cosine(percent)
+        if fade == 'smoothstep':
+            percent = fade_smoothstep(percent)
+
+        totals[between] += 1.0 - percent[between]
+        _set_segment_weight(matrix, assigned, totals, inc, 1.0 - percent, between)
+
+        totals[between] += percent[between]
+        _set_segment_weight(matrix, assigned, totals, inc + 1, percent, between)
+
+    if multiplier is not None:
+        matrix *= multiplier[:,None]
+
+    return matrix, assigned
+
+#--- transfer
+
+def get_distances(positions, joint_positions):
+    """
+    Get the distance from every point to every joint.
+
+    Args:
+        positions (list): [x,y,z] for each point, or a numpy array with shape (n, 3)
+        joint_positions (list): [x,y,z] for each joint.
+
+    Returns:
+        numpy.ndarray: (point_count, joint_count) distances.
+    """
+
+    positions = numpy.asarray(positions, dtype = numpy.float64).reshape(-1, 3)
+    joint_positions = numpy.asarray(joint_positions, dtype = numpy.float64).reshape(-1, 3)
+
+    distances = numpy.empty((len(positions), len(joint_positions)), dtype = numpy.float64)
+
+    for inc in range(0, len(joint_positions)):
+        distances[:,inc] = numpy.sqrt(((positions - joint_positions[inc])**2).sum(axis = 1))
+
+    return distances
+
+def get_falloff_weights(distances, falloff = 1, power = 4, exact = False):
+    """
+    Share each point between joints by distance, the way deform.TransferWeight does.
+    A joint's weight is (1 - distance/falloff)**power, then each point is scaled to add up to one.
+
+    Args:
+        distances (numpy.ndarray): (point_count, joint_count) distances, see get_distances
+        falloff (float): The distance where a joint stops getting weight.
+        power (int): Higher values give more weight to the closest joints.
+        exact (bool): By default distance is measured from the closest joint, so every point gets weight.
+            With exact it is measured from the point, and points with no joint in falloff go fully to the closest joint.
+
+    Returns:
+        numpy.ndarray: (point_count, joint_count) weights.
+    """
+
+    distances = numpy.asarray(distances, dtype = numpy.float64)
+
+    nearest = numpy.argmin(distances, axis = 1)
+
+    if not exact:
+        distances = distances - distances.min(axis = 1)[:,None]
+
+    in_range = distances <= falloff
+
+    weights = numpy.zeros(distances.shape, dtype = numpy.float64)
+    weights[in_range] = (1.0 - numpy.minimum(distances[in_range] / float(falloff), 1.0))**power
+
+    totals = weights.sum(axis = 1)
+
+    #also catches points where every joint in range sits right on the falloff
+    empty = numpy.nonzero(totals <= 0)[0]
+
+    weights[empty] = 0.0
+    weights[empty, nearest[empty]] = 1.0
+    totals[empty] = 1.0
+
+    return weights / totals[:,None]
+
+def transfer_weights(matrix, source_columns, target_columns, target_weights, vert_indices, percent = 1.0):
+    """
+    Move weight from source influences onto target influences. Edits the matrix in place.
+    Each vertex keeps (1 - percent) of its source weights and the rest of their total is shared between the targets.
+
+    Args:
+        matrix (numpy.ndarray): A (vert_count, influence_count) weight matrix.
+        source_columns (list): The columns to take weight from.
+        target_columns (list): The columns to give weight to. Their current weights are replaced.
+        target_weights (numpy.ndarray): How to share the weight, one row per entry in vert_indices and one column per target. See get_falloff_weights
+        vert_indices (list): The vertices to transfer on.
+        percent (float): How much of the source weight to move.
+
+    Returns:
+        numpy.ndarray: The matrix.
+    """
+
+    rows = matrix[vert_indices]
+
+    totals = rows[:,source_columns].sum(axis = 1)
+
+    rows[:,source_columns] *= 1.0 - percent
+    rows[:,target_columns] = totals[:,None] * target_weights * percent
+
+    matrix[vert_indices] = rows
+
+    return matrix
@@ -0,0 +1,39 @@
+# Copyright (C) 2022 Louis Vottero louis.vot@gmail.com    All rights reserved.
+
+"""
+    Tests for the Maya independent modules of vtool. They run outside of Maya on synthetic data.
+
+    Run from the root of the repository:
+
+        python -m pytest
+"""
+
+from __future__ import absolute_import
+
+import os
+import sys
+
+python_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'python')
+
+if python_path not in sys.path:
+    sys.path.insert(0, python_path)
+
+import pytest
+
+@pytest.fixture(params = ['numpy', 'python'])
+def numpy_mode(request, monkeypatch):
+    """
+    Run a test once with numpy and once with the pure python fallback of util_mesh and util_spatial.
+    """
+
+    from vtool import util_mesh
+    from vtool import util_spatial
+
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+
+    if request.param == 'python':
+        monkeypatch.setattr(util_mesh, 'numpy', None)
+        monkeypatch.setattr(util_spatial, 'numpy', None)
+
+    return request.param
@@ -0,0 +1,60 @@
+# Copyright (C) 2022 Louis Vottero louis.vot@gmail.com    All rights reserved.
+
+"""
+    process.ProcessManifest reloads, checked against edits made outside of Vetala.
+"""
+
+from __future__ import absolute_import
+
+import os
+
+from vtool.process_manager import process
+from vtool.process_manager import process_profile
+
+def write_manifest(filepath, text, stamp = None):
+
+    with open(filepath, 'w') as open_file:
+        open_file.write(text)
+
+    if stamp:
+        os.utime(filepath, (stamp, stamp))
+
+def test_manifest_same_size_edit(tmp_path):
+
+    filepath = str(tmp_path / 'manifest.data')
+
+    write_manifest(filepath, 'a.py True\nb.py False\n')
+
+    manifest = process.ProcessManifest(filepath)
+    manifest.load()
+
+    assert manifest.scripts == ['a.py', 'b.py']
+    assert manifest.states == [True, False]
+
+    #reordered in the same mtime tick, so the mtime and size do not change
+    write_manifest(filepath, 'b.py True\na.py False\n', os.path.getmtime(filepath))
+
+    manifest.load()
+
+    assert manifest.scripts == ['b.py', 'a.py']
+    assert manifest.states == [True, False]
+
+def test_profile_nested_stacks():
+
+    profile = process_profile.BuildProfile('build', 'time')
+    profile.start()
+
+    profile.start_script('group')
+    profile.start_script('sub_group')
+    profile.start_script('script.py')
+    profile.end_script()
+    profile.end_script()
+    profile.end_script()
+
+    profile.end()
+
+    profile.scripts[0].wall = 0.5
+
+    assert profile.scripts[0].parents == ['group', 'sub_group']
+    assert 'build;group;sub_group;script.py 500' in profile.get_collapsed_stacks()
+
@@ -0,0 +1,69 @@
+# Copyright (C) 2022 Louis Vottero louis.vot@gmail.com    All rights reserved.
+
+"""
+    util_code.get_put_assignments on the text of process scripts.
+"""
+
+from __future__ import absolute_import
+
+import os
+
+from vtool import util_code
+
+script = '''
+put.a = 1
+put.b += 2
+put.c, put.d = 1, 2
+[put.e, put.f] = get_values()
+put.g = put.h = 3
+value = put.a
+if put.a == 1:
+    run(put.b, count=1)
+
+def main():
+    put.i = 5
+'''
+
+def test_put_assignments():
+
+    expected = [['a', 2], ['b', 3], ['c', 4], ['d', 4], ['e', 5], ['f', 5], ['g', 6], ['h', 6], ['i', 12]]
+
+    assert util_code.get_put_assignments(script) == expected
+
+def test_put_assignments_syntax_error():
+
+    found = util_code.get_put_assignments(script + 'def broken(:\n')
+
+    #chained assignments only find the first name without the parser
+    assert found == [['a', 2], ['b', 3], ['c', 4], ['d', 4], ['e', 5], ['f', 5], ['g', 6], ['i', 12]]
+
+def test_no_puts():
+
+    assert util_code.get_put_assignments('value = 1\n') == []
+
+def test_symbol_index_same_size_edit(tmp_path):
+
+    filepath = str(tmp_path / 'script.py')
+
+    with open(filepath, 'w') as open_file:
+        open_file.write('put.a = 1\n')
+
+    index = util_code.SymbolIndex()
+
+    assert index.get_symbols(filepath) is not None
+    assert index.get_puts([filepath]) == {'a' : [[filepath, 1]]}
+
+    #edited in the same mtime tick without changing the size
+    mtime = os.path.getmtime(filepath)
+
+    with open(filepath, 'w') as open_file:
+        open_file.write('put.b = 1\n')
+
+    os.utime(filepath, (mtime, mtime))
+
+    assert not index.is_current(filepath)
+
+    index.get_symbols(filepath)
+
+    assert index.get_puts([filepath]) == {'b' : [[filepath, 1]]}
+
@@ -0,0 +1,205 @@
+# Copyright (C) 2022 Louis Vottero louis.vot@gmail.com    All rights reserved.
+
+"""
+    util_file.VersionFile saves, checked on the files a version keeps.
+"""
+
+from __future__ import absolute_import
+
+import os
+
+import pytest
+
+from vtool import util_file
+
+def get_folder(tmp_path):
+
+    folder = tmp_path / 'data'
+    folder.mkdir()
+
+    (folder / 'weights.txt').write_text(u'1 2 3')
+
+    sub_folder = folder / 'sub'
+    sub_folder.mkdir()
+    (sub_folder / 'info.txt').write_text(u'info')
+
+    return util_file.fix_slashes(str(folder))
+
+def get_saved_files(folder):
+
+    found = []
+
+    for root, dirs, files in os.walk(folder):
+
+        for name in files:
+            found.append(util_file.fix_slashes(os.path.relpath(os.path.join(root, name), folder)))
+
+    return sorted(found)
+
+@pytest.mark.parametrize('content_store', [False, True])
+def test_version_save_skips_lock(tmp_path, monkeypatch, content_store):
+
+    monkeypatch.setenv('VETALA_FILE_LOCKS', 'True')
+    monkeypatch.setenv('VETALA_VERSION_STORE', str(content_store))
+
+    folder = get_folder(tmp_path)
+
+    #the way data.py versions a data folder
+    version_file = util_file.VersionFile(folder)
+    version_file.set_version_folder(util_file.join_path(str(tmp_path), '.versions'))
+    version_file.set_version_folder_name('.data')
+    version_file.set_version_name('data')
+
+    version_path = version_file.save('first')
+
+    manifest = util_file.get_version_manifest(version_path)
+
+    if content_store:
+        assert sorted(manifest['files']) == ['sub/info.txt', 'weights.txt']
+    else:
+        assert manifest is None
+        assert sorted(util_file.get_basename(name) for name in get_saved_files(version_path)) == ['info.txt', 'weights.txt']
+
+    assert sorted(os.listdir(folder)) == ['sub', 'weights.txt']
+
+def get_objects(version_folder):
+
+    return sorted(get_saved_files(os.path.join(version_folder, '.objects')))
+
+def test_collect_garbage_grace(tmp_path, monkeypatch):
+
+    monkeypatch.setenv('VETALA_FILE_LOCKS', 'True')
+    monkeypatch.setenv('VETALA_VERSION_STORE', 'True')
+
+    filepath = tmp_path / 'weights.txt'
+
+    filepath.write_text(u'first')
+    version_file = util_file.VersionFile(str(filepath))
+    version_file.save('first')
+
+    filepath.write_text(u'second version')
+    version_file = util_file.VersionFile(str(filepath))
+    version_file.save('second')
+
+    version_folder = version_file._get_version_folder()
+
+    assert len(get_objects(version_folder)) == 2
+
+    version_file.delete_version(1)
+
+    #the unused object is new, it could belong to a save still running
+    assert version_file.collect_garbage() == (0, 0)
+    assert len(get_objects(version_folder)) == 2
+
+    old_time = os.path.getmtime(str(filepath)) - 3 * 86400
+
+    for name in get_objects(version_folder):
+        object_path = os.path.join(version_folder, '.objects', name)
+        os.utime(object_path, (old_time, old_time))
+
+    removed, size = version_file.collect_garbage()
+
+    assert removed == 1
+    assert len(get_objects(version_folder)) == 1
+
+    with open(version_file.get_version_path(2)) as open_file:
+        assert open_file.read() == 'second version'
+
+def test_collect_version_garbage_skips_version_folders(tmp_path, monkeypatch):
+
+    monkeypatch.setenv('VETALA_VERSION_STORE', 'True')
+
+    calls = []
+
+    def collect_garbage(self, grace_seconds = 86400):
+        calls.append(self.filepath)
+        return 0, 0
+
+    monkeypatch.setattr(util_file.VersionFile, 'collect_garbage', collect_garbage)
+
+    #a .version folder inside a version folder, like a versioned folder that was restored
+    nested = tmp_path / '.version' / '.restore' / 'version.1'
+    (nested / '.version' / '.objects').mkdir(parents = True)
+    (tmp_path / '.version' / '.objects').mkdir()
+
+    util_file.collect_version_garbage(str(tmp_path))
+
+    assert calls == [util_file.fix_slashes(str(tmp_path))]
+
+class RootIndex(util_file.JsonIndex):
+
+    max_records = 2
+
+    def __init__(self, index_file, root):
+
+        self.root = root
+
+        super(RootIndex, self).__init__(index_file)
+
+    def _get_header(self):
+        return {'root' : self.root}
+
+def test_json_index(tmp_path):
+
+    index_file = str(tmp_path / 'index' / 'index.json')
+
+    index = RootIndex(index_file, 'a')
+
+    for inc in range(3):
+        index.records['path%s' % inc] = {'scanned' : inc}
+
+    index.dirty = True
+    index.save()
+
+    #the oldest record is dropped past max_records
+    assert sorted(RootIndex(index_file, 'a').records) == ['path1', 'path2']
+
+    #a different header does not load
+    assert RootIndex(index_file, 'b').records == {}
+
+    assert index.is_racy(100.0, 101.0)
+    assert not index.is_racy(100.0, 100.0 + index.racy_seconds + 1)
+
+def test_file_batch_dirs(tmp_path):
+
+    folder = str(tmp_path / 'blend')
+
+    with util_file.FileBatch() as batch:
+        batch.add_dir(util_file.join_path(folder, 'empty_target'))
+        batch.add_lines(util_file.join_path(folder, 'target/mesh_0.weights'), [[0.5, 1.0]])
+
+    assert sorted(os.listdir(folder)) == ['empty_target', 'target']
+
+    with open(util_file.join_path(folder, 'target/mesh_0.weights')) as open_file:
+        assert open_file.read() == '[0.5, 1.0]'
+
+def test_write_lines_permission(tmp_path):
+
+    filepath = str(tmp_path / 'new.txt')
+
+    util_file.write_lines(filepath, ['a', 'b'])
+
+    assert util_file.get_file_lines(filepath) == ['a', 'b']
+
+    if not util_file.util.is_windows():
+        assert os.stat(filepath).st_mode & 0o777 == 0o777
+
+def test_write_file_in_place(tmp_path, monkeypatch):
+
+    filepath = str(tmp_path / 'data.json')
+    util_file.write_file(filepath, 'old')
+
+    #a read only folder, where no temp file can be made
+    def write_temp(filepath, text, fsync = False):
+        raise OSError('read only')
+
+    monkeypatch.setattr(util_file, '_write_temp', write_temp)
+
+    util_file.write_file(filepath, 'new')
+
+    with open(filepath) as open_file:
+        assert open_file.read() == 'new'
+
+    with pytest.raises(OSError):
+        util_file.write_file(str(tmp_path / 'missing.json'), 'new')
+
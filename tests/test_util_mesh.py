@@ -0,0 +1,307 @@
+# Copyright (C) 2022 Louis Vottero louis.vot@gmail.com    All rights reserved.
+
+"""
+    util_mesh.MeshTopology on synthetic meshes, checked against walking the faces one at a time.
+"""
+
+from __future__ import absolute_import
+
+import pytest
+
+from vtool import util_mesh
+
+#--- meshes
+
+def get_grid(columns, rows, start = 0):
+    """
+    A grid of quads. Returns face counts, face vertices and the vertex count.
+    """
+
+    face_counts = []
+    face_vertices = []
+
+    for row in range(rows):
+        for column in range(columns):
+
+            corner = start + row * (columns + 1) + column
+
+            face_counts.append(4)
+            face_vertices += [corner, corner + 1, corner + columns + 2, corner + columns + 1]
+
+    return face_counts, face_vertices, (columns + 1) * (rows + 1)
+
+def get_mesh():
+    """
+    A 4 x 3 quad grid, a separate triangle fan and a vertex no face uses.
+    """
+
+    face_counts, face_vertices, vert_count = get_grid(4, 3)
+
+    fan_center = vert_count
+    fan = [fan_center + 1, fan_center + 2, fan_center + 3, fan_center + 4]
+
+    for inc in range(len(fan)):
+        face_counts.append(3)
+        face_vertices += [fan_center, fan[inc], fan[(inc + 1) % len(fan)]]
+
+    vert_count += 5
+
+    #unused vertex
+    vert_count += 1
+
+    return face_counts, face_vertices, vert_count
+
+def get_faces(face_counts, face_vertices):
+
+    faces = []
+    start = 0
+
+    for count in face_counts:
+        faces.append(face_vertices[start:start + count])
+        start += count
+
+    return faces
+
+#--- reference
+
+def reference_neighbors(faces, vert_count):
+
+    neighbors = [set() for inc in range(vert_count)]
+
+    for face in faces:
+        for inc in range(len(face)):
+
+            vertex = face[inc]
+            next_vertex = face[(inc + 1) % len(face)]
+
+            if vertex != next_vertex:
+                neighbors[vertex].add(next_vertex)
+                neighbors[next_vertex].add(vertex)
+
+    return [sorted(found) for found in neighbors]
+
+def reference_surrounding(faces, neighbors, vertex):
+    """
+    The vertices around a vertex the way deform.smooth_skin_weights walked them:
+    the connected vertices of each face on the vertex, not counting the face's own vertices.
+    """
+
+    found = set()
+
+    for face in faces:
+
+        if not vertex in face:
+            continue
+
+        face_ring = set()
+
+        for face_vertex in face:
+            face_ring.update(neighbors[face_vertex])
+
+        found.update(face_ring.difference(face))
+
+    return sorted(found)
+
+def reference_islands(neighbors):
+
+    islands = []
+    visited = set()
+
+    for vertex in range(len(neighbors)):
+
+        if vertex in visited:
+            continue
+
+        island = []
+        stack = [vertex]
+        visited.add(vertex)
+
+        while stack:
+            current = stack.pop()
+            island.append(current)
+
+            for neighbor in neighbors[current]:
+                if not neighbor in visited:
+                    visited.add(neighbor)
+                    stack.append(neighbor)
+
+        islands.append(sorted(island))
+
+    return islands
+
+def get_rows(offsets, indices):
+
+    return [list(indices[offsets[inc]:offsets[inc + 1]]) for inc in range(len(offsets) - 1)]
+
+#--- tests
+
+def test_topology_rows(numpy_mode):
+
+    face_counts, face_vertices, vert_count = get_mesh()
+    faces = get_faces(face_counts, face_vertices)
+
+    topology = util_mesh.MeshTopology(face_counts, face_vertices, vert_count)
+
+    assert topology.vert_count == vert_count
+    assert topology.face_count == len(faces)
+
+    neighbors = reference_neighbors(faces, vert_count)
+
+    for face_index in range(len(faces)):
+        assert topology.get_face_vertices(face_index) == faces[face_index]
+
+    for vertex in range(vert_count):
+
+        vertex_faces = [face_index for face_index in range(len(faces)) if vertex in faces[face_index]]
+
+        assert topology.get_vertex_faces(vertex) == vertex_faces
+        assert topology.get_vertex_neighbors(vertex) == neighbors[vertex]
+
+@pytest.mark.parametrize('surrounding', [False, True])
+def test_vertex_rings(numpy_mode, surrounding):
+
+    face_counts, face_vertices, vert_count = get_mesh()
+    faces = get_faces(face_counts, face_vertices)
+    neighbors = reference_neighbors(faces, vert_count)
+
+    topology = util_mesh.MeshTopology(face_counts, face_vertices, vert_count)
+
+    vertex_indices = [0, 6, 7, 19, vert_count - 6, vert_count - 2, vert_count - 1]
+
+    for indices in [None, vertex_indices]:
+
+        offsets, found = topology.get_vertex_rings(indices, surrounding)
+
+        rows = [[int(value) for value in row] for row in get_rows(offsets, found)]
+
+        if indices is None:
+            indices = range(vert_count)
+
+        for inc, vertex in enumerate(indices):
+
+            if surrounding:
+                expected = reference_surrounding(faces, neighbors, vertex)
+                assert topology.get_surrounding_vertices(vertex) == expected
+            else:
+                expected = neighbors[vertex]
+
+            assert rows[inc] == expected
+
+def test_islands(numpy_mode):
+
+    face_counts, face_vertices, vert_count = get_mesh()
+
+    #a second grid that shares no vertex with the rest
+    grid_counts, grid_vertices, grid_count = get_grid(2, 2, start = vert_count)
+
+    face_counts = face_counts + grid_counts
+    face_vertices = face_vertices + grid_vertices
+    vert_count += grid_count
+
+    neighbors = reference_neighbors(get_faces(face_counts, face_vertices), vert_count)
+
+    topology = util_mesh.MeshTopology(face_counts, face_vertices, vert_count)
+
+    islands = topology.get_islands()
+
+    assert islands == reference_islands(neighbors)
+    assert len(islands) == 4
+
+    island_ids = [int(value) for value in topology.get_island_ids()]
+
+    for island in islands:
+        for vertex in island:
+            assert island_ids[vertex] == island[0]
+
+def test_islands_joined_late(numpy_mode):
+
+    #strips that are only joined by the last face, so roots have to merge more than once
+    face_counts = []
+    face_vertices = []
+
+    for inc in range(6):
+        face_counts.append(3)
+        face_vertices += [inc * 3, inc * 3 + 1, inc * 3 + 2]
+
+    for inc in range(5, 0, -1):
+        face_counts.append(2)
+        face_vertices += [inc * 3 + 2, (inc - 1) * 3]
+
+    topology = util_mesh.MeshTopology(face_counts, face_vertices)
+
+    assert topology.get_islands() == [list(range(18))]
+
+def test_topology_cache(numpy_mode):
+
+    face_counts, face_vertices, vert_count = get_grid(3, 3)
+
+    util_mesh.TopologyCache.clear()
+
+    topology = util_mesh.get_topology(face_counts, face_vertices, vert_count)
+
+    assert util_mesh.get_topology(face_counts, face_vertices, vert_count) is topology
+
+    fingerprint = util_mesh.get_topology_fingerprint(face_counts, face_vertices)
+    assert fingerprint == util_mesh.get_topology_fingerprint(list(face_counts), list(face_vertices))
+
+    other_counts, other_vertices, other_count = get_grid(4, 2)
+    assert util_mesh.get_topology_fingerprint(other_counts, other_vertices) != fingerprint
+
+    util_mesh.TopologyCache.clear()
+
+def test_mirror_map(numpy_mode, tmp_path):
+
+    points = [[1.0, 0.0, 0.0], [-1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [2.0, 1.0, 0.5], [-2.0, 1.0, 0.5], [3.0, 0.0, 0.0]]
+    points += [[4.0, 2.0, 0.0], [-4.0, 2.0, 0.0], [5.0, 2.0, 0.0], [-5.0, 2.0, 0.0]]
+
+    expected = [1, 0, 2, 4, 3, -1, 7, 6, 9, 8]
+
+    util_mesh.MirrorMapCache.clear()
+
+    mirror_map = util_mesh.get_mirror_map(points, 'mesh', 'x', directory = str(tmp_path))
+
+    assert list(mirror_map) == expected
+
+    #found again from the saved file, without the points
+    util_mesh.MirrorMapCache.clear()
+
+    assert list(util_mesh.get_mirror_map(lambda: pytest.fail('points were used'), 'mesh', 'x', directory = str(tmp_path))) == expected
+
+    #a different topology does not load the file
+    util_mesh.MirrorMapCache.clear()
+
+    assert util_mesh.load_mirror_maps(str(tmp_path), 'other') == []
+    assert util_mesh.load_mirror_maps(str(tmp_path), 'mesh') == ['x']
+
+    util_mesh.MirrorMapCache.clear()
+
+def test_mirror_map_posed_is_not_kept(numpy_mode, tmp_path):
+
+    util_mesh.MirrorMapCache.clear()
+
+    #most points moved off their mirror, like a posed mesh
+    points = [[1.0, 0.0, 0.0], [-1.0, 0.0, 0.0], [2.0, 0.3, 0.0], [-2.0, 0.0, 0.0], [3.0, 0.5, 0.0], [-3.0, 0.0, 0.0]]
+
+    mirror_map = util_mesh.get_mirror_map(points, 'mesh', 'x', directory = str(tmp_path))
+
+    assert list(mirror_map) == [1, 0, -1, -1, -1, -1]
+    assert util_mesh.get_match_ratio(mirror_map) == pytest.approx(2 / 6.0)
+
+    assert util_mesh.MirrorMapCache.get(('mesh', 'x', 0.00001)) is None
+    assert not (tmp_path / 'mirror_x.map').exists()
+
+    util_mesh.MirrorMapCache.clear()
+
+def test_mirror_map_cache_is_bounded(numpy_mode):
+
+    util_mesh.MirrorMapCache.clear()
+
+    points = [[1.0, 0.0, 0.0], [-1.0, 0.0, 0.0]]
+
+    for inc in range(util_mesh.MirrorMapCache.max_count + 5):
+        util_mesh.get_mirror_map(points, 'mesh%s' % inc)
+
+    assert len(util_mesh.MirrorMapCache.maps) == util_mesh.MirrorMapCache.max_count
+    assert util_mesh.MirrorMapCache.get(('mesh0', 'x', 0.00001)) is None
+
+    util_mesh.MirrorMapCache.clear()
@@ -0,0 +1,149 @@
+# Copyright (C) 2022 Louis Vottero louis.vot@gmail.com    All rights reserved.
+
+"""
+    util_spatial.SpatialIndex queries checked against testing every point.
+"""
+
+from __future__ import absolute_import
+
+import math
+import random
+
+import pytest
+
+from vtool import util_spatial
+
+def get_points(count, seed = 2):
+
+    generator = random.Random(seed)
+
+    points = [[generator.uniform(-5, 5), generator.uniform(0, 10), generator.uniform(-2, 2)] for inc in range(count)]
+
+    #a few points that sit on top of each other
+    points += [list(points[0]), list(points[1])]
+
+    return points
+
+def get_distance(point1, point2):
+
+    return math.sqrt(sum((point1[inc] - point2[inc])**2 for inc in range(3)))
+
+def brute_sorted(points, position, max_distance = None):
+
+    found = []
+
+    for inc, point in enumerate(points):
+
+        distance = get_distance(point, position)
+
+        if max_distance is not None and distance > max_distance:
+            continue
+
+        found.append((distance, inc))
+
+    return [index for distance, index in sorted(found)]
+
+def get_positions(seed = 3):
+
+    generator = random.Random(seed)
+
+    #inside the points, and well outside of them
+    positions = [[generator.uniform(-6, 6), generator.uniform(-1, 11), generator.uniform(-3, 3)] for inc in range(30)]
+    positions += [[40.0, 0.0, 0.0], [0.0, -25.0, 3.0]]
+
+    return positions
+
+@pytest.mark.parametrize('cell_size', [None, 0.3, 4.0])
+def test_query_radius(numpy_mode, cell_size):
+
+    points = get_points(400)
+    index = util_spatial.SpatialIndex(points, cell_size)
+
+    assert len(index) == len(points)
+
+    for position in get_positions():
+        for radius in [0.5, 1.5, 3.0]:
+            assert [int(value) for value in index.query_radius(position, radius)] == brute_sorted(points, position, radius)
+
+@pytest.mark.parametrize('cell_size', [None, 0.3, 4.0])
+def test_query_k_nearest(numpy_mode, cell_size):
+
+    points = get_points(400)
+    index = util_spatial.SpatialIndex(points, cell_size)
+
+    for position in get_positions():
+
+        expected = brute_sorted(points, position)
+
+        for count in [1, 5, 20]:
+            assert [int(value) for value in index.query_k_nearest(position, count)] == expected[:count]
+
+        assert [int(value) for value in index.query_k_nearest(position, 10, max_distance = 1.0)] == brute_sorted(points, position, 1.0)[:10]
+
+        assert index.query_nearest(position) == expected[0]
+
+def test_query_nearest_many(numpy_mode):
+
+    points = get_points(200)
+    index = util_spatial.SpatialIndex(points)
+
+    positions = get_positions()
+
+    expected = []
+    for position in positions:
+        found = brute_sorted(points, position, 2.0)
+        expected.append(found[0] if found else None)
+
+    assert index.query_nearest_many(positions, 2.0) == expected
+
+def test_empty_index(numpy_mode):
+
+    index = util_spatial.SpatialIndex([])
+
+    assert index.query_radius([0, 0, 0], 1) == []
+    assert index.query_k_nearest([0, 0, 0], 3) == []
+    assert index.query_nearest([0, 0, 0]) is None
+    assert list(index.get_matches([[0, 0, 0]])) == [-1]
+
+@pytest.mark.parametrize('tolerance', [0.00001, 0.01, 10.0])
+def test_get_matches(numpy_mode, tolerance):
+
+    points = get_points(300)
+    index = util_spatial.SpatialIndex(points)
+
+    generator = random.Random(7)
+
+    positions = []
+    for point in points[:50]:
+        positions.append([value + generator.uniform(-0.002, 0.002) for value in point])
+    positions += get_positions()
+
+    expected = []
+    for position in positions:
+        found = brute_sorted(points, position, tolerance)
+        expected.append(found[0] if found else -1)
+
+    assert [int(value) for value in index.get_matches(positions, tolerance)] == expected
+
+def test_get_mirror_matches(numpy_mode):
+
+    generator = random.Random(4)
+
+    points = []
+    for inc in range(100):
+        point = [generator.uniform(0.1, 3), generator.uniform(-3, 3), generator.uniform(-3, 3)]
+        points.append(point)
+        points.append([-point[0], point[1], point[2]])
+
+    #on the mirror plane, and one without a mirror point
+    points.append([0.0, 1.0, 1.0])
+    points.append([5.0, 5.0, 5.0])
+
+    matches = [int(value) for value in util_spatial.get_mirror_matches(points, 'x')]
+
+    for inc in range(100):
+        assert matches[inc * 2] == inc * 2 + 1
+        assert matches[inc * 2 + 1] == inc * 2
+
+    assert matches[-2] == len(points) - 2
+    assert matches[-1] == -1
@@ -0,0 +1,472 @@
+# Copyright (C) 2022 Louis Vottero louis.vot@gmail.com    All rights reserved.
+
+"""
+    util_weights checked against the per vertex rules it replaced in data.SkinWeightData and deform.TransferWeight
+"""
+
+from __future__ import absolute_import
+
+import math
+import random
+
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+from vtool import util_mesh
+from vtool import util_weights
+
+#--- reference, the per vertex rules
+
+def reference_falloff(distances, falloff, power):
+    """
+    The weights of TransferWeight.transfer_joints_to_new_joints for one vertex.
+    Distance is measured from the closest joint.
+    """
+
+    smallest_distance = min(distances)
+
+    in_range = {}
+
+    for joint_index in range(0, len(distances)):
+
+        distance_away = distances[joint_index] - smallest_distance
+
+        if distance_away > falloff:
+            continue
+
+        in_range[joint_index] = (1 - distance_away/falloff)**power
+
+    total = sum(in_range.values())
+
+    weights = [0.0] * len(distances)
+
+    for joint_index in in_range:
+        weights[joint_index] = in_range[joint_index]/total
+
+    return weights
+
+def reference_exact_falloff(distances, falloff, power):
+    """
+    The weights of TransferWeight.transfer_exact_falloff_joints_to_new_joints for one vertex.
+    Distance is measured from the vertex.
+    """
+
+    in_range = {}
+
+    for joint_index in range(0, len(distances)):
+
+        distance = distances[joint_index]
+
+        if distance > falloff:
+            continue
+
+        in_range[joint_index] = (1 - min(distance/falloff, 1))**power
+
+    total = sum(in_range.values())
+
+    weights = [0.0] * len(distances)
+
+    if not in_range or not total:
+        #the old loop divided by zero when every joint in range sat on the falloff, now those go to the closest joint too
+        weights[distances.index(min(distances))] = 1.0
+        return weights
+
+    for joint_index in in_range:
+        weights[joint_index] = in_range[joint_index]/total
+
+    return weights
+
+def reference_transfer(source_weights, distances, falloff, power, exact, weight_percent_change):
+    """
+    The new weights of one vertex: the source joints keep (1 - weight_percent_change) of their weight
+    and the rest of their total goes to the new joints.
+    """
+
+    if exact:
+        joint_weights = reference_exact_falloff(distances, falloff, power)
+    else:
+        joint_weights = reference_falloff(distances, falloff, power)
+
+    total = sum(source_weights)
+
+    new_source = [value * (1 - weight_percent_change) for value in source_weights]
+    new_joints = [total * value * weight_percent_change for value in joint_weights]
+
+    return new_source, new_joints
+
+#--- data
+
+def get_positions(count, seed = 1):
+
+    generator = random.Random(seed)
+
+    return [[generator.uniform(-2, 2), generator.uniform(0, 6), generator.uniform(-1, 1)] for inc in range(count)]
+
+def get_joint_positions(count):
+
+    return [[0.0, inc * 6.0 / (count - 1), 0.0] for inc in range(count)]
+
+def get_distance(position, joint_position):
+
+    return math.sqrt(sum((position[inc] - joint_position[inc])**2 for inc in range(3)))
+
+#--- transfer
+
+def test_get_distances():
+
+    positions = get_positions(50)
+    joint_positions = get_joint_positions(4)
+
+    distances = util_weights.get_distances(positions, joint_positions)
+
+    assert distances.shape == (50, 4)
+
+    for inc in range(len(positions)):
+        for inc2 in range(len(joint_positions)):
+            assert distances[inc, inc2] == pytest.approx(get_distance(positions[inc], joint_positions[inc2]))
+
+@pytest.mark.parametrize('exact', [False, True])
+@pytest.mark.parametrize('falloff, power', [(1, 4), (2.5, 2), (0.25, 1)])
+def test_get_falloff_weights(exact, falloff, power):
+
+    positions = get_positions(300)
+    distances = util_weights.get_distances(positions, get_joint_positions(5))
+
+    weights = util_weights.get_falloff_weights(distances, falloff, power, exact)
+
+    for inc in range(len(positions)):
+
+        if exact:
+            expected = reference_exact_falloff(distances[inc].tolist(), falloff, power)
+        else:
+            expected = reference_falloff(distances[inc].tolist(), falloff, power)
+
+        assert weights[inc].tolist() == pytest.approx(expected)
+
+    assert weights.sum(axis = 1) == pytest.approx(numpy.ones(len(positions)))
+
+def test_exact_falloff_no_joint_in_range():
+
+    distances = numpy.array([[3.0, 2.0, 5.0]])
+
+    weights = util_weights.get_falloff_weights(distances, falloff = 1, exact = True)
+
+    assert weights.tolist() == [[0.0, 1.0, 0.0]]
+
+@pytest.mark.parametrize('exact', [False, True])
+def test_falloff_all_joints_on_falloff(exact):
+
+    #exact: every joint in range sits right on the falloff, so none of them get weight
+    #relative: every joint past the closest one sits right on the falloff
+    distances = numpy.array([[1.0, 1.0, 1.0],
+                             [2.0, 1.0, 2.0],
+                             [1.0, 2.0, 3.0]])
+
+    weights = util_weights.get_falloff_weights(distances, falloff = 1, power = 4, exact = exact)
+
+    if exact:
+        assert weights.tolist() == [[1.0, 0.0, 0.0],
+                                    [0.0, 1.0, 0.0],
+                                    [1.0, 0.0, 0.0]]
+    else:
+        assert weights.tolist() == [[1/3.0, 1/3.0, 1/3.0],
+                                    [0.0, 1.0, 0.0],
+                                    [1.0, 0.0, 0.0]]
+
+    for inc in range(len(distances)):
+
+        if exact:
+            expected = reference_exact_falloff(distances[inc].tolist(), 1, 4)
+        else:
+            expected = reference_falloff(distances[inc].tolist(), 1, 4)
+
+        assert weights[inc].tolist() == pytest.approx(expected)
+
+@pytest.mark.parametrize('exact', [False, True])
+@pytest.mark.parametrize('weight_percent_change', [1, 0.5, 0.2, 0])
+def test_transfer_weights(exact, weight_percent_change):
+
+    generator = random.Random(3)
+
+    vert_count = 200
+    positions = get_positions(vert_count, seed = 4)
+    joint_positions = get_joint_positions(4)
+
+    #two source joints, one other joint that is left alone and four new joints with no weight yet
+    matrix = numpy.zeros((vert_count, 7))
+    for inc in range(vert_count):
+        matrix[inc, :3] = [generator.random(), generator.random(), generator.random()]
+    matrix[:, :3] /= matrix[:, :3].sum(axis = 1)[:,None]
+
+    #some vertices have no weight on the source joints
+    matrix[::10, :2] = 0.0
+    matrix[::10, 2] = 1.0
+
+    source_columns = [0, 1]
+    target_columns = [3, 4, 5, 6]
+
+    vert_indices = numpy.nonzero(matrix[:, source_columns].sum(axis = 1) > 0)[0]
+
+    distances = util_weights.get_distances(numpy.array(positions)[vert_indices], joint_positions)
+    target_weights = util_weights.get_falloff_weights(distances, 1.5, 4, exact)
+
+    original = matrix.copy()
+
+    result = util_weights.transfer_weights(matrix, source_columns, target_columns, target_weights, vert_indices, weight_percent_change)
+
+    assert result is matrix
+
+    for inc in range(vert_count):
+
+        if not inc in vert_indices:
+            assert matrix[inc].tolist() == original[inc].tolist()
+            continue
+
+        source_weights = original[inc, source_columns].tolist()
+        joint_distances = [get_distance(positions[inc], joint_position) for joint_position in joint_positions]
+
+        new_source, new_joints = reference_transfer(source_weights, joint_distances, 1.5, 4, exact, weight_percent_change)
+
+        assert matrix[inc, source_columns].tolist() == pytest.approx(new_source)
+        assert matrix[inc, target_columns].tolist() == pytest.approx(new_joints)
+        assert matrix[inc, 2] == original[inc, 2]
+
+        #weight is moved, not made
+        assert matrix[inc].sum() == pytest.approx(1.0)
+
+#--- smooth and sharpen
+
+def reference_smooth(weights, rings, vert_indices, iterations, percent):
+    """
+    deform.smooth_skin_weights before the array kernels, on more than 200 vertices.
+    Each iteration reads the weights once, then averages every vertex with its ring.
+    """
+
+    weights = [list(row) for row in weights]
+
+    for inc in range(0, iterations):
+
+        current = [list(row) for row in weights]
+
+        for vert_index in vert_indices:
+
+            surrounding = rings[vert_index] + [vert_index]
+
+            for influence_index in range(0, len(current[vert_index])):
+
+                sub_weights = [current[surrounding_index][influence_index] for surrounding_index in surrounding]
+
+                average = min(sum(sub_weights) / len(sub_weights), 1)
+
+                current_weight = current[vert_index][influence_index]
+
+                weights[vert_index][influence_index] = average*percent + ((1-percent)*current_weight)
+
+    return weights
+
+def reference_sharpen(weights, vert_indices, iterations, percent):
+    """
+    deform.sharpen_skin_weights before the array kernels.
+    """
+
+    weights = [list(row) for row in weights]
+
+    for inc in range(0, iterations):
+
+        for vert_index in vert_indices:
+
+            current = list(weights[vert_index])
+
+            risers = [value**2 for value in current]
+            total_risen = sum(risers)
+
+            for influence_index in range(0, len(current)):
+
+                value = 0.0
+                if total_risen:
+                    value = risers[influence_index]/total_risen
+
+                weights[vert_index][influence_index] = value*percent + (1-percent) * current[influence_index]
+
+    return weights
+
+def get_grid_topology(size):
+
+    face_counts = []
+    face_vertices = []
+
+    for row in range(size):
+        for column in range(size):
+            corner = row * (size + 1) + column
+            face_counts.append(4)
+            face_vertices += [corner, corner + 1, corner + size + 2, corner + size + 1]
+
+    return util_mesh.MeshTopology(face_counts, face_vertices)
+
+def get_skin_matrix(vert_count, influence_count, seed = 6):
+
+    generator = random.Random(seed)
+
+    matrix = numpy.zeros((vert_count, influence_count))
+
+    for inc in range(vert_count):
+        for inc2 in generator.sample(range(influence_count), 3):
+            matrix[inc, inc2] = generator.random()
+
+    #some rows are all on one influence, some have no weight
+    matrix[::7] = 0.0
+    matrix[::7, 0] = 1.0
+    matrix[::13] = 0.0
+
+    return matrix
+
+@pytest.mark.parametrize('surrounding', [True, False])
+@pytest.mark.parametrize('iterations, percent', [(1, 1), (3, 1), (2, 0.4)])
+def test_smooth_weights(surrounding, iterations, percent):
+
+    topology = get_grid_topology(15)
+    matrix = get_skin_matrix(topology.vert_count, 5)
+
+    vert_indices = list(range(20, 200))
+
+    ring_offsets, ring_indices = topology.get_vertex_rings(vert_indices, surrounding)
+    all_offsets, all_indices = topology.get_vertex_rings(None, surrounding)
+
+    rings = [all_indices[all_offsets[inc]:all_offsets[inc + 1]].tolist() for inc in range(topology.vert_count)]
+
+    found = util_weights.smooth_weights(matrix, ring_offsets, ring_indices, vert_indices, iterations, percent, normalize = False)
+    expected = reference_smooth(matrix.tolist(), rings, vert_indices, iterations, percent)
+
+    assert found.tolist() == [pytest.approx(row) for row in expected]
+
+    #smoothing returns a new matrix
+    assert not numpy.shares_memory(found, matrix)
+
+@pytest.mark.parametrize('iterations, percent', [(1, 1), (3, 1), (2, 0.4)])
+def test_sharpen_weights(iterations, percent):
+
+    matrix = get_skin_matrix(150, 5)
+
+    vert_indices = list(range(10, 120))
+
+    found = util_weights.sharpen_weights(matrix, vert_indices, iterations, percent, normalize = False)
+    expected = reference_sharpen(matrix.tolist(), vert_indices, iterations, percent)
+
+    assert found.tolist() == [pytest.approx(row) for row in expected]
+
+def test_filter_weights_locks_and_normalize():
+
+    topology = get_grid_topology(6)
+    matrix = get_skin_matrix(topology.vert_count, 4)
+    matrix /= numpy.maximum(matrix.sum(axis = 1), 1)[:,None]
+
+    locked = [False, True, False, False]
+
+    ring_offsets, ring_indices = topology.get_vertex_rings(None, True)
+
+    for found in [util_weights.smooth_weights(matrix, ring_offsets, ring_indices, iterations = 2, locked = locked),
+                  util_weights.sharpen_weights(matrix, iterations = 2, locked = locked, max_influences = 2)]:
+
+        assert found[:,1].tolist() == matrix[:,1].tolist()
+
+        has_weight = found.sum(axis = 1) > 0
+        assert found[has_weight].sum(axis = 1).tolist() == pytest.approx([1.0] * int(has_weight.sum()))
+
+#--- assemble
+
+def get_influence_weights(vert_count, influence_count, seed = 5):
+
+    generator = random.Random(seed)
+
+    weights = []
+
+    for inc in range(influence_count):
+        weights.append([generator.choice([0, 0, 1, generator.random()]) for inc2 in range(vert_count)])
+
+    return weights
+
+def reference_assemble(weights_found):
+    """
+    The weight array SkinWeightData.import_skin_weights built one value at a time.
+    """
+
+    weight_array = []
+
+    for inc in range(0, len(weights_found[0])):
+
+        for inc2 in range(0, len(weights_found)):
+
+            weight = weights_found[inc2][inc]
+
+            if type(weight) == int:
+                weight = float(weight)
+
+            weight_array.append(weight)
+
+    return weight_array
+
+def test_assemble_weights():
+
+    weights = get_influence_weights(120, 6)
+
+    found = util_weights.assemble_weights(weights)
+
+    assert found.dtype == numpy.float64
+    assert found.tolist() == reference_assemble(weights)
+
+def test_assemble_weights_keeps_weights_as_exported():
+
+    #partial and non normalized weights are set the way they were exported
+    weights = [[0.5, 0.2, 0.0], [0.25, 0.2, 0.0]]
+
+    assert util_weights.assemble_weights(weights).tolist() == [0.5, 0.25, 0.2, 0.2, 0.0, 0.0]
+
+def test_assemble_weights_options():
+
+    weights = [[0.5, 0.00001, 0.0], [0.25, 0.6, 0.0]]
+
+    found = util_weights.assemble_weights(weights, prune = 0.0001, normalize = True)
+
+    assert found.tolist() == pytest.approx([2/3.0, 1/3.0, 0.0, 1.0, 0.0, 0.0])
+
+def test_assemble_weights_from_csr():
+
+    weights = get_influence_weights(80, 4)
+
+    indptr, indices, values = util_weights._columns_to_csr(weights, 80)
+
+    csr = util_weights.SkinWeightsCsr(['a', 'b', 'c', 'd'], [[0, 0, 0]] * 4, indptr, indices, values, 80)
+
+    assert util_weights.assemble_weights(csr).tolist() == pytest.approx(reference_assemble(weights))
+
+def test_assemble_weights_empty():
+
+    assert util_weights.assemble_weights([], vert_count = 3).tolist() == []
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_binary_weights_file(numpy_mode, monkeypatch, tmp_path, compress):
+
+    if numpy_mode == 'python':
+        monkeypatch.setattr(util_weights, 'numpy', None)
+
+    influences = ['joint1', 'joint2', 'joint3']
+    positions = [[0, 0, 0], [0, 1, 0], [0, 2, 0.5]]
+    weights = [[1.0, 0.5, 0.0, 0.0], [0.0, 0.5, 0.25, 0.0], [0.0, 0.0, 0.75, 1.0]]
+
+    filepath = str(tmp_path / util_weights.BINARY_WEIGHTS_FILE)
+
+    util_weights.write_skin_weights(filepath, influences, positions, weights, 4, compress)
+
+    for memory_map in [True, False]:
+
+        csr = util_weights.read_skin_weights(filepath, memory_map)
+
+        assert csr.influences == influences
+        assert csr.vert_count == 4
+        assert csr.get_position('joint3') == [0.0, 2.0, 0.5]
+
+        found = csr.get_influence_weights()
+
+        for inc in range(len(influences)):
+            assert [float(value) for value in found[influences[inc]]] == weights[inc]